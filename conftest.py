@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+import db
+from db.game_state import GameStates
+
+
+def game_row(game_id: str, **columns) -> dict:
+    """Columns of a test game that hasn't been posted about, overridden by
+    any columns passed."""
+    return {
+        "id": game_id,
+        "start_ts": datetime(1808, 1, 1),
+        "home_team": "test_home_team",
+        "away_team": "test_away_team",
+        "home_team_id": "test_home_id",
+        "away_team_id": "test_away_id",
+        "home_wins": 0,
+        "home_losses": 0,
+        "home_conf_wins": 0,
+        "home_conf_losses": 0,
+        "away_wins": 0,
+        "away_losses": 0,
+        "away_conf_wins": 0,
+        "away_conf_losses": 0,
+        "home_score": 0,
+        "away_score": 0,
+        "networks": "",
+        "trackable": True,
+        **columns,
+    }
+
+
+@pytest.fixture(name="game_row")
+def game_row_fixture():
+    return game_row
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point the database session at an empty sqlite database for the test,
+    so tests that publish every queued post never see the bot's own."""
+    monkeypatch.setattr(db, "_DB_SESSION", None)
+    # the game state cache binds to the session it's first used with
+    monkeypatch.setattr(GameStates, "_session", None)
+    monkeypatch.setattr(GameStates, "_listening", False)
+    monkeypatch.setattr(GameStates, "games", {})
+    session = db.init_db(f"sqlite:///{tmp_path / 'test.db'}")
+    yield session
+    session.close()
+    session.get_bind().dispose()
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import httpx
+from db.telemetry import QueryBuffer
+
+from data.espn_api import RETRY_STATUS_CODES, _ESPNEndpoints
+from data.espn_schema import decode
+from data.response_cache import ResponseCache
+
+
+class _AsyncESPNAPI(_ESPNEndpoints):
+    """Concurrent ESPN API client for fanning out many requests at once."""
+
+    def __init__(
+        self,
+        max_concurrency: int | None = 8,
+        max_connections: int | None = 10,
+        max_retries: int | None = 3,
+        backoff_factor: float | None = 0.5,
+        timeout: float | None = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Configure the async HTTP transport used for concurrent ESPN
+        requests.
+
+        Args:
+            max_concurrency (int): maximum number of requests in flight at once
+            max_connections (int): maximum number of open connections, all of which are kept alive
+            max_retries (int): retries for connection errors and retryable status codes
+            backoff_factor (float): exponential backoff factor between retries, in seconds
+            timeout (float): request timeout in seconds
+            transport (optional, httpx.AsyncBaseTransport): transport override, used for testing
+        """
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.transport = transport
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create a pooled async client bound to the running event loop.
+
+        Returns:
+            httpx.AsyncClient: client with connection limits and connect retries configured
+        """
+        transport = self.transport or httpx.AsyncHTTPTransport(
+            retries=self.max_retries,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    async def _call_espn(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str, endpoint: str
+    ) -> tuple[dict, dict]:
+        """Query ESPN API, retrying rate limited and failed responses. Fresh
+        cached responses are returned without a request, stale ones are
+        revalidated with a conditional GET.
+
+        Args:
+            client (httpx.AsyncClient): client to send the request with
+            semaphore (asyncio.Semaphore): semaphore bounding the number of requests in flight
+            url (str): url in espn's api to query
+            endpoint (str): endpoint type used to pick the cache policy
+
+        Returns:
+            tuple: json response from the api and the api_queries record for the request
+        """
+        cached = ResponseCache.get(endpoint, url)
+        if ResponseCache.is_fresh(endpoint, cached):
+            query = {
+                "url": url,
+                "status_code": 200,
+                "date_ts": datetime.now(),
+                "cache_status": "hit",
+                "latency_ms": 0,
+            }
+            return cached.payload, query
+
+        async with semaphore:
+            started = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                response = await client.get(url, headers=ResponseCache.conditional_headers(cached))
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    break
+                await asyncio.sleep(self.backoff_factor * 2**attempt)
+            latency_ms = (time.perf_counter() - started) * 1000
+
+        payload, cache_status = ResponseCache.update(
+            endpoint,
+            url,
+            cached,
+            response.status_code,
+            response.headers,
+            lambda: decode(endpoint, response.content),
+        )
+        query = {
+            "url": url,
+            "status_code": response.status_code,
+            "date_ts": datetime.now(),
+            "cache_status": cache_status,
+            "latency_ms": latency_ms,
+        }
+
+        if payload is not None:
+            return payload, query
+        else:
+            logging.error(f"Error querying ESPN API: {response.status_code} for URL {url}")
+            return {}, query
+
+    async def _fetch_all(self, urls: dict[str, str], endpoint: str, results: queue.Queue):
+        """Fetch every url concurrently, publishing each response as it
+        completes.
+
+        Args:
+            urls (dict): mapping of result key to url
+            endpoint (str): endpoint type used to pick the cache policy
+            results (queue.Queue): queue receiving (key, response, query) tuples, or the exception if the client fails
+        """
+
+        async def fetch(key: str, url: str) -> tuple[str, dict, dict]:
+            try:
+                return (key, *await self._call_espn(client, semaphore, url, endpoint))
+            except httpx.HTTPError as e:
+                # one failed request mustn't cancel the rest, so it's treated like an error status
+                logging.error(f"Error querying ESPN API: {e!r} for URL {url}")
+                query = {
+                    "url": url,
+                    "status_code": 0,
+                    "date_ts": datetime.now(),
+                    "cache_status": None,
+                    "latency_ms": None,
+                }
+                return key, {}, query
+
+        try:
+            async with self._create_client() as client:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                for task in asyncio.as_completed([fetch(key, url) for key, url in urls.items()]):
+                    results.put(await task)
+        except Exception as e:
+            results.put(e)
+
+    def fetch(self, urls: dict[str, str], endpoint: str) -> Iterator[tuple[str, dict]]:
+        """Fetch urls concurrently and yield responses in completion order.
+
+        Requests run on an event loop in a worker thread so callers can
+        process each response while the rest are still in flight. Query
+        records are buffered from the calling thread.
+
+        Args:
+            urls (dict): mapping of result key to url
+            endpoint (str): endpoint type used to pick the cache policy
+
+        Yields:
+            tuple: result key and json response from the api
+        """
+        if not urls:
+            return
+
+        results = queue.Queue()
+        worker = threading.Thread(target=asyncio.run, args=(self._fetch_all(urls, endpoint, results),), daemon=True)
+        worker.start()
+
+        for _ in range(len(urls)):
+            result = results.get()
+            if isinstance(result, Exception):
+                raise result
+
+            key, response, query = result
+            QueryBuffer.record(query)
+            yield key, response
+
+        worker.join()
+
+    def scoreboards(self, dates: Iterable[str], group: str) -> Iterator[tuple[str, dict]]:
+        """Query the ESPN scoreboard API for several dates concurrently.
+
+        Args:
+            dates (Iterable[str]): dates to query in %Y%m%d format
+            group (str): ESPN group to query
+
+        Yields:
+            tuple: date and json response from the API
+        """
+        yield from self.fetch({date: self._create_scoreboard_url(date, group) for date in dates}, "scoreboard")
+
+    def teams(self, team_ids: Iterable[str]) -> Iterator[tuple[str, dict]]:
+        """Query the ESPN team API for several teams concurrently.
+
+        Args:
+            team_ids (Iterable[str]): ESPN team IDs
+
+        Yields:
+            tuple: team ID and json response from the API
+        """
+        yield from self.fetch({team_id: self._create_team_url(team_id) for team_id in team_ids}, "team")
+
+    def games(self, game_ids: Iterable[str]) -> Iterator[tuple[str, dict]]:
+        """Query the ESPN game API for several games concurrently.
+
+        Args:
+            game_ids (Iterable[str]): ESPN game IDs
+
+        Yields:
+            tuple: game ID and json response from the API
+        """
+        yield from self.fetch({game_id: self._create_game_url(game_id) for game_id in game_ids}, "game")
+
+
+AsyncESPNAPI = _AsyncESPNAPI()
@@ -0,0 +1,56 @@
+"""Benchmark decoding ESPN responses in full against decoding only the
+sections the parser needs.
+
+Run from the repository root with `python -m data.benchmarks.bench_decode`.
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from data.espn_parser import ESPNParser
+from data.espn_schema import decode
+
+RESOURCES = "data/tests/resources"
+FIXTURES = {
+    "game_with_missed_pat.json": ("game", ESPNParser.scoring_plays),
+    "game_with_pick_six.json": ("game", ESPNParser.scoring_plays),
+    "game_with_safety.json": ("game", ESPNParser.scoring_plays),
+    "scoreboard.json": ("scoreboard", ESPNParser.games),
+    "winning_team.json": ("team", ESPNParser.team_info),
+}
+
+
+def peak_memory(function) -> int:
+    """Peak memory allocated while running a function, in bytes."""
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(number: int = 20):
+    print(f"{'fixture':<26}{'size':>8}{'json ms':>10}{'schema ms':>11}{'json MiB':>10}{'schema MiB':>12}")
+    for fixture, (endpoint, parse) in FIXTURES.items():
+        with open(f"{RESOURCES}/{fixture}", "rb") as f:
+            content = f.read()
+
+        def full():
+            return parse(json.loads(content))
+
+        def selective():
+            return parse(decode(endpoint, content))
+
+        assert full() == selective()
+
+        full_ms = timeit.timeit(full, number=number) / number * 1000
+        selective_ms = timeit.timeit(selective, number=number) / number * 1000
+        print(
+            f"{fixture:<26}{len(content) // 1024:>6}KB{full_ms:>10.2f}{selective_ms:>11.2f}"
+            f"{peak_memory(full) / 2**20:>10.2f}{peak_memory(selective) / 2**20:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
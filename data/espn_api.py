@@ -1,12 +1,21 @@
 import logging
+import time
 from datetime import datetime
 
 import requests
-from db.db_utils import add_record
+from db.telemetry import QueryBuffer
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 
+from data.espn_schema import decode
+from data.response_cache import ResponseCache
 
-class _ESPNAPI:
-    """ESPN API endpoints."""
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class _ESPNEndpoints:
+    """ESPN API endpoint URLs."""
 
     @property
     def game_base_url(self) -> str:
@@ -20,33 +29,6 @@ class _ESPNAPI:
     def team_base_url(self) -> str:
         return "https://site.api.espn.com/apis/site/v2/sports/football/college-football/teams/"
 
-    def _call_espn(self, url: str) -> dict:
-        """Query ESPN API.
-
-        Args:
-            url (str): url in espn's api to query
-
-        Returns:
-            dict: json response from the api
-        """
-        response = requests.get(url, timeout=10)
-        add_record(
-            "api_queries",
-            {
-                "url": url,
-                "status_code": response.status_code,
-                "date_ts": datetime.now(),
-            },
-        )
-
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logging.error(
-                f"Error querying ESPN API: {response.status_code} for URL {url}"
-            )
-            return {}
-
     def _create_scoreboard_url(self, date: str, group: str) -> str:
         """Generate a scoreboard query URL.
 
@@ -91,6 +73,146 @@ class _ESPNAPI:
 
         return f"{self.game_base_url}{game_id}"
 
+
+class _ESPNAPI(_ESPNEndpoints):
+    """ESPN API endpoints."""
+
+    def __init__(
+        self,
+        pool_connections: int | None = 4,
+        pool_maxsize: int | None = 10,
+        max_retries: int | None = 3,
+        backoff_factor: float | None = 0.5,
+        timeout: float | None = 10,
+    ) -> None:
+        """Configure the pooled HTTP transport used for every ESPN request.
+
+        Args:
+            pool_connections (int): number of per-host connection pools to keep around
+            pool_maxsize (int): maximum number of connections kept open per host
+            max_retries (int): retries for connection errors and retryable status codes
+            backoff_factor (float): exponential backoff factor between retries, in seconds
+            timeout (float): request timeout in seconds
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session shared by every request, created on first
+        use."""
+        if self._session is None:
+            self._session = self._create_session()
+
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        """Create a pooled session that reuses connections to ESPN.
+
+        Returns:
+            requests.Session: session with a retrying, connection pooling adapter mounted
+        """
+        retries = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=("GET",),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=True,
+            max_retries=retries,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # advertises brotli only when a brotli decoder is installed
+        session.headers.update({"Accept-Encoding": ACCEPT_ENCODING})
+
+        return session
+
+    def connection_stats(self) -> dict[str, int]:
+        """Report how many requests were served over reused connections.
+
+        Returns:
+            dict: number of opened connections, requests sent and requests that reused a connection
+        """
+        stats = {"connections": 0, "requests": 0, "reused": 0}
+        if self._session is None:
+            return stats
+
+        pools = self._session.get_adapter(self.game_base_url).poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                stats["connections"] += pool.num_connections
+                stats["requests"] += pool.num_requests
+
+        stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+        return stats
+
+    def close(self):
+        """Close every pooled connection."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _call_espn(self, url: str, endpoint: str) -> dict:
+        """Query ESPN API. Fresh cached responses are returned without a
+        request, stale ones are revalidated with a conditional GET.
+
+        Args:
+            url (str): url in espn's api to query
+            endpoint (str): endpoint type used to pick the cache policy
+
+        Returns:
+            dict: json response from the api
+        """
+        cached = ResponseCache.get(endpoint, url)
+        if ResponseCache.is_fresh(endpoint, cached):
+            QueryBuffer.record(
+                {"url": url, "status_code": 200, "date_ts": datetime.now(), "cache_status": "hit", "latency_ms": 0}
+            )
+            return cached.payload
+
+        started = time.perf_counter()
+        response = self.session.get(
+            url, timeout=self.timeout, headers=ResponseCache.conditional_headers(cached)
+        )
+        latency_ms = (time.perf_counter() - started) * 1000
+        payload, cache_status = ResponseCache.update(
+            endpoint,
+            url,
+            cached,
+            response.status_code,
+            response.headers,
+            lambda: decode(endpoint, response.content),
+        )
+        QueryBuffer.record(
+            {
+                "url": url,
+                "status_code": response.status_code,
+                "date_ts": datetime.now(),
+                "cache_status": cache_status,
+                "latency_ms": latency_ms,
+            }
+        )
+
+        if payload is not None:
+            return payload
+        else:
+            logging.error(
+                f"Error querying ESPN API: {response.status_code} for URL {url}"
+            )
+            return {}
+
     def scoreboard(self, date: str, group: str) -> dict:
         """Query the ESPN scoreboard API.
 
@@ -101,7 +223,7 @@ class _ESPNAPI:
         Returns:
             dict: json response from the API
         """
-        return self._call_espn(self._create_scoreboard_url(date, group))
+        return self._call_espn(self._create_scoreboard_url(date, group), "scoreboard")
 
     def team(self, team_id: str) -> dict:
         """Query the ESPN team API.
@@ -112,7 +234,7 @@ class _ESPNAPI:
         Returns:
             dict: json response from the API
         """
-        return self._call_espn(self._create_team_url(team_id))
+        return self._call_espn(self._create_team_url(team_id), "team")
 
     def game(self, game_id: str) -> dict:
         """Query the ESPN game API.
@@ -123,7 +245,7 @@ class _ESPNAPI:
         Returns:
             dict: json response from the API
         """
-        return self._call_espn(self._create_game_url(game_id))
+        return self._call_espn(self._create_game_url(game_id), "game")
 
 
 ESPNAPI = _ESPNAPI()
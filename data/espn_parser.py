@@ -1,90 +1,177 @@
 from datetime import datetime
+from typing import Iterable
+
+from data.records import Competitor, Play, ScoreboardGame, ScoringPlay
 
 
 class _ESPNParser:
     """Class to parse ESPN API responses."""
 
-    def team_records(
-        self, teams: dict[str, str], home_away: str, records: list[dict]
-    ) -> dict[str, str]:
+    def team_records(self, records: list[dict]) -> dict[str, int]:
         """Parse record information from an ESPN API response.
 
         Args:
-            teams (dict): dictionary containing information about home and away teams
-            home_away (str): string whose value is either 'home' or 'away'
             records (list[dict]): list of record information from the ESPN API
 
         Returns:
-            teams dictionary with total records and conference records populated.
+            dictionary with the total record and conference record of a team
         """
-        assert home_away in ("home", "away"), (
-            "home_away variable must be either home or away."
-        )
-
+        teams = {}
         for record in records:
             if record["type"] == "total":
-                teams[f"{home_away}_wins"], teams[f"{home_away}_losses"] = record[
-                    "summary"
-                ].split("-")
+                teams["wins"], teams["losses"] = map(int, record["summary"].split("-")[:2])
             elif record["type"] == "vsconf":
-                teams[f"{home_away}_conf_wins"], teams[f"{home_away}_conf_losses"] = (
-                    record["summary"].split("-")
-                )
+                teams["conf_wins"], teams["conf_losses"] = map(int, record["summary"].split("-")[:2])
 
         return teams
 
-    def competitors(self, competitors: list[dict]) -> dict[str, str]:
+    def competitors(self, competitors: list[dict]) -> dict[str, Competitor]:
         """Gather competitor information from an ESPN API response.
 
         Args:
             competitiors (list[dict]): list containing all teams involved in a competition
 
         Returns:
-            dictionary containing home and away team names and records
+            dictionary containing the home and away competitors
         """
         teams = {}
         for team in competitors:
-            teams[f"{team['homeAway']}_team"] = team["team"]["shortDisplayName"]
-            teams[f"{team['homeAway']}_team_id"] = team["id"]
-            teams = self.team_records(teams, team["homeAway"], team["records"])
+            assert team["homeAway"] in ("home", "away"), (
+                "homeAway must be either home or away."
+            )
+            teams[team["homeAway"]] = Competitor(
+                team_id=team["id"],
+                team=team["team"]["shortDisplayName"],
+                home_away=team["homeAway"],
+                **self.team_records(team.get("records", [])),
+            )
 
         return teams
 
-    def games(self, game_json: dict) -> list[dict]:
+    def games(self, game_json: dict) -> list[ScoreboardGame]:
         """Parse game information from the ESPN scoreboard.
 
         Args:
             game_json (dict): ESPN API response from the ESPN scoreboard for a given league
 
         Returns:
-            list[dict]: list of games to be added to the database
+            list[ScoreboardGame]: list of games to be added to the database
         """
         games = []
         for event in game_json["events"]:
             competitors = self.competitors(event["competitions"][0]["competitors"])
             games.append(
-                {
-                    "id": event["id"],
-                    "start_ts": datetime.strptime(event["date"], "%Y-%m-%dT%H:%MZ"),
-                    "networks": event["competitions"][0]["broadcast"],
-                    "home_score": 0,
-                    "away_score": 0,
-                    "trackable": True,
-                    **competitors,
-                }
+                ScoreboardGame(
+                    id=event["id"],
+                    start_ts=datetime.strptime(event["date"], "%Y-%m-%dT%H:%MZ"),
+                    networks=event["competitions"][0]["broadcast"],
+                    home=competitors["home"],
+                    away=competitors["away"],
+                )
             )
 
         return games
 
-    def scoring_plays(self, game_json: dict) -> list[dict[str, str]]:
+    def game_states(self, game_json: dict) -> dict[str, dict]:
+        """Parse the live state of each game on the ESPN scoreboard.
+
+        Args:
+            game_json (dict): ESPN API response from the ESPN scoreboard for a given league
+
+        Returns:
+            dict: game state columns keyed by game id
+        """
+        states = {}
+        for event in game_json.get("events", []):
+            competition = event["competitions"][0]
+            states[event["id"]] = {
+                "status": competition["status"]["type"]["name"],
+                "period": competition["status"]["period"],
+                "clock": competition["status"]["displayClock"],
+                **{
+                    f"scoreboard_{team['homeAway']}_score": int(team["score"])
+                    for team in competition["competitors"]
+                },
+            }
+
+        return states
+
+    def play_sequence(self, game_id: str, play: dict) -> int:
+        """Get the sequence number of a play. ESPN play ids are the game id
+        followed by the sequence number.
+
+        Args:
+            game_id (str): ESPN game ID
+            play (dict): play from an ESPN API response
+
+        Returns:
+            int: sequence number of the play
+        """
+        return int(play.get("sequenceNumber") or play["id"][len(game_id) :])
+
+    def plays_after(self, game_id: str, newest_first: Iterable[dict], cursor: int | None) -> list[dict]:
+        """Get the plays that come after a cursor. Every play is checked, ESPN
+        doesn't always list plays in sequence order so an older play can come
+        before a new one.
+
+        Args:
+            game_id (str): ESPN game ID
+            newest_first (Iterable[dict]): plays from an ESPN API response, newest first
+            cursor (int | None): sequence number of the last processed play, None to get every play
+
+        Returns:
+            list[dict]: plays after the cursor, oldest first
+        """
+        new_plays = [play for play in newest_first if cursor is None or self.play_sequence(game_id, play) > cursor]
+
+        return new_plays[::-1]
+
+    def plays(self, game_json: dict, cursor: int | None = None) -> list[Play]:
+        """Gets every play from the drives of an ESPN API response that comes
+        after a cursor.
+
+        Args:
+            game_json (dict): ESPN API response
+            cursor (optional, int): sequence number of the last processed play
+
+        Returns:
+            list[Play]: list containing all plays after the cursor, oldest first
+        """
+        if "previous" not in game_json.get("drives", {}).keys():
+            return []
+
+        game_id = game_json["header"]["id"]
+        is_complete = game_json["header"]["competitions"][0]["status"]["type"]["completed"]
+        newest_first = (
+            play for drive in reversed(game_json["drives"]["previous"]) for play in reversed(drive["plays"])
+        )
+
+        return [
+            Play(
+                game_id=game_id,
+                play_id=play["id"],
+                sequence=self.play_sequence(game_id, play),
+                play_text=play["text"],
+                away_score=play["awayScore"],
+                home_score=play["homeScore"],
+                period=play["period"]["number"],
+                clock=play["clock"]["displayValue"],
+                scoring_play=play.get("scoringPlay", False),
+                is_complete=is_complete,
+            )
+            for play in self.plays_after(game_id, newest_first, cursor)
+        ]
+
+    def scoring_plays(self, game_json: dict, cursor: int | None = None) -> list[ScoringPlay]:
         """Gets scoring plays from an ESPN API response and returns them sorted
         by time.
 
         Args:
             game_json (dict): ESPN API response
+            cursor (optional, int): sequence number of the last processed play, only later plays are returned
 
         Returns:
-            list[dict]: list containing all scoring plays from the game that haven't been posted about yet
+            list[ScoringPlay]: list containing all scoring plays from the game that haven't been posted about yet
         """
         results = []
         if "drives" not in game_json.keys():
@@ -96,26 +183,41 @@ class _ESPNParser:
             "completed"
         ]
 
-        scoring_plays = game_json["scoringPlays"]
+        game_id = game_json["header"]["id"]
+        scoring_plays = self.plays_after(game_id, reversed(game_json["scoringPlays"]), cursor)
         for play in scoring_plays:
             drive_description = None # TODO: fix this to pull from the drive details
             results.append(
-                {
-                    "game_id": game_json["header"]["id"],
-                    "play_text": play["text"],
-                    "away_score": play["awayScore"],
-                    "home_score": play["homeScore"],
-                    "total_score": play["homeScore"]
-                    + play[
-                        "awayScore"
-                    ],  # needed because ESPN doesn't know how clocks work
-                    "drive_description": drive_description,
-                    "scoring_team": play["team"]["id"],
-                    "is_complete": is_complete,
-                }
+                ScoringPlay(
+                    game_id=game_id,
+                    play_id=play["id"],
+                    sequence=self.play_sequence(game_id, play),
+                    play_text=play["text"],
+                    away_score=play["awayScore"],
+                    home_score=play["homeScore"],
+                    drive_description=drive_description,
+                    scoring_team=play["team"]["id"],
+                    is_complete=is_complete,
+                )
             )
 
-        return sorted(results, key=lambda d: d["total_score"])
+        # sorted by score because ESPN doesn't know how clocks work
+        return sorted(results, key=lambda play: play.total_score)
+
+    def latest_score(self, game_json: dict) -> tuple[int, int] | None:
+        """Get the score after the latest scoring play of an ESPN API response.
+
+        Args:
+            game_json (dict): ESPN API response
+
+        Returns:
+            tuple[int, int] | None: home and away score, 0-0 before anyone scores, None if the response is empty
+        """
+        if "header" not in game_json:
+            return None
+
+        scores = [(play["homeScore"], play["awayScore"]) for play in game_json.get("scoringPlays", [])]
+        return max(scores, key=sum, default=(0, 0))
 
     def team_streak(self, team_info: dict) -> str:
         """Gather win/loss streaks from ESPN API json.
@@ -133,5 +235,28 @@ class _ESPNParser:
         ][0]
         return f"W{streak}" if streak >= 0 else f"L{str(streak).strip('-')}"
 
+    def team_info(self, team_info: dict) -> dict:
+        """Gather the streak, record and next game of a team from ESPN API
+        json.
+
+        Args:
+            team_info (dict): ESPN API json response
+
+        Returns:
+            dict: team information to be added to the database
+        """
+        wins, losses = team_info["team"]["record"]["items"][0]["summary"].split("-")[:2]
+        next_event = team_info["team"].get("nextEvent", [])
+
+        return {
+            "id": team_info["team"]["id"],
+            "streak": self.team_streak(team_info),
+            "wins": int(wins),
+            "losses": int(losses),
+            "next_game_ts": (
+                datetime.strptime(next_event[0]["date"], "%Y-%m-%dT%H:%MZ") if next_event else None
+            ),
+        }
+
 
 ESPNParser = _ESPNParser()
@@ -0,0 +1,172 @@
+import json
+import logging
+from typing import NotRequired, TypedDict
+
+import msgspec
+
+# Typed schemas for the parts of ESPN API responses the parser reads. Decoding
+# against them skips every other section of the payload without building Python
+# objects for it, which matters most for game summaries where boxscores, news,
+# videos and odds make up most of the response.
+
+
+class _StatusType(TypedDict):
+    name: NotRequired[str]
+    completed: bool
+
+
+class _HeaderStatus(TypedDict):
+    type: _StatusType
+
+
+class _HeaderCompetition(TypedDict):
+    status: _HeaderStatus
+
+
+class _Header(TypedDict):
+    id: str
+    competitions: list[_HeaderCompetition]
+
+
+class _Period(TypedDict):
+    number: int
+
+
+class _Clock(TypedDict):
+    displayValue: str
+
+
+class _Play(TypedDict):
+    id: str
+    sequenceNumber: NotRequired[str]
+    text: str
+    awayScore: int
+    homeScore: int
+    period: _Period
+    clock: _Clock
+    scoringPlay: NotRequired[bool]
+
+
+class _Drive(TypedDict):
+    plays: list[_Play]
+
+
+class _Drives(TypedDict, total=False):
+    previous: list[_Drive]
+    current: _Drive
+
+
+class _TeamId(TypedDict):
+    id: str
+
+
+class _ScoringPlay(TypedDict):
+    id: str
+    text: str
+    awayScore: int
+    homeScore: int
+    team: _TeamId
+
+
+class Summary(TypedDict, total=False):
+    """Sections of the ESPN game summary used by the parser."""
+
+    header: _Header
+    drives: _Drives
+    scoringPlays: list[_ScoringPlay]
+
+
+class _Record(TypedDict):
+    type: str
+    summary: str
+
+
+class _CompetitorTeam(TypedDict):
+    shortDisplayName: str
+
+
+class _Competitor(TypedDict):
+    id: str
+    homeAway: str
+    score: NotRequired[str]
+    team: _CompetitorTeam
+    records: NotRequired[list[_Record]]
+
+
+class _ScoreboardStatus(TypedDict):
+    period: int
+    displayClock: str
+    type: _StatusType
+
+
+class _Competition(TypedDict):
+    broadcast: NotRequired[str]
+    competitors: list[_Competitor]
+    status: _ScoreboardStatus
+
+
+class _Event(TypedDict):
+    id: str
+    date: str
+    competitions: list[_Competition]
+
+
+class Scoreboard(TypedDict, total=False):
+    """Sections of the ESPN scoreboard used by the parser."""
+
+    events: list[_Event]
+
+
+class _Stat(TypedDict):
+    name: str
+    value: int | float
+
+
+class _RecordItem(TypedDict):
+    summary: str
+    stats: list[_Stat]
+
+
+class _TeamRecord(TypedDict):
+    items: list[_RecordItem]
+
+
+class _NextEvent(TypedDict):
+    date: str
+
+
+class _Team(TypedDict):
+    id: str
+    record: _TeamRecord
+    nextEvent: NotRequired[list[_NextEvent]]
+
+
+class Team(TypedDict):
+    """Sections of the ESPN team response used by the parser."""
+
+    team: _Team
+
+
+DECODERS = {
+    "scoreboard": msgspec.json.Decoder(Scoreboard),
+    "team": msgspec.json.Decoder(Team),
+    "game": msgspec.json.Decoder(Summary),
+}
+
+
+def decode(endpoint: str, content: bytes) -> dict:
+    """Decode only the sections of an ESPN API response the parser needs.
+    Falls back to decoding the whole response if it doesn't match the schema.
+
+    Args:
+        endpoint (str): endpoint type the response came from
+        content (bytes): raw response body
+
+    Returns:
+        dict: decoded response
+    """
+    try:
+        return DECODERS[endpoint].decode(content)
+    except msgspec.ValidationError as e:
+        logging.warning(f"ESPN {endpoint} response doesn't match its schema, decoding all of it: {e}")
+        return json.loads(content)
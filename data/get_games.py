@@ -1,20 +1,112 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from db.db_utils import insert_rows
+from db.db_utils import upsert_rows
+from db.models import Game
 
-from data.parse_results import parse_games
-from data.query_api import query_scoreboard
+from data.parse_results import get_latest_score, parse_game_states, parse_games
+from data.query_api import query_scoreboard, query_scoreboards
+from data.records import ScoreboardGame
+from data.scheduler import to_utc_naive
+from data.team_cache import TeamCache
+
+# scoreboard fields that mean a game's summary needs to be fetched again when they change
+GATED_FIELDS = ("status", "period", "scoreboard_home_score", "scoreboard_away_score")
+# scores of the last posted play and whether the game is tracked, the scoreboard
+# only sets them for new games so a game turned off by hand stays off
+INSERT_ONLY_FIELDS = ("home_score", "away_score", "trackable")
 
 
 def get_games(date: datetime, group: str | None = "80") -> None:
-    """Gathers games from espn and logs them to the database.
+    """Gathers games from espn and logs them to the database, updating games
+    whose networks, records or kickoff changed. Team information for games
+    that haven't kicked off yet is cached so game headers don't need to query
+    espn.
 
     Args:
         date (datetime): date to get games for
         group (str | None): ESPN group to query. 80 == FBS, 81 == FCS. Default value is 80.
     """
-    date = date.strftime("%Y%m%d")
-    game_data = query_scoreboard(date, group)
+    game_data = query_scoreboard(date.strftime("%Y%m%d"), group)
     games = parse_games(game_data)
 
-    insert_rows("games", games)
+    upsert_rows("games", games, exclude_columns=INSERT_ONLY_FIELDS)
+    TeamCache.prefetch(get_kickoffs(games, date))
+
+
+def get_kickoffs(games: list[ScoreboardGame], date: datetime) -> dict[str, datetime]:
+    """Get the earliest upcoming kickoff of each team.
+
+    Args:
+        games (list[ScoreboardGame]): games parsed from the espn scoreboard
+        date (datetime): current date, games that kicked off more than 5 minutes before it are skipped
+
+    Returns:
+        dict: naive UTC start of each team's next game keyed by ESPN team ID
+    """
+    earliest = to_utc_naive(date) - timedelta(minutes=5)
+
+    kickoffs = {}
+    for game in games:
+        if game.start_ts < earliest:
+            continue
+        for team_id in (game.home.team_id, game.away.team_id):
+            kickoffs[team_id] = min(game.start_ts, kickoffs.get(team_id, game.start_ts))
+
+    return kickoffs
+
+
+def get_game_states(date: datetime, group: str | None = "80") -> dict[str, dict]:
+    """Gathers the live state of every game from the last 24 hours from the
+    espn scoreboard.
+
+    Args:
+        date (datetime): latest date to get game states for
+        group (str | None): ESPN group to query. 80 == FBS, 81 == FCS. Default value is 80.
+
+    Returns:
+        dict: game state columns keyed by game id
+    """
+    dates = {day.strftime("%Y%m%d") for day in (date - timedelta(days=1), date)}
+
+    states = {}
+    for _, game_data in query_scoreboards(dates, group):
+        states.update(parse_game_states(game_data))
+
+    return states
+
+
+def game_has_changed(game: Game, state: dict | None) -> bool:
+    """Check whether the scoreboard state of a game differs from the stored
+    game. Games missing from the scoreboard are always considered changed.
+
+    Args:
+        game (Game): stored game
+        state (dict | None): game state parsed from the scoreboard
+
+    Returns:
+        bool: if the game's summary needs to be fetched
+    """
+    if state is None:
+        return True
+
+    return any(getattr(game, field) != state[field] for field in GATED_FIELDS)
+
+
+def summary_matches_scoreboard(game_json: dict, state: dict) -> bool:
+    """Check that a game summary has caught up with the scoreboard, so every
+    scoring play the scoreboard counts is in it. Failed requests return an
+    empty summary, which never matches.
+
+    Args:
+        game_json (dict): ESPN game API response
+        state (dict): game state parsed from the scoreboard
+
+    Returns:
+        bool: if the scoreboard state can be saved as processed
+    """
+    latest_score = get_latest_score(game_json)
+    if latest_score is None:
+        return False
+
+    scoreboard_score = (state.get("scoreboard_home_score"), state.get("scoreboard_away_score"))
+    return None in scoreboard_score or latest_score == scoreboard_score
@@ -1,25 +1,76 @@
 from data.espn_parser import ESPNParser
+from data.records import Play, ScoreboardGame, ScoringPlay
 
 
-def parse_games(game_json: dict) -> list[dict]:
+def parse_games(game_json: dict) -> list[ScoreboardGame]:
     """Parse game information from an ESPN scoreboard response.
 
     Args:
         game_json (dict): ESPN API response from the ESPN scoreboard for a given league
 
     Returns:
-        list[dict]: list of games to be added to the SQLite database
+        list[ScoreboardGame]: list of games to be added to the SQLite database
     """
     return ESPNParser.games(game_json)
 
 
-def get_scoring_plays(game_json: dict) -> list[dict[str, str]]:
+def parse_game_states(game_json: dict) -> dict[str, dict]:
+    """Parse the live state of each game from an ESPN scoreboard response.
+
+    Args:
+        game_json (dict): ESPN API response from the ESPN scoreboard for a given league
+
+    Returns:
+        dict: game state columns keyed by game id
+    """
+    return ESPNParser.game_states(game_json)
+
+
+def get_scoring_plays(game_json: dict, cursor: int | None = None) -> list[ScoringPlay]:
     """Gets scoring plays from an ESPN API response and returns them sorted by
     time.
 
     Args:
         game_json (dict): ESPN API response
+        cursor (optional, int): sequence number of the last processed play, only later plays are returned
+    Returns:
+        list[ScoringPlay]: list containing all scoring plays from the game that haven't been posted about yet
+    """
+    return ESPNParser.scoring_plays(game_json, cursor)
+
+
+def get_latest_score(game_json: dict) -> tuple[int, int] | None:
+    """Gets the score after the latest scoring play of an ESPN API response.
+
+    Args:
+        game_json (dict): ESPN API response
+
+    Returns:
+        tuple[int, int] | None: home and away score, None if the response is empty
+    """
+    return ESPNParser.latest_score(game_json)
+
+
+def get_plays(game_json: dict, cursor: int | None = None) -> list[Play]:
+    """Gets every play from an ESPN API response that comes after a cursor.
+
+    Args:
+        game_json (dict): ESPN API response
+        cursor (optional, int): sequence number of the last processed play
+    Returns:
+        list[Play]: list containing all plays after the cursor, oldest first
+    """
+    return ESPNParser.plays(game_json, cursor)
+
+
+def parse_team_info(team_json: dict) -> dict:
+    """Parse the streak, record and next game of a team from an ESPN team
+    response.
+
+    Args:
+        team_json (dict): ESPN API response from the ESPN team API
+
     Returns:
-        list[dict]: list containing all scoring plays from the game that haven't been posted about yet
+        dict: team information to be added to the database
     """
-    return ESPNParser.scoring_plays(game_json)
+    return ESPNParser.team_info(team_json)
@@ -1,3 +1,6 @@
+from typing import Iterable, Iterator
+
+from data.async_espn_api import AsyncESPNAPI
 from data.espn_api import ESPNAPI
 
 
@@ -36,3 +39,40 @@ def query_game(game_id: str) -> dict:
         dict: json response from the API
     """
     return ESPNAPI.game(game_id)
+
+
+def query_scoreboards(dates: Iterable[str], group: str) -> Iterator[tuple[str, dict]]:
+    """Query the ESPN scoreboard API for several dates concurrently.
+
+    Args:
+        dates (Iterable[str]): dates to query in %Y%m%d format
+        group (str): ESPN group to query
+
+    Yields:
+        tuple: date and json response from the API, in completion order
+    """
+    return AsyncESPNAPI.scoreboards(dates, group)
+
+
+def query_teams(team_ids: Iterable[str]) -> Iterator[tuple[str, dict]]:
+    """Query the ESPN team API for several teams concurrently.
+
+    Args:
+        team_ids (Iterable[str]): ESPN team IDs
+
+    Yields:
+        tuple: team ID and json response from the API, in completion order
+    """
+    return AsyncESPNAPI.teams(team_ids)
+
+
+def query_games(game_ids: Iterable[str]) -> Iterator[tuple[str, dict]]:
+    """Query the ESPN game API for several games concurrently.
+
+    Args:
+        game_ids (Iterable[str]): ESPN game IDs
+
+    Yields:
+        tuple: game ID and json response from the API, in completion order
+    """
+    return AsyncESPNAPI.games(game_ids)
@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(slots=True)
+class Competitor:
+    """A team playing in a game on the ESPN scoreboard."""
+
+    team_id: str
+    team: str
+    home_away: str
+    wins: int | None = None
+    losses: int | None = None
+    conf_wins: int | None = None
+    conf_losses: int | None = None
+
+
+@dataclass(slots=True)
+class ScoreboardGame:
+    """A game on the ESPN scoreboard."""
+
+    id: str
+    start_ts: datetime
+    networks: str
+    home: Competitor
+    away: Competitor
+    home_score: int = 0
+    away_score: int = 0
+    trackable: bool = True
+
+    def as_row(self) -> dict:
+        """Get the columns of the game in the games table."""
+        row = {
+            "id": self.id,
+            "start_ts": self.start_ts,
+            "networks": self.networks,
+            "home_score": self.home_score,
+            "away_score": self.away_score,
+            "trackable": self.trackable,
+        }
+        for competitor in (self.home, self.away):
+            prefix = competitor.home_away
+            row[f"{prefix}_team"] = competitor.team
+            row[f"{prefix}_team_id"] = competitor.team_id
+            row[f"{prefix}_wins"] = competitor.wins
+            row[f"{prefix}_losses"] = competitor.losses
+            row[f"{prefix}_conf_wins"] = competitor.conf_wins
+            row[f"{prefix}_conf_losses"] = competitor.conf_losses
+
+        return row
+
+
+@dataclass(slots=True)
+class Play:
+    """A play from the drives of an ESPN game summary."""
+
+    game_id: str
+    play_id: str
+    sequence: int
+    play_text: str
+    away_score: int
+    home_score: int
+    period: int
+    clock: str
+    scoring_play: bool
+    is_complete: bool
+
+
+@dataclass(slots=True)
+class ScoringPlay:
+    """A scoring play from an ESPN game summary."""
+
+    game_id: str
+    play_id: str
+    sequence: int
+    play_text: str
+    away_score: int
+    home_score: int
+    scoring_team: str
+    is_complete: bool
+    drive_description: str | None = None
+
+    @property
+    def total_score(self) -> int:
+        """Combined score after the play, needed because ESPN doesn't know how clocks work."""
+        return self.home_score + self.away_score
@@ -0,0 +1,145 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Mapping
+
+
+@dataclass
+class CachedResponse:
+    """Decoded ESPN response and the validators needed to revalidate it."""
+
+    decoded: dict
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+
+    @property
+    def payload(self) -> dict:
+        """Copy of the decoded response, so a caller changing it can't change
+        what later requests get."""
+        return copy.deepcopy(self.decoded)
+
+
+@dataclass
+class CachePolicy:
+    """How long responses from an endpoint are fresh and how many are kept."""
+
+    ttl: float
+    max_entries: int
+
+
+DEFAULT_POLICIES = {
+    "scoreboard": CachePolicy(ttl=15, max_entries=8),
+    "team": CachePolicy(ttl=60 * 60, max_entries=300),
+    # summaries are only fetched once the scoreboard changes, so always revalidate,
+    # but keep one for every game of a busy saturday so none of them is evicted
+    "game": CachePolicy(ttl=0, max_entries=128),
+}
+
+
+class _ResponseCache:
+    """LRU cache of ESPN responses keyed by URL, with a policy per endpoint."""
+
+    def __init__(self, policies: dict[str, CachePolicy] | None = None) -> None:
+        """Configure the cache.
+
+        Args:
+            policies (optional, dict): cache policy for each endpoint, defaults to DEFAULT_POLICIES
+        """
+        self.policies = policies or DEFAULT_POLICIES
+        self._entries: dict[str, OrderedDict[str, CachedResponse]] = {
+            endpoint: OrderedDict() for endpoint in self.policies
+        }
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str, url: str) -> CachedResponse | None:
+        """Get a cached response, marking it as recently used.
+
+        Args:
+            endpoint (str): endpoint type, one of the policy names
+            url (str): url the response was fetched from
+
+        Returns:
+            CachedResponse | None: cached response if there is one
+        """
+        with self._lock:
+            entries = self._entries[endpoint]
+            if url not in entries:
+                return None
+            entries.move_to_end(url)
+            return entries[url]
+
+    def is_fresh(self, endpoint: str, cached: CachedResponse | None) -> bool:
+        """Check if a cached response can be used without revalidating it."""
+        return cached is not None and time.monotonic() - cached.stored_at < self.policies[endpoint].ttl
+
+    def conditional_headers(self, cached: CachedResponse | None) -> dict[str, str]:
+        """Get the headers to revalidate a cached response with.
+
+        Args:
+            cached (CachedResponse | None): cached response
+
+        Returns:
+            dict: If-None-Match and If-Modified-Since headers for the validators the response had
+        """
+        headers = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        return headers
+
+    def update(
+        self,
+        endpoint: str,
+        url: str,
+        cached: CachedResponse | None,
+        status_code: int,
+        headers: Mapping[str, str],
+        decode: Callable[[], dict],
+    ) -> tuple[dict | None, str]:
+        """Update the cache from a response.
+
+        Args:
+            endpoint (str): endpoint type, one of the policy names
+            url (str): url the response was fetched from
+            cached (CachedResponse | None): cached response the request was revalidating
+            status_code (int): response status code
+            headers (Mapping): response headers
+            decode (Callable): function returning the decoded response body
+
+        Returns:
+            tuple: copy of the decoded payload, None for unsuccessful responses, and the cache status of the request
+        """
+        if status_code == 304 and cached is not None:
+            cached.stored_at = time.monotonic()
+            return cached.payload, "revalidated"
+        if status_code != 200:
+            return None, "miss"
+
+        payload = decode()
+        with self._lock:
+            entries = self._entries[endpoint]
+            entries[url] = CachedResponse(
+                decoded=copy.deepcopy(payload),
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+                stored_at=time.monotonic(),
+            )
+            entries.move_to_end(url)
+            while len(entries) > self.policies[endpoint].max_entries:
+                entries.popitem(last=False)
+
+        return payload, "miss"
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+
+ResponseCache = _ResponseCache()
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+
+from db.models import Game
+
+PREGAME_STATUSES = ("STATUS_SCHEDULED", "STATUS_DELAYED")
+HALFTIME_STATUSES = ("STATUS_HALFTIME",)
+FINISHED_STATUSES = ("STATUS_FINAL", "STATUS_POSTPONED", "STATUS_CANCELED", "STATUS_FORFEIT")
+
+
+def to_utc_naive(date: datetime) -> datetime:
+    """Convert a datetime to naive UTC, which is how game times are stored."""
+    if date.tzinfo is None:
+        return date
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class _PollScheduler:
+    """Schedules each game on its own polling interval based on its state."""
+
+    def __init__(
+        self,
+        pregame_interval: timedelta | None = timedelta(minutes=15),
+        live_interval: timedelta | None = timedelta(seconds=60),
+        close_game_interval: timedelta | None = timedelta(seconds=20),
+        halftime_interval: timedelta | None = timedelta(minutes=12),
+        close_game_margin: int | None = 8,
+    ) -> None:
+        """Configure polling intervals.
+
+        Args:
+            pregame_interval (timedelta): interval before kickoff
+            live_interval (timedelta): interval while a game is in progress
+            close_game_interval (timedelta): interval in the 4th quarter and overtime of close games
+            halftime_interval (timedelta): interval at halftime
+            close_game_margin (int): largest score difference that counts as a close game
+        """
+        self.pregame_interval = pregame_interval
+        self.live_interval = live_interval
+        self.close_game_interval = close_game_interval
+        self.halftime_interval = halftime_interval
+        self.close_game_margin = close_game_margin
+        self.next_poll: dict[str, datetime] = {}
+
+    def is_live(self, game: Game) -> bool:
+        """Check if a game has kicked off and isn't finished yet."""
+        return game.status is not None and game.status not in PREGAME_STATUSES + FINISHED_STATUSES
+
+    def interval(self, game: Game, now: datetime) -> timedelta | None:
+        """Get the polling interval for a game based on its last known state.
+
+        Args:
+            game (Game): game to schedule
+            now (datetime): current time
+
+        Returns:
+            timedelta | None: time until the game should be polled again, None once it is finished
+        """
+        if game.status in FINISHED_STATUSES:
+            return None
+        if not self.is_live(game):
+            until_kickoff = game.start_ts - to_utc_naive(now)
+            return max(min(self.pregame_interval, until_kickoff), self.live_interval)
+        if game.status in HALFTIME_STATUSES:
+            return self.halftime_interval
+
+        margin = abs((game.scoreboard_home_score or 0) - (game.scoreboard_away_score or 0))
+        if (game.period or 0) >= 4 and margin <= self.close_game_margin:
+            return self.close_game_interval
+
+        return self.live_interval
+
+    def due_games(self, games: list[Game], now: datetime) -> list[Game]:
+        """Get the games that are due to be polled.
+
+        Args:
+            games (list[Game]): games to consider
+            now (datetime): current time
+
+        Returns:
+            list[Game]: games whose next poll is now or in the past
+        """
+        now = to_utc_naive(now)
+        return [
+            game
+            for game in games
+            if game.status not in FINISHED_STATUSES and self.next_poll.get(game.id, now) <= now
+        ]
+
+    def schedule(self, games: list[Game], now: datetime):
+        """Schedule the next poll of games that were just polled.
+
+        Args:
+            games (list[Game]): games that were polled
+            now (datetime): time the games were polled
+        """
+        for game in games:
+            interval = self.interval(game, now)
+            if interval is None:
+                self.next_poll.pop(game.id, None)
+            else:
+                self.next_poll[game.id] = to_utc_naive(now) + interval
+
+    def next_wakeup(self, games: list[Game], now: datetime) -> datetime | None:
+        """Get the next time any game needs attention. When nothing is live
+        this is the next kickoff.
+
+        Args:
+            games (list[Game]): games being tracked
+            now (datetime): current time
+
+        Returns:
+            datetime | None: naive UTC time to wake up at, None if no game needs polling
+        """
+        now = to_utc_naive(now)
+        if any(self.is_live(game) for game in games):
+            return min(
+                (self.next_poll.get(game.id, now) for game in games if game.status not in FINISHED_STATUSES),
+                default=None,
+            )
+
+        # games that are late to kick off keep their pregame interval
+        kickoffs = [
+            max(game.start_ts, self.next_poll.get(game.id, game.start_ts))
+            for game in games
+            if game.status not in FINISHED_STATUSES
+        ]
+        return max(min(kickoffs), now) if kickoffs else None
+
+
+PollScheduler = _PollScheduler()
@@ -0,0 +1,118 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from db.db_utils import get_values, merge_record
+
+from data.parse_results import parse_team_info
+from data.query_api import query_teams
+
+
+class _TeamCache:
+    """Team streaks and records cached in memory and in the teams table."""
+
+    def __init__(self, ttl: timedelta | None = timedelta(hours=24)) -> None:
+        """Configure the cache.
+
+        Args:
+            ttl (timedelta): how long team information stays valid after it was fetched
+        """
+        self.ttl = ttl
+        self._teams: dict[str, dict] | None = None
+
+    @property
+    def teams(self) -> dict[str, dict]:
+        """Cached team information keyed by team id, loaded from the database
+        in one query on first use."""
+        if self._teams is None:
+            rows = get_values("teams", {}) or []
+            self._teams = {
+                row.id: {column: getattr(row, column) for column in row.__table__.columns.keys()} for row in rows
+            }
+
+        return self._teams
+
+    def _is_valid(self, team: dict, kickoff: datetime) -> bool:
+        """Check that cached team information is still valid for a game. The
+        streak changes once the team plays, so information is only valid for
+        games up to the team's next game at the time it was fetched.
+
+        Args:
+            team (dict): cached team information
+            kickoff (datetime): naive UTC start of the game the information is for
+
+        Returns:
+            bool: if the cached information can be used
+        """
+        if datetime.now(timezone.utc).replace(tzinfo=None) - team["updated_at_ts"] > self.ttl:
+            return False
+
+        return team["next_game_ts"] is None or kickoff <= team["next_game_ts"]
+
+    def get(self, team_id: str, kickoff: datetime) -> dict | None:
+        """Get cached team information.
+
+        Args:
+            team_id (str): ESPN team ID
+            kickoff (datetime): naive UTC start of the game the information is for
+
+        Returns:
+            dict | None: team information, None if it isn't cached or no longer valid
+        """
+        team = self.teams.get(team_id)
+        return team if team and self._is_valid(team, kickoff) else None
+
+    def put(self, team_json: dict) -> dict:
+        """Parse and cache an ESPN team response.
+
+        Args:
+            team_json (dict): ESPN API response from the ESPN team API
+
+        Returns:
+            dict: cached team information
+        """
+        team = {**parse_team_info(team_json), "updated_at_ts": datetime.now(timezone.utc).replace(tzinfo=None)}
+        merge_record("teams", team)
+        self.teams[team["id"]] = team
+
+        return team
+
+    def fetch(self, kickoffs: dict[str, datetime]) -> Iterator[tuple[str, dict]]:
+        """Get team information for several teams, querying every team that
+        isn't cached in one concurrent batch.
+
+        Args:
+            kickoffs (dict): naive UTC start of each team's game keyed by ESPN team ID
+
+        Yields:
+            tuple: team ID and team information, None if the team's response couldn't be parsed,
+                cached teams first and then in completion order
+        """
+        missing = []
+        for team_id, kickoff in kickoffs.items():
+            team = self.get(team_id, kickoff)
+            if team is None:
+                missing.append(team_id)
+            else:
+                yield team_id, team
+
+        for team_id, team_json in query_teams(missing):
+            try:
+                team = self.put(team_json)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                # failed requests come back empty, the header is posted without the team's streak
+                logging.warning(f"Couldn't parse ESPN team {team_id}: {e!r}")
+                team = None
+            yield team_id, team
+
+    def prefetch(self, kickoffs: dict[str, datetime]):
+        """Make sure team information is cached for several teams.
+
+        Args:
+            kickoffs (dict): naive UTC start of each team's game keyed by ESPN team ID
+        """
+        for _ in self.fetch(kickoffs):
+            pass
+
+
+TeamCache = _TeamCache()
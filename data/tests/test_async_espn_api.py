@@ -0,0 +1,56 @@
+import httpx
+from data.async_espn_api import _AsyncESPNAPI
+from data.response_cache import ResponseCache
+from db.telemetry import QueryBuffer
+
+
+def mock_espn(request: httpx.Request) -> httpx.Response:
+    team_id = request.url.path.split("/")[-1]
+    if team_id == "retry":
+        return httpx.Response(503)
+    if team_id == "missing":
+        return httpx.Response(404)
+    if request.headers.get("If-None-Match") == f'"{team_id}"':
+        return httpx.Response(304)
+    return httpx.Response(200, json={"team": {"id": team_id}}, headers={"ETag": f'"{team_id}"'})
+
+
+class TestAsyncESPNAPI:
+    def setup_class(self):
+        self.api = _AsyncESPNAPI(max_concurrency=2, backoff_factor=0, transport=httpx.MockTransport(mock_espn))
+
+    def setup_method(self):
+        ResponseCache.clear()
+
+    def test_teams(self):
+        results = dict(self.api.teams(["1", "2", "3"]))
+
+        assert set(results) == {"1", "2", "3"}
+        assert results["2"] == {"team": {"id": "2"}}
+
+    def test_teams_error_status(self):
+        results = dict(self.api.teams(["missing", "retry"]))
+
+        assert results == {"missing": {}, "retry": {}}
+
+    def test_teams_revalidated(self):
+        list(self.api.teams(["1"]))
+        ResponseCache.get("team", self.api._create_team_url("1")).stored_at = 0
+
+        assert dict(self.api.teams(["1"])) == {"1": {"team": {"id": "1"}}}
+
+    def test_fetch_nothing(self):
+        assert list(self.api.games([])) == []
+
+    def test_fetch_survives_transport_errors(self, monkeypatch):
+        def timeout(request):
+            if request.url.path.split("/")[-1] == "slow":
+                raise httpx.ReadTimeout("timed out")
+            return mock_espn(request)
+
+        queries = []
+        monkeypatch.setattr(QueryBuffer, "record", queries.append)
+        api = _AsyncESPNAPI(transport=httpx.MockTransport(timeout))
+
+        assert dict(api.teams(["slow", "1"])) == {"slow": {}, "1": {"team": {"id": "1"}}}
+        assert sorted(query["status_code"] for query in queries) == [0, 200]
@@ -1,5 +1,5 @@
 import pytest
-from data.espn_api import ESPNAPI
+from data.espn_api import ESPNAPI, _ESPNAPI
 
 
 class TestESPNAPI:
@@ -40,3 +40,20 @@ class TestESPNAPI:
         group = ""
         with pytest.raises(AssertionError):
             ESPNAPI._create_scoreboard_url(date, group)
+
+    def test_session_is_pooled(self):
+        api = _ESPNAPI(pool_connections=2, pool_maxsize=5, max_retries=4)
+        adapter = api.session.get_adapter(api.game_base_url)
+
+        assert api.session is api.session
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 5
+        assert adapter.max_retries.total == 4
+        assert 429 in adapter.max_retries.status_forcelist
+        assert "gzip" in api.session.headers["Accept-Encoding"]
+        api.close()
+
+    def test_connection_stats_without_session(self):
+        api = _ESPNAPI()
+
+        assert api.connection_stats() == {"connections": 0, "requests": 0, "reused": 0}
@@ -1,5 +1,6 @@
 import pytest
 from data.espn_parser import ESPNParser
+from db.models import Game
 
 
 class TestESPNParser:
@@ -8,40 +9,68 @@ class TestESPNParser:
 
         assert len(plays) == 9
 
-        assert plays[0]["home_score"] == 7
-        assert plays[0]["away_score"] == 0
-        assert plays[0]["total_score"] == 7
-        assert plays[0]["drive_description"] == None
+        assert plays[0].home_score == 7
+        assert plays[0].away_score == 0
+        assert plays[0].total_score == 7
+        assert plays[0].drive_description == None
         assert (
-            plays[0]["play_text"]
+            plays[0].play_text
             == "Jackson Arnold 1 Yd Run (Tyler Keltner Kick)"
         )
-        assert plays[0]["scoring_team"] == "201"
+        assert plays[0].scoring_team == "201"
 
-        assert plays[3]["home_score"] == 21
-        assert plays[3]["away_score"] == 6
-        assert plays[3]["total_score"] == 27
-        assert plays[3]["drive_description"] == None
+        assert plays[3].home_score == 21
+        assert plays[3].away_score == 6
+        assert plays[3].total_score == 27
+        assert plays[3].drive_description == None
         assert (
-            plays[3]["play_text"]
+            plays[3].play_text
             == "Reggie Brown 7 Yd pass from Ty Thompson (Ethan Head PAT failed)"
         )
-        assert plays[3]["scoring_team"] == "2655"
+        assert plays[3].scoring_team == "2655"
 
     def test_get_scoring_plays_pick_six(self, game_with_pick_six):
         plays = ESPNParser.scoring_plays(game_with_pick_six)
 
         assert len(plays) == 2
 
-        assert plays[1]["home_score"] == 14
-        assert plays[1]["away_score"] == 0
-        assert plays[1]["total_score"] == 14
-        assert plays[1]["drive_description"] == None
+        assert plays[1].home_score == 14
+        assert plays[1].away_score == 0
+        assert plays[1].total_score == 14
+        assert plays[1].drive_description == None
         assert (
-            plays[1]["play_text"]
+            plays[1].play_text
             == "A. Swann pass intercepted,A. McCoy return for 26 yds for a TD (C. Boomer KICK)"
         )
-        assert plays[1]["scoring_team"] == "68"
+        assert plays[1].scoring_team == "68"
+
+    def test_get_scoring_plays_after_cursor(self, game_with_missed_pat):
+        plays = ESPNParser.scoring_plays(game_with_missed_pat)
+        new_plays = ESPNParser.scoring_plays(game_with_missed_pat, plays[6].sequence)
+
+        assert plays[0].play_id == "401628358101926301"
+        assert plays[0].sequence == 101926301
+        assert new_plays == plays[7:]
+        assert ESPNParser.scoring_plays(game_with_missed_pat, plays[-1].sequence) == []
+
+    def test_get_plays_after_cursor(self, game_with_pick_six):
+        plays = ESPNParser.plays(game_with_pick_six)
+        new_plays = ESPNParser.plays(game_with_pick_six, plays[-4].sequence)
+
+        assert len(plays) == 39
+        assert plays[0].sequence == 101849903
+        assert [play.sequence for play in plays] == sorted(play.sequence for play in plays)
+        assert new_plays == plays[-3:]
+
+    def test_latest_score(self, game_with_missed_pat):
+        assert ESPNParser.latest_score(game_with_missed_pat) == (34, 19)
+        assert ESPNParser.latest_score({**game_with_missed_pat, "scoringPlays": []}) == (0, 0)
+        assert ESPNParser.latest_score({}) is None
+
+    def test_plays_after_out_of_order(self):
+        newest_first = [{"id": "1" + sequence} for sequence in ("5", "3", "6", "2")]
+
+        assert ESPNParser.plays_after("1", newest_first, 4) == [{"id": "16"}, {"id": "15"}]
 
     @pytest.mark.skip(reason="not currently supported")
     def test_get_scoring_plays_safety(self, game_with_safety): ...
@@ -50,12 +79,33 @@ class TestESPNParser:
         games = ESPNParser.games(scoreboard)
         assert len(games) == 3
 
-        assert games[0]["id"] == "401754543"
-        assert games[0]["start_ts"].strftime("%Y-%m-%d %H:%M") == "2025-09-26 23:00"
-        assert games[0]["networks"] == "ESPN"
-        assert games[0]["home_score"] == 0
-        assert games[0]["away_score"] == 0
-        assert games[0]["trackable"] is True
+        assert games[0].id == "401754543"
+        assert games[0].start_ts.strftime("%Y-%m-%d %H:%M") == "2025-09-26 23:00"
+        assert games[0].networks == "ESPN"
+        assert games[0].home_score == 0
+        assert games[0].away_score == 0
+        assert games[0].trackable is True
+
+    def test_parsed_game_row(self, scoreboard):
+        row = ESPNParser.games(scoreboard)[-1].as_row()
+
+        assert row["home_team"] == "Oregon St"
+        assert row["home_team_id"] == "204"
+        assert row["home_losses"] == 5
+        assert row["away_conf_wins"] == 1
+        assert set(row) <= set(Game.__table__.columns.keys())
+
+    def test_parse_game_states(self, scoreboard):
+        states = ESPNParser.game_states(scoreboard)
+
+        assert len(states) == 3
+        assert states["401754543"] == {
+            "status": "STATUS_FINAL",
+            "period": 6,
+            "clock": "0:00",
+            "scoreboard_home_score": 46,
+            "scoreboard_away_score": 38,
+        }
 
     def test_parse_team_records(self, scoreboard):
         for event in scoreboard["events"]:
@@ -63,15 +113,15 @@ class TestESPNParser:
                 event["competitions"][0]["competitors"]
             )
 
-        assert competitors["home_wins"] == "0"
-        assert competitors["home_losses"] == "5"
-        assert competitors["home_conf_wins"] == "0"
-        assert competitors["home_conf_losses"] == "0"
+        assert competitors["home"].wins == 0
+        assert competitors["home"].losses == 5
+        assert competitors["home"].conf_wins == 0
+        assert competitors["home"].conf_losses == 0
 
-        assert competitors["away_wins"] == "4"
-        assert competitors["away_losses"] == "0"
-        assert competitors["away_conf_wins"] == "1"
-        assert competitors["away_conf_losses"] == "0"
+        assert competitors["away"].wins == 4
+        assert competitors["away"].losses == 0
+        assert competitors["away"].conf_wins == 1
+        assert competitors["away"].conf_losses == 0
 
     def test_parse_competitors(self, scoreboard):
         for event in scoreboard["events"]:
@@ -79,10 +129,10 @@ class TestESPNParser:
                 event["competitions"][0]["competitors"]
             )
 
-        assert competitors["home_team_id"] == "204"
-        assert competitors["home_team"] == "Oregon St"
-        assert competitors["away_team_id"] == "248"
-        assert competitors["away_team"] == "Houston"
+        assert competitors["home"].team_id == "204"
+        assert competitors["home"].team == "Oregon St"
+        assert competitors["away"].team_id == "248"
+        assert competitors["away"].team == "Houston"
 
     def test_team_streak_losing(self, losing_team):
         streak = ESPNParser.team_streak(losing_team)
@@ -93,3 +143,11 @@ class TestESPNParser:
         streak = ESPNParser.team_streak(winning_team)
 
         assert streak == "W8"
+
+    def test_team_info(self, winning_team):
+        team = ESPNParser.team_info(winning_team)
+
+        assert team["streak"] == "W8"
+        assert team["wins"] == 0
+        assert team["losses"] == 4
+        assert team["next_game_ts"].strftime("%Y-%m-%d %H:%M") == "2025-09-27 19:30"
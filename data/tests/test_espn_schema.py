@@ -0,0 +1,34 @@
+import json
+
+from data.espn_parser import ESPNParser
+from data.espn_schema import decode
+
+
+def read_resource(name: str) -> bytes:
+    with open(f"data/tests/resources/{name}.json", "rb") as f:
+        return f.read()
+
+
+class TestESPNSchema:
+    def test_decode_summary_matches_full_decode(self, game_with_missed_pat):
+        summary = decode("game", read_resource("game_with_missed_pat"))
+
+        assert set(summary) == {"header", "drives", "scoringPlays"}
+        assert ESPNParser.scoring_plays(summary) == ESPNParser.scoring_plays(game_with_missed_pat)
+        assert ESPNParser.plays(summary) == ESPNParser.plays(game_with_missed_pat)
+
+    def test_decode_scoreboard_matches_full_decode(self, scoreboard):
+        decoded = decode("scoreboard", read_resource("scoreboard"))
+
+        assert ESPNParser.games(decoded) == ESPNParser.games(scoreboard)
+        assert ESPNParser.game_states(decoded) == ESPNParser.game_states(scoreboard)
+
+    def test_decode_team_matches_full_decode(self, losing_team):
+        team = decode("team", read_resource("losing_team"))
+
+        assert ESPNParser.team_info(team) == ESPNParser.team_info(losing_team)
+
+    def test_decode_falls_back_when_schema_does_not_match(self):
+        content = json.dumps({"team": {"id": 1}}).encode()
+
+        assert decode("team", content) == {"team": {"id": 1}}
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete
+
+from data.get_games import INSERT_ONLY_FIELDS, game_has_changed, get_kickoffs, summary_matches_scoreboard
+from data.records import Competitor, ScoreboardGame
+from db import DB_SESSION
+from db.db_utils import upsert_rows
+from db.models import Game
+
+
+class TestGameHasChanged:
+    def setup_class(self):
+        self.state = {
+            "status": "STATUS_IN_PROGRESS",
+            "period": 2,
+            "clock": "7:36",
+            "scoreboard_home_score": 7,
+            "scoreboard_away_score": 0,
+        }
+
+    def test_unseen_game_has_changed(self):
+        assert game_has_changed(Game(id="1"), self.state)
+
+    def test_game_missing_from_scoreboard_has_changed(self):
+        assert game_has_changed(Game(id="1", **self.state), None)
+
+    def test_clock_only_change_is_ignored(self):
+        game = Game(id="1", **{**self.state, "clock": "9:12"})
+
+        assert not game_has_changed(game, self.state)
+
+    def test_score_change(self):
+        game = Game(id="1", **{**self.state, "scoreboard_home_score": 0})
+
+        assert game_has_changed(game, self.state)
+
+
+class TestSummaryMatchesScoreboard:
+    def test_failed_summary(self):
+        assert not summary_matches_scoreboard({}, {"scoreboard_home_score": 0, "scoreboard_away_score": 0})
+
+    def test_summary_caught_up(self, game_with_missed_pat):
+        assert summary_matches_scoreboard(game_with_missed_pat, {"scoreboard_home_score": 34, "scoreboard_away_score": 19})
+
+    def test_summary_behind_scoreboard(self, game_with_missed_pat):
+        assert not summary_matches_scoreboard(game_with_missed_pat, {"scoreboard_home_score": 40, "scoreboard_away_score": 19})
+
+
+class TestGetKickoffs:
+    def test_get_kickoffs(self):
+        games = [
+            ScoreboardGame("1", datetime(2025, 9, 27, 16), "ESPN", Competitor("1", "A", "home"), Competitor("2", "B", "away")),
+            ScoreboardGame("2", datetime(2025, 9, 27, 23), "ESPN", Competitor("3", "C", "home"), Competitor("1", "A", "away")),
+            ScoreboardGame("3", datetime(2025, 9, 27, 12), "ESPN", Competitor("4", "D", "home"), Competitor("5", "E", "away")),
+        ]
+
+        kickoffs = get_kickoffs(games, datetime(2025, 9, 27, 15, tzinfo=timezone.utc))
+
+        assert kickoffs == {
+            "1": datetime(2025, 9, 27, 16),
+            "2": datetime(2025, 9, 27, 16),
+            "3": datetime(2025, 9, 27, 23),
+        }
+
+
+class TestInsertOnlyFields:
+    def setup_method(self):
+        DB_SESSION.execute(delete(Game).where(Game.id == "-310"))
+        DB_SESSION.commit()
+
+    def test_untracked_game_stays_untracked(self):
+        home, away = Competitor("1", "A", "home", 0, 0, 0, 0), Competitor("2", "B", "away", 0, 0, 0, 0)
+        game = ScoreboardGame("-310", datetime(1807, 1, 1), "ESPN", home, away)
+        upsert_rows("games", [game], exclude_columns=INSERT_ONLY_FIELDS)
+        DB_SESSION.get(Game, "-310").trackable = False
+        DB_SESSION.commit()
+
+        upsert_rows("games", [game], exclude_columns=INSERT_ONLY_FIELDS)
+
+        DB_SESSION.expire_all()
+        assert DB_SESSION.get(Game, "-310").trackable is False
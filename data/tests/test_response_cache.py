@@ -0,0 +1,48 @@
+from data.response_cache import CachePolicy, _ResponseCache
+
+
+class TestResponseCache:
+    def setup_method(self):
+        self.cache = _ResponseCache({"team": CachePolicy(ttl=60, max_entries=2)})
+
+    def test_miss(self):
+        payload, status = self.cache.update("team", "a", None, 200, {"ETag": '"1"'}, lambda: {"a": 1})
+
+        assert payload == {"a": 1}
+        assert status == "miss"
+        assert self.cache.is_fresh("team", self.cache.get("team", "a"))
+
+    def test_revalidated(self):
+        self.cache.update("team", "a", None, 200, {"ETag": '"1"', "Last-Modified": "yesterday"}, lambda: {"a": 1})
+        cached = self.cache.get("team", "a")
+        cached.stored_at = 0
+
+        assert not self.cache.is_fresh("team", cached)
+        assert self.cache.conditional_headers(cached) == {"If-None-Match": '"1"', "If-Modified-Since": "yesterday"}
+        assert self.cache.update("team", "a", cached, 304, {}, dict) == ({"a": 1}, "revalidated")
+        assert self.cache.is_fresh("team", cached)
+
+    def test_payload_is_copied(self):
+        payload, _ = self.cache.update("team", "a", None, 200, {}, lambda: {"a": [1]})
+        payload["a"].append(2)
+        cached = self.cache.get("team", "a")
+        cached.payload["a"].append(3)
+
+        assert cached.payload == {"a": [1]}
+        assert self.cache.update("team", "a", cached, 304, {}, dict)[0] is not cached.decoded
+
+    def test_error_is_not_cached(self):
+        assert self.cache.update("team", "a", None, 500, {}, dict) == (None, "miss")
+        assert self.cache.get("team", "a") is None
+
+    def test_lru_eviction(self):
+        for url in ("a", "b"):
+            self.cache.update("team", url, None, 200, {}, dict)
+        self.cache.get("team", "a")
+        self.cache.update("team", "c", None, 200, {}, dict)
+
+        assert self.cache.get("team", "b") is None
+        assert self.cache.get("team", "a") is not None
+
+    def test_no_validators(self):
+        assert self.cache.conditional_headers(None) == {}
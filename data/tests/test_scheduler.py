@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from data.scheduler import _PollScheduler
+from db.models import Game
+
+NOW = datetime(2025, 9, 27, 20, 0)
+
+
+def make_game(**kwargs) -> Game:
+    values = {
+        "id": "1",
+        "start_ts": NOW - timedelta(hours=2),
+        "status": "STATUS_IN_PROGRESS",
+        "period": 2,
+        "scoreboard_home_score": 14,
+        "scoreboard_away_score": 0,
+    }
+    return Game(**{**values, **kwargs})
+
+
+class TestPollScheduler:
+    def setup_method(self):
+        self.scheduler = _PollScheduler()
+
+    def test_interval_pregame(self):
+        game = make_game(status="STATUS_SCHEDULED", start_ts=NOW + timedelta(hours=3))
+
+        assert self.scheduler.interval(game, NOW) == self.scheduler.pregame_interval
+
+    def test_interval_pregame_close_to_kickoff(self):
+        game = make_game(status="STATUS_SCHEDULED", start_ts=NOW + timedelta(minutes=5))
+
+        assert self.scheduler.interval(game, NOW) == timedelta(minutes=5)
+
+    def test_interval_live(self):
+        assert self.scheduler.interval(make_game(), NOW) == self.scheduler.live_interval
+
+    def test_interval_close_fourth_quarter(self):
+        game = make_game(period=4, scoreboard_home_score=21, scoreboard_away_score=17)
+
+        assert self.scheduler.interval(game, NOW) == self.scheduler.close_game_interval
+
+    def test_interval_blowout_fourth_quarter(self):
+        game = make_game(period=4, scoreboard_home_score=42, scoreboard_away_score=3)
+
+        assert self.scheduler.interval(game, NOW) == self.scheduler.live_interval
+
+    def test_interval_halftime(self):
+        game = make_game(status="STATUS_HALFTIME")
+
+        assert self.scheduler.interval(game, NOW) == self.scheduler.halftime_interval
+
+    def test_interval_final(self):
+        assert self.scheduler.interval(make_game(status="STATUS_FINAL"), NOW) is None
+
+    def test_due_games(self):
+        live, final = make_game(id="1"), make_game(id="2", status="STATUS_FINAL")
+
+        assert self.scheduler.due_games([live, final], NOW) == [live]
+
+        self.scheduler.schedule([live], NOW)
+        assert self.scheduler.due_games([live], NOW) == []
+        assert self.scheduler.due_games([live], NOW + self.scheduler.live_interval) == [live]
+
+    def test_next_wakeup_sleeps_until_kickoff(self):
+        kickoff = NOW + timedelta(hours=3)
+        games = [make_game(status="STATUS_FINAL"), make_game(id="2", status="STATUS_SCHEDULED", start_ts=kickoff)]
+        self.scheduler.schedule(games, NOW)
+
+        assert self.scheduler.next_wakeup(games, NOW) == kickoff
+
+    def test_next_wakeup_live(self):
+        game = make_game()
+        self.scheduler.schedule([game], NOW)
+
+        assert self.scheduler.next_wakeup([game], NOW) == NOW + self.scheduler.live_interval
+
+    def test_next_wakeup_nothing_to_poll(self):
+        assert self.scheduler.next_wakeup([make_game(status="STATUS_FINAL")], NOW) is None
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from data import team_cache
+from data.team_cache import _TeamCache
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TestTeamCache:
+    def setup_method(self):
+        self.cache = _TeamCache()
+        self.cache._teams = {
+            "1": {"id": "1", "streak": "W2", "next_game_ts": NOW + timedelta(hours=2), "updated_at_ts": NOW},
+            "2": {"id": "2", "streak": "L1", "next_game_ts": None, "updated_at_ts": NOW - timedelta(days=2)},
+        }
+
+    def test_get_valid(self):
+        assert self.cache.get("1", NOW + timedelta(hours=2))["streak"] == "W2"
+
+    def test_get_after_next_game(self):
+        assert self.cache.get("1", NOW + timedelta(days=7)) is None
+
+    def test_get_expired(self):
+        assert self.cache.get("2", NOW) is None
+
+    def test_get_missing(self):
+        assert self.cache.get("3", NOW) is None
+
+    def test_fetch_cached_teams_without_querying(self):
+        teams = dict(self.cache.fetch({"1": NOW}))
+
+        assert list(teams) == ["1"]
+
+    def test_fetch_unparseable_team(self, monkeypatch, caplog):
+        monkeypatch.setattr(team_cache, "query_teams", lambda team_ids: ((team_id, {}) for team_id in team_ids))
+
+        teams = dict(self.cache.fetch({"1": NOW, "3": NOW}))
+
+        assert teams == {"1": self.cache.teams["1"], "3": None}
+        assert "3" not in self.cache.teams
+        assert "Couldn't parse ESPN team 3" in caplog.text
@@ -1,3 +1,39 @@
-from db.create_db import init_db_session
+from sqlalchemy.orm import Session
 
-DB_SESSION = init_db_session()
+from db.create_db import DEFAULT_PROFILE, EngineProfile, init_db_session
+
+_DB_SESSION: Session | None = None
+
+
+def init_db(url: str | None = "sqlite:///database.db", profile: EngineProfile | None = DEFAULT_PROFILE) -> Session:
+    """Connect to the database, creating and migrating it if needed. Replaces
+    any session created before.
+
+    Args:
+        url (str): database url
+        profile (EngineProfile | None): pragmas to apply to every connection, None to use sqlite's defaults
+
+    Returns:
+        Session: database session
+    """
+    global _DB_SESSION
+    _DB_SESSION = init_db_session(url, profile)
+
+    return _DB_SESSION
+
+
+def get_session() -> Session:
+    """Get the database session, connecting to the default database on first
+    use.
+
+    Returns:
+        Session: database session
+    """
+    return _DB_SESSION if _DB_SESSION is not None else init_db()
+
+
+def __getattr__(name: str):
+    # DB_SESSION is resolved on access so importing db doesn't connect
+    if name == "DB_SESSION":
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
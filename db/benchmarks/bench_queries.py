@@ -0,0 +1,101 @@
+"""Benchmark the hot queries on a season-sized database with sqlite's default
+settings and no indexes, then again after migrating it and applying the engine
+profile.
+
+Run from the repository root with `python -m db.benchmarks.bench_queries`.
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from db.create_db import DEFAULT_PROFILE, create_db_engine, migrate_db
+from db.models import Base, Game, Post, Query
+
+SEASON_START = datetime(2025, 8, 23)
+GAMES = 3_500
+POSTS = 60_000
+QUERIES = 1_000_000
+
+
+def populate(path: str):
+    """Fill the database with a season of games, posts and api queries."""
+    connection = sqlite3.connect(path)
+    random.seed(0)
+    connection.executemany(
+        "INSERT INTO games (id, start_ts, home_team, away_team, home_team_id, away_team_id, home_wins, home_losses,"
+        " home_conf_wins, home_conf_losses, away_wins, away_losses, away_conf_wins, away_conf_losses, home_score,"
+        " away_score, networks, trackable) VALUES (?, ?, 'home', 'away', '1', '2', 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 'ESPN', 1)",
+        ((str(401_000_000 + i), SEASON_START + timedelta(minutes=random.randrange(140 * 24 * 60))) for i in range(GAMES)),
+    )
+    connection.executemany(
+        "INSERT INTO posts (uri, cid, post_text, created_at_ts, updated_at_ts, post_type) VALUES (?, ?, 'text', ?, ?, ?)",
+        (
+            (f"at://did:plc:bot/app.bsky.feed.post/{i}", f"cid{i}", ts, ts, "game_update" if i % 20 else "game_header")
+            for i in range(POSTS)
+            for ts in [SEASON_START + timedelta(seconds=random.randrange(140 * 24 * 60 * 60))]
+        ),
+    )
+    connection.executemany(
+        "INSERT INTO api_queries (url, status_code, date_ts) VALUES (?, 200, ?)",
+        (("https://site.api.espn.com/summary?event=1", SEASON_START + timedelta(seconds=i * 12)) for i in range(QUERIES)),
+    )
+    connection.commit()
+    connection.close()
+
+
+def time_queries(session: Session, number: int = 200) -> dict[str, float]:
+    """Time each hot query, in milliseconds per call."""
+    day = SEASON_START + timedelta(days=70)
+    statements = {
+        "games by start_ts": select(Game).filter(Game.start_ts >= day, Game.start_ts <= day + timedelta(days=1)),
+        "post by uri/cid": select(Post).where(Post.uri == "at://did:plc:bot/app.bsky.feed.post/31337", Post.cid == "cid31337"),
+        "daily post by type/ts": select(Post).filter(
+            Post.created_at_ts >= day - timedelta(hours=24), Post.created_at_ts <= day, Post.post_type == "daily"
+        ),
+        "api_queries last 24h": select(func.count(Query.id)).filter(
+            Query.date_ts >= day - timedelta(hours=24), Query.date_ts <= day
+        ),
+    }
+    return {
+        name: timeit.timeit(lambda: session.execute(statement).all(), number=number) / number * 1000
+        for name, statement in statements.items()
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "season.db")
+        url = f"sqlite:///{path}"
+
+        engine = create_db_engine(url, profile=None)
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(text(f"DROP INDEX {index.name}"))
+        populate(path)
+        with Session(engine) as session:
+            before = time_queries(session)
+        engine.dispose()
+
+        engine = create_db_engine(url, DEFAULT_PROFILE)
+        migrate_db(engine)
+        with Session(engine) as session:
+            after = time_queries(session)
+        engine.dispose()
+
+    print(f"{GAMES} games, {POSTS} posts, {QUERIES} api queries")
+    print(f"{'query':<24}{'before ms':>11}{'after ms':>10}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>11.3f}{after[name]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
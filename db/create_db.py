@@ -1,12 +1,94 @@
-from sqlalchemy import create_engine
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, create_engine, event, inspect, text
 from sqlalchemy.orm import Session
 
 from db.models import Base
 
 
-def init_db_session() -> Session:
-    """Initialize connection to the sqlite database."""
-    engine = create_engine("sqlite:///database.db")
+@dataclass
+class EngineProfile:
+    """SQLite pragmas applied to every new connection."""
+
+    # only takes effect on new database files, db.retention converts existing ones
+    auto_vacuum: str = "INCREMENTAL"
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 2**20
+    cache_size: int = -64 * 2**10  # negative values are in KiB
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5000
+
+    def pragmas(self) -> dict[str, str | int]:
+        """Get the pragmas to set, skipping any that are unset."""
+        return {pragma: value for pragma, value in self.__dict__.items() if value is not None}
+
+
+DEFAULT_PROFILE = EngineProfile()
+
+
+def create_db_engine(
+    url: str | None = "sqlite:///database.db", profile: EngineProfile | None = DEFAULT_PROFILE
+) -> Engine:
+    """Create an engine for the sqlite database.
+
+    Args:
+        url (str): database url
+        profile (EngineProfile | None): pragmas to apply to every connection, None to use sqlite's defaults
+
+    Returns:
+        Engine: database engine
+    """
+    engine = create_engine(url)
+
+    if profile is not None:
+
+        @event.listens_for(engine, "connect")
+        def apply_profile(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in profile.pragmas().items():
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+            cursor.close()
+
+    return engine
+
+
+def migrate_db(engine: Engine):
+    """Add columns and indexes that were introduced after the database file
+    was created. New columns must be nullable for this to succeed.
+
+    Args:
+        engine (Engine): engine connected to the database to migrate
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                    )
+
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def init_db_session(
+    url: str | None = "sqlite:///database.db", profile: EngineProfile | None = DEFAULT_PROFILE
+) -> Session:
+    """Initialize connection to the sqlite database.
+
+    Args:
+        url (str): database url
+        profile (EngineProfile | None): pragmas to apply to every connection, None to use sqlite's defaults
+
+    Returns:
+        Session: database session
+    """
+    engine = create_db_engine(url, profile)
     Base.metadata.create_all(engine)
+    migrate_db(engine)
 
     return Session(engine)
@@ -1,13 +1,81 @@
 import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
 
-from sqlalchemy import select, update
+from sqlalchemy import or_, select, tuple_, update
 from sqlalchemy.dialects.sqlite import insert
 
-from db import DB_SESSION
+from db import get_session
 from db.models import Base, Game, Post
 
 
+@dataclass
+class UnitOfWork:
+    """Writes batched into a single transaction."""
+
+    commits: int = 0
+
+
+_UNIT_OF_WORK: UnitOfWork | None = None
+
+
+@dataclass
+class UpsertCounts:
+    """Number of rows inserted, updated and left unchanged by an upsert."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """Batch every write made inside the context into one commit. Nested
+    units of work join the outermost one. Writes since the last commit are
+    rolled back if an exception is raised.
+
+    Yields:
+        UnitOfWork: unit of work counting the commits made
+    """
+    global _UNIT_OF_WORK
+    if _UNIT_OF_WORK is not None:
+        yield _UNIT_OF_WORK
+        return
+
+    _UNIT_OF_WORK = work = UnitOfWork()
+    try:
+        yield work
+        commit(durable=True)
+    except Exception:
+        get_session().rollback()
+        raise
+    finally:
+        _UNIT_OF_WORK = None
+
+
+def in_unit_of_work() -> bool:
+    """Check if writes are currently batched into a unit of work."""
+    return _UNIT_OF_WORK is not None
+
+
+def commit(durable: bool | None = False):
+    """Commit the session. Inside a unit of work the session is only flushed,
+    unless the write must be durable right away.
+
+    Args:
+        durable (bool): commit even inside a unit of work
+    """
+    if _UNIT_OF_WORK is None:
+        get_session().commit()
+    elif durable:
+        get_session().commit()
+        _UNIT_OF_WORK.commits += 1
+    else:
+        get_session().flush()
+
+
 def get_db_tables(table_name: str) -> Base:
     """Get a database table by name.
 
@@ -40,7 +108,7 @@ def get_games(start_date: datetime, end_date: datetime) -> list[Game]:
         (Game.start_ts >= start_date),
         (Game.start_ts <= end_date),
     )
-    rows = DB_SESSION.execute(statement).all()
+    rows = get_session().execute(statement).all()
 
     if not len(rows):
         logging.info(f"No games found for dates {start_date, end_date}")
@@ -62,7 +130,7 @@ def has_previous_daily_post(date: datetime) -> bool:
         (Post.created_at_ts <= date),
         (Post.post_type == "daily"),
     )
-    rows = DB_SESSION.execute(query).all()
+    rows = get_session().execute(query).all()
     return len(rows) > 0
 
 
@@ -82,9 +150,9 @@ def get_values(
     query = select(table).where(*(getattr(table, k) == v for k, v in filter.items()))
 
     if return_type == "all":
-        rows = DB_SESSION.execute(query).all()
+        rows = get_session().execute(query).all()
     elif return_type == "first":
-        rows = DB_SESSION.execute(query).first()
+        rows = get_session().execute(query).first()
     else:
         raise ValueError("return_type must be 'all' or 'first'")
 
@@ -95,47 +163,153 @@ def get_values(
     return [row[0] for row in rows] if return_type == "all" else rows[0]
 
 
-def insert_rows(table_name: str, rows: list[dict]):
+def as_row(row: Any) -> dict:
+    """Get the column values of a row, which is either a dictionary or a
+    record with an `as_row` method.
+
+    Args:
+        row: dictionary or record
+
+    Returns:
+        dict: column values
+    """
+    return row.as_row() if hasattr(row, "as_row") else row
+
+
+def insert_rows(table_name: str, rows: list[Any]) -> list:
     """Generic interface to log rows into a database table.
 
     Args:
         table_name: table in the database to log to
-        rows: rows to insert
+        rows: rows to insert, either dictionaries or records with an `as_row` method
+
+    Returns:
+        list: primary keys of the inserted rows, rows that already existed are skipped
     """
     if not len(rows):
         logging.info("No rows to insert")
-        return
+        return []
 
-    DB_SESSION.execute(
-        insert(get_db_tables(table_name)).values(rows).on_conflict_do_nothing()
+    table = get_db_tables(table_name)
+    result = get_session().execute(
+        insert(table)
+        .values([as_row(row) for row in rows])
+        .on_conflict_do_nothing()
+        .returning(*table.__mapper__.primary_key)
     )
-    DB_SESSION.commit()
+    primary_keys = [row[0] if len(row) == 1 else tuple(row) for row in result]
+    commit()
+
+    return primary_keys
+
 
+def upsert_rows(
+    table_name: str,
+    rows: list[Any],
+    conflict_columns: tuple[str, ...] | None = None,
+    exclude_columns: tuple[str, ...] | None = (),
+    chunk_size: int | None = 500,
+) -> UpsertCounts:
+    """Insert rows into a database table, updating the columns that changed
+    for rows that already exist. Rows are written in chunks to stay under
+    sqlite's variable limit.
 
-def add_record(table_name: str, values: dict):
+    Args:
+        table_name: table in the database to log to
+        rows: rows to upsert, either dictionaries or records with an `as_row` method
+        conflict_columns: columns identifying existing rows, defaults to the primary key
+        exclude_columns: columns that are only set when a row is inserted
+        chunk_size: number of rows written per statement
+
+    Returns:
+        UpsertCounts: number of rows inserted, updated and unchanged
+    """
+    counts = UpsertCounts()
+    if not len(rows):
+        logging.info("No rows to upsert")
+        return counts
+
+    table = get_db_tables(table_name)
+    conflict_columns = conflict_columns or tuple(column.key for column in table.__mapper__.primary_key)
+    rows = [as_row(row) for row in rows]
+    update_columns = [column for column in rows[0] if column not in conflict_columns + tuple(exclude_columns or ())]
+
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={column: statement.excluded[column] for column in update_columns},
+        where=or_(*(getattr(table, column).is_distinct_from(statement.excluded[column]) for column in update_columns)),
+    )
+
+    key_columns = [getattr(table, column) for column in conflict_columns]
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        keys = [tuple(row[column] for column in conflict_columns) for row in chunk]
+        existing = set(map(tuple, get_session().execute(select(*key_columns).where(tuple_(*key_columns).in_(keys)))))
+        written = [tuple(row) for row in get_session().execute(statement.values(chunk).returning(*key_columns))]
+
+        updated = sum(key in existing for key in written)
+        counts.inserted += len(written) - updated
+        counts.updated += updated
+        counts.unchanged += len(chunk) - len(written)
+
+    commit()
+    logging.info(f"Upserted {table_name}: {counts}")
+
+    return counts
+
+
+def add_record(table_name: str, values: dict, durable: bool | None = False) -> Any:
     """Saves a record to the database.
 
     Args:
         table_name (str): name of the table to log to
         values (dict): dictionary containing the values to log
+        durable (bool): commit right away even inside a unit of work
+
+    Returns:
+        Any: primary key of the new record, None if there were no values
     """
     if not values:
         logging.info("No values to insert")
+        return None
+
+    table = get_db_tables(table_name)
+    record = table(**values)
+    get_session().add(record)
+    # the key is read before committing, committing expires the record
+    get_session().flush()
+    primary_key = table.__mapper__.primary_key_from_instance(record)
+    commit(durable)
+
+    return primary_key[0] if len(primary_key) == 1 else tuple(primary_key)
+
+
+def merge_record(table_name: str, values: dict):
+    """Saves a record to the database, replacing the existing record with the
+    same primary key.
+
+    Args:
+        table_name (str): name of the table to log to
+        values (dict): dictionary containing the values to log
+    """
+    if not values:
+        logging.info("No values to merge")
         return
 
     table = get_db_tables(table_name)
-    query = table(**values)
-    DB_SESSION.add(query)
-    DB_SESSION.commit()
+    get_session().merge(table(**values))
+    commit()
 
 
-def update_rows(table_name: str, values: dict, condition: dict):
+def update_rows(table_name: str, values: dict, condition: dict, durable: bool | None = False):
     """Generic interface to update rows in a database table.
 
     Args:
         table_name: table in the database to update
         values: values to update
         condition: condition to match rows to update
+        durable: commit right away even inside a unit of work
     """
     assert condition, "Matching conditions are required"
     if not values:
@@ -149,38 +323,6 @@ def update_rows(table_name: str, values: dict, condition: dict):
         .values(values)
     )
 
-    DB_SESSION.execute(query)
-    DB_SESSION.commit()
-
-
-def query_for_post_ids(reply_ids: dict[str, str], key: str) -> dict:
-    """Gather information for a parent/root post from the sqlite database.
-
-    Args:
-        reply_ids (dict): dictionary containing the post id of the parent and/or root post
-        key (str): dictionary key that contains the post id to query
-
-    Returns:
-        dict: containing 'uri' and 'cid' for the queried post
-    """
-    post = get_values("posts", {"id": reply_ids[key]}, "first")
-
-    return {"uri": post.uri, "cid": post.cid}
-
-
-def get_previous_posts(last_post_id: int) -> dict[str, str]:
-    """Get information about previous post for a game.
-
-    Args:
-        last_post_id (int): id of the last post made
-
-    Returns:
-        dict: post information
-    """
-    last_post = get_values("posts", {"id": last_post_id}, "first")
+    get_session().execute(query)
+    commit(durable)
 
-    return {
-        "parent": last_post.id,
-        "root": last_post.root_id if last_post.root_id else last_post.id,
-        "created_at": last_post.created_at_ts,
-    }
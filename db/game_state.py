@@ -0,0 +1,234 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import event, exists, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from db import get_session
+from db.models import Game, OutboxPost, Post
+
+STATE_COLUMNS = (
+    "id",
+    "home_team",
+    "away_team",
+    "home_team_id",
+    "away_team_id",
+    "home_score",
+    "away_score",
+    "last_post_id",
+    "last_play_id",
+    "last_play_sequence",
+    "thread_root_id",
+    "thread_root_uri",
+    "thread_root_cid",
+    "thread_parent_uri",
+    "thread_parent_cid",
+)
+
+
+@dataclass(slots=True)
+class PostRef:
+    """Bluesky reference of a post in the posts table, without an id while
+    it is being published."""
+
+    id: int | None
+    uri: str
+    cid: str
+
+    def as_strong_ref(self) -> dict:
+        """Get the reference in the form used to reply to the post."""
+        return {"uri": self.uri, "cid": self.cid}
+
+
+@dataclass(slots=True)
+class GameState:
+    """Posting state of a game, with the posts its replies are threaded to.
+    The thread is kept on the game row, so replies are built without reading
+    the posts table."""
+
+    id: str
+    home_team: str
+    away_team: str
+    home_team_id: str
+    away_team_id: str
+    home_score: int
+    away_score: int
+    last_post_id: int | None = None
+    last_play_id: str | None = None
+    last_play_sequence: int | None = None
+    thread_root_id: int | None = None
+    thread_root_uri: str | None = None
+    thread_root_cid: str | None = None
+    thread_parent_uri: str | None = None
+    thread_parent_cid: str | None = None
+    header_queued: bool = False
+    changes: dict = field(default_factory=dict)
+
+    @property
+    def has_thread(self) -> bool:
+        """If the game header is posted or queued, so replies can be queued."""
+        return self.last_post_id is not None or self.header_queued
+
+    @property
+    def parent(self) -> PostRef | None:
+        """Latest post of the game's thread, the next reply's parent."""
+        if self.thread_parent_uri is None:
+            return None
+
+        return PostRef(self.last_post_id, self.thread_parent_uri, self.thread_parent_cid)
+
+    @property
+    def root(self) -> PostRef | None:
+        """Game header the game's thread starts with."""
+        if self.thread_root_uri is None:
+            return None
+
+        return PostRef(self.thread_root_id, self.thread_root_uri, self.thread_root_cid)
+
+    def update(self, values: dict):
+        """Change columns of the game, they are written to the games table on
+        the next commit.
+
+        Args:
+            values (dict): column values to change
+        """
+        for column, value in values.items():
+            setattr(self, column, value)
+        self.changes.update(values)
+
+    def reply_ids(self) -> dict:
+        """Get the parent and root posts a reply about the game is threaded to.
+
+        Returns:
+            dict: containing 'parent' and 'root' post information
+        """
+        assert self.parent is not None, f"Game {self.id} has no post to reply to"
+        return {"parent": self.parent.as_strong_ref(), "root": (self.root or self.parent).as_strong_ref()}
+
+    def thread_to(self, post: PostRef, header: bool | None = False):
+        """Make a post the latest of the game's thread, so the next reply is
+        threaded to it. Written to the games table on the next commit.
+
+        Args:
+            post (PostRef): post that was published
+            header (bool): if the post is the game header, which starts a new thread
+        """
+        values = {"last_post_id": post.id, "thread_parent_uri": post.uri, "thread_parent_cid": post.cid}
+        if header:
+            values.update({"thread_root_id": post.id, "thread_root_uri": post.uri, "thread_root_cid": post.cid})
+        self.update(values)
+
+
+class _GameStateCache:
+    """Identity map of game states, loaded in one query and written back to
+    the games table whenever the session commits."""
+
+    def __init__(self, session: Session | None = None) -> None:
+        """Configure the cache.
+
+        Args:
+            session (optional, Session): database session the cache reads from and writes to, defaults to the
+                database session on first use
+        """
+        self._session = session
+        self._listening = False
+        self.games: dict[str, GameState] = {}
+
+    @property
+    def session(self) -> Session:
+        """Database session, the cache writes back whenever it commits."""
+        if self._session is None:
+            self._session = get_session()
+        if not self._listening:
+            event.listen(self._session, "before_commit", self.write_back)
+            event.listen(self._session, "after_rollback", self.clear)
+            self._listening = True
+
+        return self._session
+
+    def load(self, game_ids: Iterable[str]) -> dict[str, GameState]:
+        """Load the state of several games and whether their header is
+        queued, in one query. Games already loaded are kept.
+
+        Args:
+            game_ids (Iterable[str]): ids of the games in the games table
+
+        Returns:
+            dict[str, GameState]: state of each loaded game keyed by game id
+        """
+        missing = [game_id for game_id in game_ids if game_id not in self.games]
+        if not missing:
+            return self.games
+
+        statement = select(
+            *(getattr(Game, column) for column in STATE_COLUMNS),
+            exists().where(
+                OutboxPost.game_id == Game.id, OutboxPost.post_type == "game_header", OutboxPost.status == "queued"
+            ),
+        ).where(Game.id.in_(missing))
+        untracked = []
+        for row in self.session.execute(statement):
+            state = GameState(*row[: len(STATE_COLUMNS)], header_queued=row[len(STATE_COLUMNS)])
+            if state.last_post_id is not None and state.thread_parent_uri is None:
+                untracked.append(state)
+            self.games[state.id] = state
+
+        if untracked:
+            self._load_threads(untracked)
+
+        return self.games
+
+    def _load_threads(self, states: list[GameState]):
+        """Look up the threads of games posted before threads were kept on
+        the game row, from the posts table. They are saved to the games table
+        on the next commit, so this only happens once per game.
+
+        Args:
+            states (list[GameState]): states of games with a last post but no thread
+        """
+        parent = aliased(Post)
+        root = aliased(Post)
+        statement = (
+            select(parent.id, parent.uri, parent.cid, root.id, root.uri, root.cid)
+            .join(root, root.id == func.coalesce(parent.root_id, parent.id))
+            .where(parent.id.in_([state.last_post_id for state in states]))
+        )
+        threads = {row[0]: row for row in self.session.execute(statement)}
+        for state in states:
+            if state.last_post_id in threads:
+                parent_id, parent_uri, parent_cid, root_id, root_uri, root_cid = threads[state.last_post_id]
+                state.thread_to(PostRef(root_id, root_uri, root_cid), header=True)
+                state.thread_to(PostRef(parent_id, parent_uri, parent_cid))
+
+    def get(self, game_id: str) -> GameState | None:
+        """Get the state of a game, loading it if it isn't cached.
+
+        Args:
+            game_id (str): id of the game in the games table
+
+        Returns:
+            GameState | None: state of the game, None if the game doesn't exist
+        """
+        return self.load([game_id]).get(game_id)
+
+    def write_back(self, session: Session | None = None):
+        """Write changed game states to the games table.
+
+        Args:
+            session (optional, Session): committing session, passed by the commit event
+        """
+        for state in self.games.values():
+            if state.changes:
+                self.session.execute(update(Game).where(Game.id == state.id).values(state.changes))
+                state.changes = {}
+
+    def clear(self, session: Session | None = None):
+        """Forget every cached game state, dropping changes not written yet.
+
+        Args:
+            session (optional, Session): session rolled back, passed by the rollback event
+        """
+        self.games = {}
+
+
+GameStates = _GameStateCache()
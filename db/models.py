@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import TIMESTAMP, Boolean, Integer, String
+from sqlalchemy import TIMESTAMP, Boolean, Float, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -14,6 +14,10 @@ class Post(Base):
     """Table definition for Post."""
 
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_uri_cid", "uri", "cid"),
+        Index("ix_posts_post_type_created_at_ts", "post_type", "created_at_ts"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     uri: Mapped[str] = mapped_column(String(80))
@@ -32,7 +36,7 @@ class Game(Base):
     __tablename__ = "games"
 
     id: Mapped[str] = mapped_column(String(20), primary_key=True)
-    start_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP)
+    start_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, index=True)
     home_team: Mapped[str] = mapped_column(String(50))
     away_team: Mapped[str] = mapped_column(String(50))
     home_team_id: Mapped[str] = mapped_column(String(20))
@@ -51,6 +55,52 @@ class Game(Base):
     trackable: Mapped[bool] = mapped_column(Boolean)
     last_post_id: Mapped[Optional[int]] = mapped_column(Integer)
     end_ts: Mapped[Optional[TIMESTAMP]] = mapped_column(TIMESTAMP)
+    status: Mapped[Optional[str]] = mapped_column(String(40))
+    period: Mapped[Optional[int]] = mapped_column(Integer)
+    clock: Mapped[Optional[str]] = mapped_column(String(10))
+    scoreboard_home_score: Mapped[Optional[int]] = mapped_column(Integer)
+    scoreboard_away_score: Mapped[Optional[int]] = mapped_column(Integer)
+    last_play_id: Mapped[Optional[str]] = mapped_column(String(30))
+    last_play_sequence: Mapped[Optional[int]] = mapped_column(Integer)
+    thread_root_id: Mapped[Optional[int]] = mapped_column(Integer)
+    thread_root_uri: Mapped[Optional[str]] = mapped_column(String(80))
+    thread_root_cid: Mapped[Optional[str]] = mapped_column(String(80))
+    thread_parent_uri: Mapped[Optional[str]] = mapped_column(String(80))
+    thread_parent_cid: Mapped[Optional[str]] = mapped_column(String(80))
+
+
+class Team(Base):
+    """Table definition for Team."""
+
+    __tablename__ = "teams"
+
+    id: Mapped[str] = mapped_column(String(20), primary_key=True)
+    streak: Mapped[str] = mapped_column(String(10))
+    wins: Mapped[int] = mapped_column(Integer)
+    losses: Mapped[int] = mapped_column(Integer)
+    next_game_ts: Mapped[Optional[TIMESTAMP]] = mapped_column(TIMESTAMP)
+    updated_at_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP)
+
+
+class OutboxPost(Base):
+    """Table definition for Outbox, posts waiting to be published."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_status_id", "status", "id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    rkey: Mapped[str] = mapped_column(String(13), unique=True)
+    game_id: Mapped[Optional[str]] = mapped_column(String(20), index=True)
+    post_type: Mapped[str] = mapped_column(String(80))
+    post_text: Mapped[str] = mapped_column(String(300))
+    summary: Mapped[Optional[str]] = mapped_column(String(300))
+    status: Mapped[str] = mapped_column(String(10))
+    attempts: Mapped[int] = mapped_column(Integer)
+    next_attempt_ts: Mapped[Optional[TIMESTAMP]] = mapped_column(TIMESTAMP)
+    last_error: Mapped[Optional[str]] = mapped_column(String(300))
+    post_id: Mapped[Optional[int]] = mapped_column(Integer)
+    created_at_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP)
+    sent_at_ts: Mapped[Optional[TIMESTAMP]] = mapped_column(TIMESTAMP)
 
 
 class Credentials(Base):
@@ -71,4 +121,20 @@ class Query(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     url: Mapped[str] = mapped_column(String(120))
     status_code: Mapped[int] = mapped_column(Integer)
-    date_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP)
+    date_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, index=True)
+    cache_status: Mapped[Optional[str]] = mapped_column(String(12))
+    latency_ms: Mapped[Optional[float]] = mapped_column(Float)
+
+
+class QueryRollup(Base):
+    """Table definition for ApiQueryRollups, hourly aggregates of api_queries."""
+
+    __tablename__ = "api_query_rollups"
+
+    hour_ts: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, primary_key=True)
+    url_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    status_code: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer)
+    latency_p50_ms: Mapped[Optional[float]] = mapped_column(Float)
+    latency_p95_ms: Mapped[Optional[float]] = mapped_column(Float)
+    latency_p99_ms: Mapped[Optional[float]] = mapped_column(Float)
@@ -0,0 +1,193 @@
+import argparse
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert
+
+from db import get_session
+from db.db_utils import commit
+from db.models import Query, QueryRollup
+
+# url fragments identifying the ESPN endpoint a query was made to
+URL_TYPES = {
+    "/scoreboard": "scoreboard",
+    "/summary": "game",
+    "/teams/": "team",
+}
+
+
+def url_type(url: str) -> str:
+    """Get the ESPN endpoint type of a queried url.
+
+    Args:
+        url (str): queried url
+
+    Returns:
+        str: endpoint type, 'other' if the url isn't an ESPN endpoint
+    """
+    for fragment, endpoint in URL_TYPES.items():
+        if fragment in url:
+            return endpoint
+
+    return "other"
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Get a percentile of sorted values with the nearest-rank method.
+
+    Args:
+        values (list[float]): sorted values
+        q (float): percentile between 0 and 100
+
+    Returns:
+        float | None: percentile, None if there are no values
+    """
+    if not values:
+        return None
+
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def rollup_queries(before: datetime, batch: timedelta | None = timedelta(days=1)) -> int:
+    """Roll api_queries rows older than a cutoff into hourly aggregates in the
+    api_query_rollups table and delete them. Rows are only rolled up for
+    whole hours, and read one batch of hours at a time so memory doesn't grow
+    with the backlog.
+
+    Args:
+        before (datetime): cutoff, rounded down to the hour
+        batch (timedelta): span of rows rolled up and committed at a time, in whole hours
+
+    Returns:
+        int: number of api_queries rows rolled up
+    """
+    cutoff = before.replace(minute=0, second=0, microsecond=0)
+    oldest = get_session().execute(select(func.min(Query.date_ts)).where(Query.date_ts < cutoff)).scalar()
+    if oldest is None:
+        logging.info(f"No api_queries rows before {cutoff} to roll up")
+        return 0
+
+    deleted = rollups = 0
+    start = oldest.replace(minute=0, second=0, microsecond=0)
+    while start < cutoff:
+        end = min(start + batch, cutoff)
+        batch_deleted, batch_rollups = _rollup_batch(start, end)
+        deleted += batch_deleted
+        rollups += batch_rollups
+        start = end
+
+    logging.info(f"Rolled {deleted} api_queries rows before {cutoff} into {rollups} hourly rollups")
+    return deleted
+
+
+def _rollup_batch(start: datetime, end: datetime) -> tuple[int, int]:
+    """Roll up and delete the api_queries rows logged between two whole hours,
+    in one commit.
+
+    Args:
+        start (datetime): first hour of the batch
+        end (datetime): hour the batch ends before
+
+    Returns:
+        tuple[int, int]: number of api_queries rows rolled up and of hourly rollups written
+    """
+    window = (Query.date_ts >= start) & (Query.date_ts < end)
+    rows = get_session().execute(select(Query.date_ts, Query.url, Query.status_code, Query.latency_ms).where(window))
+
+    groups = defaultdict(lambda: {"count": 0, "latencies": []})
+    for date_ts, url, status_code, latency_ms in rows:
+        group = groups[(date_ts.replace(minute=0, second=0, microsecond=0), url_type(url), status_code)]
+        group["count"] += 1
+        if latency_ms is not None:
+            group["latencies"].append(latency_ms)
+
+    if not groups:
+        return 0, 0
+
+    rollups = []
+    for (hour_ts, endpoint, status_code), group in groups.items():
+        latencies = sorted(group["latencies"])
+        rollups.append(
+            {
+                "hour_ts": hour_ts,
+                "url_type": endpoint,
+                "status_code": status_code,
+                "count": group["count"],
+                "latency_p50_ms": percentile(latencies, 50),
+                "latency_p95_ms": percentile(latencies, 95),
+                "latency_p99_ms": percentile(latencies, 99),
+            }
+        )
+
+    # rows logged after their hour was rolled up are added to its count, their raw latencies are gone
+    # so the percentiles are merged weighted by the number of rows on each side
+    statement = insert(QueryRollup)
+    merged = {"count": QueryRollup.count + statement.excluded.count}
+    for column in ("latency_p50_ms", "latency_p95_ms", "latency_p99_ms"):
+        stored, late = getattr(QueryRollup, column), statement.excluded[column]
+        weighted = (stored * QueryRollup.count + late * statement.excluded.count) / (QueryRollup.count + statement.excluded.count)
+        merged[column] = case((late.is_(None), stored), (stored.is_(None), late), else_=weighted)
+    statement = statement.on_conflict_do_update(index_elements=["hour_ts", "url_type", "status_code"], set_=merged)
+    for chunk in range(0, len(rollups), 500):
+        get_session().execute(statement.values(rollups[chunk : chunk + 500]))
+    deleted = get_session().execute(delete(Query).where(window)).rowcount
+    commit(durable=True)
+
+    return deleted, len(rollups)
+
+
+def compact() -> int:
+    """Return free pages of the database file to the filesystem. A database
+    created without incremental auto vacuum is converted with a full vacuum
+    first.
+
+    Returns:
+        int: number of free pages before compacting
+    """
+    with get_session().get_bind().connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        free_pages = connection.execute(text("PRAGMA freelist_count")).scalar()
+
+        # 2 == INCREMENTAL
+        if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+            logging.info("Converting the database to incremental auto vacuum")
+            connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+            connection.execute(text("VACUUM"))
+        else:
+            # every freed page is a result row, the vacuum stops if they aren't read
+            cursor = connection.connection.cursor()
+            cursor.execute("PRAGMA incremental_vacuum")
+            cursor.fetchall()
+            cursor.close()
+
+    logging.info(f"Compacted database, freed {free_pages} pages")
+    return free_pages
+
+
+def apply_retention(days: int | None = 14) -> int:
+    """Roll up api_queries rows older than a number of days and compact the
+    database.
+
+    Args:
+        days (int): number of days raw api_queries rows are kept
+
+    Returns:
+        int: number of api_queries rows rolled up
+    """
+    deleted = rollup_queries(datetime.now() - timedelta(days=days))
+    if deleted:
+        compact()
+
+    return deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up old api_queries rows and compact the database.")
+    parser.add_argument("--days", type=int, default=14, help="number of days raw api_queries rows are kept")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    apply_retention(days=args.days)
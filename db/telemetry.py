@@ -0,0 +1,66 @@
+import atexit
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from db import get_session
+from db.db_utils import in_unit_of_work
+from db.models import Query
+
+
+class _QueryBuffer:
+    """Buffers api_queries records in memory and writes them in bulk, so API
+    calls don't wait on a database commit. Records are written on their own
+    session, so they're kept when the writes around them are rolled back."""
+
+    def __init__(self, max_records: int | None = 200, max_age: float | None = 30) -> None:
+        """Configure when the buffer is flushed.
+
+        Args:
+            max_records (int): number of buffered records that triggers a flush
+            max_age (float): age in seconds of the oldest buffered record that triggers a flush
+        """
+        self.max_records = max_records
+        self.max_age = max_age
+        self._records: list[dict] = []
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(self, values: dict):
+        """Buffer an api_queries record, flushing if a threshold is reached.
+
+        Args:
+            values (dict): dictionary containing the values to log
+        """
+        with self._lock:
+            self._records.append(values)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            should_flush = len(self._records) >= self.max_records or time.monotonic() - self._oldest >= self.max_age
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered record to the api_queries table in one bulk
+        insert, committed on its own session. Inside a unit of work records
+        stay buffered, the unit holds sqlite's write lock until it's done."""
+        if in_unit_of_work():
+            return
+
+        with self._lock:
+            records, self._records, self._oldest = self._records, [], None
+
+        if records:
+            with Session(get_session().get_bind()) as session:
+                session.execute(insert(Query), records)
+                session.commit()
+
+
+QueryBuffer = _QueryBuffer()
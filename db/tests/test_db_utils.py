@@ -1,19 +1,26 @@
 import logging
+import subprocess
+import sys
+import uuid
 from datetime import datetime, timedelta
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import create_engine, event, inspect, select, text
 from sqlalchemy.exc import IntegrityError
 
-from db.create_db import init_db_session
+import db
+from db.create_db import EngineProfile, create_db_engine, init_db_session, migrate_db
 from db.db_utils import (
+    UpsertCounts,
     add_record,
     get_db_tables,
     get_games,
     get_values,
     has_previous_daily_post,
     insert_rows,
+    unit_of_work,
     update_rows,
+    upsert_rows,
 )
 from db.models import Game, Query
 
@@ -113,9 +120,23 @@ class TestInsertRows:
 
     def test_insert_values_no_rows(self, caplog):
         with caplog.at_level(logging.INFO):
-            insert_rows("games", [])
+            assert insert_rows("games", []) == []
         assert any("No rows to insert" in message for message in caplog.messages)
 
+    def test_insert_values_returns_keys(self):
+        url = f"https://example.com/{uuid.uuid4()}"
+        rows = [{"url": url, "status_code": 200, "date_ts": datetime.now()} for _ in range(3)]
+        keys = insert_rows("api_queries", rows)
+
+        statement = select(Query.id).filter(Query.url == url)
+        assert sorted(keys) == sorted(self.session.execute(statement).scalars())
+        assert len(keys) == 3
+
+    def test_insert_values_skips_existing_keys(self):
+        game = {**self.valid_game, "id": -99}
+        insert_rows("games", [game])
+        assert insert_rows("games", [game]) == []
+
 
 class TestAddRecord:
     def setup_class(self):
@@ -146,9 +167,25 @@ class TestAddRecord:
 
     def test_save_api_query_no_values(self, caplog):
         with caplog.at_level(logging.INFO):
-            add_record("api_queries", {})
+            assert add_record("api_queries", {}) is None
         assert any("No values to insert" in message for message in caplog.messages)
 
+    def test_save_api_query_returns_key(self):
+        statements = []
+
+        def record_statement(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db.DB_SESSION.get_bind()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            query_id = add_record("api_queries", {"url": self.valid_url, "status_code": 200, "date_ts": datetime.now()})
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert [statement for statement in statements if statement.startswith("SELECT")] == []
+        assert self.session.get(Query, query_id).url == self.valid_url
+
 
 class TestGetDBTables:
     def setup_class(self):
@@ -269,3 +306,178 @@ class TestUpdateRows:
 
         self.teardown_class()
         assert post.post_text == "test_1"
+
+
+class TestMigrateDB:
+    def test_migrate_db_adds_missing_columns(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE games (id VARCHAR(20) PRIMARY KEY)"))
+        Game.metadata.create_all(engine)
+
+        migrate_db(engine)
+
+        columns = {column["name"] for column in inspect(engine).get_columns("games")}
+        assert {"status", "period", "clock", "last_post_id"} <= columns
+
+    def test_migrate_db_adds_missing_indexes(self):
+        engine = create_engine("sqlite://")
+        Game.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_games_start_ts"))
+
+        migrate_db(engine)
+
+        indexes = {index["name"] for index in inspect(engine).get_indexes("games")}
+        assert "ix_games_start_ts" in indexes
+
+
+class TestEngineProfile:
+    def test_profile_applied_to_connections(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}", EngineProfile(synchronous="OFF"))
+
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 0
+            assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+            assert connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+    def test_no_profile(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}", None)
+
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+
+
+class TestUnitOfWork:
+    def setup_class(self):
+        self.session = DB_SESSION
+        self.valid_post = {
+            "id": -30,
+            "uri": "test",
+            "cid": "test",
+            "post_text": "test",
+            "created_at_ts": datetime.now(),
+            "updated_at_ts": datetime.now(),
+            "post_type": "daily",
+        }
+        insert_rows("posts", [self.valid_post])
+
+    def committed_text(self) -> str:
+        with self.session.bind.connect() as connection:
+            return connection.execute(text("SELECT post_text FROM posts WHERE id = -30")).scalar()
+
+    def test_writes_commit_once(self):
+        with unit_of_work() as work:
+            update_rows("posts", {"post_text": "uow_1"}, {"id": -30})
+            update_rows("posts", {"post_text": "uow_2"}, {"id": -30})
+            assert self.committed_text() != "uow_2"
+
+        assert work.commits == 1
+        assert self.committed_text() == "uow_2"
+
+    def test_durable_write_commits_immediately(self):
+        with unit_of_work() as work:
+            update_rows("posts", {"post_text": "uow_3"}, {"id": -30})
+            add_record("api_queries", {"url": "uow", "status_code": 200, "date_ts": datetime.now()}, durable=True)
+            assert self.committed_text() == "uow_3"
+
+        assert work.commits == 2
+
+    def test_nested_units_of_work_join(self):
+        with unit_of_work() as outer:
+            with unit_of_work() as inner:
+                update_rows("posts", {"post_text": "uow_4"}, {"id": -30})
+            assert inner is outer
+            assert self.committed_text() != "uow_4"
+
+        assert outer.commits == 1
+
+    def test_rolled_back_on_error(self):
+        update_rows("posts", {"post_text": "uow_5"}, {"id": -30})
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                update_rows("posts", {"post_text": "uow_6"}, {"id": -30})
+                raise RuntimeError
+
+        assert self.committed_text() == "uow_5"
+
+
+class TestUpsertRows:
+    def setup_method(self):
+        self.session = DB_SESSION
+        self.session.execute(text("DELETE FROM games WHERE id IN ('-300', '-301', '-302')"))
+        self.session.commit()
+        self.game = {
+            "id": "-300",
+            "start_ts": datetime(1807, 1, 1),
+            "home_team": "test_home_team",
+            "away_team": "test_away_team",
+            "home_team_id": "test_home_id",
+            "away_team_id": "test_away_id",
+            "home_wins": 0,
+            "home_losses": 0,
+            "home_conf_wins": 0,
+            "home_conf_losses": 0,
+            "away_wins": 0,
+            "away_losses": 0,
+            "away_conf_wins": 0,
+            "away_conf_losses": 0,
+            "home_score": 0,
+            "away_score": 0,
+            "networks": "ESPN",
+            "trackable": True,
+        }
+
+    def stored_game(self, game_id: str) -> Game:
+        self.session.expire_all()
+        return self.session.get(Game, game_id)
+
+    def test_upsert_counts(self):
+        games = [self.game, {**self.game, "id": "-301"}]
+        assert upsert_rows("games", games) == UpsertCounts(inserted=2)
+
+        games.append({**self.game, "id": "-302"})
+        games[1] = {**games[1], "networks": "ABC"}
+        assert upsert_rows("games", games, chunk_size=2) == UpsertCounts(inserted=1, updated=1, unchanged=1)
+        assert self.stored_game("-301").networks == "ABC"
+
+    def test_excluded_columns_are_not_updated(self):
+        upsert_rows("games", [self.game])
+
+        changed = {**self.game, "home_score": 7, "start_ts": datetime(1807, 1, 2)}
+        assert upsert_rows("games", [changed], exclude_columns=("home_score",)) == UpsertCounts(updated=1)
+
+        game = self.stored_game("-300")
+        assert game.home_score == 0
+        assert game.start_ts == datetime(1807, 1, 2)
+
+    def test_excluded_column_changes_are_unchanged(self):
+        upsert_rows("games", [self.game])
+
+        changed = {**self.game, "home_score": 7}
+        assert upsert_rows("games", [changed], exclude_columns=("home_score",)) == UpsertCounts(unchanged=1)
+
+    def test_upsert_no_rows(self, caplog):
+        with caplog.at_level(logging.INFO):
+            assert upsert_rows("games", []) == UpsertCounts()
+        assert any("No rows to upsert" in message for message in caplog.messages)
+
+
+class TestLazyInit:
+    def run(self, statement: str) -> str:
+        return subprocess.run([sys.executable, "-c", statement], capture_output=True, check=True, text=True).stdout
+
+    def test_import_does_not_connect(self):
+        output = self.run("import sys, db, post.post_important_plays; print(db._DB_SESSION, 'atproto' in sys.modules)")
+
+        assert output.split() == ["None", "False"]
+
+    def test_init_db(self, tmp_path):
+        statement = (
+            "import db; from db.db_utils import get_values;"
+            f" db.init_db('sqlite:///{tmp_path / 'test.db'}'); print(get_values('games', {{}}) is None, db.DB_SESSION is db.get_session())"
+        )
+
+        assert self.run(statement).split() == ["True", "True"]
+        assert (tmp_path / "test.db").exists()
@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, event, select
+
+from db import DB_SESSION
+from db.game_state import PostRef, _GameStateCache
+from db.models import Game, Post
+
+
+def thread(last_post_id: int | None, root_id: int | None = None) -> dict:
+    if root_id is None:
+        return {"last_post_id": last_post_id}
+    return {
+        "last_post_id": last_post_id,
+        "thread_root_id": root_id,
+        "thread_root_uri": f"uri_{root_id}",
+        "thread_root_cid": f"cid_{root_id}",
+        "thread_parent_uri": f"uri_{last_post_id}",
+        "thread_parent_cid": f"cid_{last_post_id}",
+    }
+
+
+def post_row(post_id: int, root_id: int | None = None) -> dict:
+    return {
+        "id": post_id,
+        "uri": f"uri_{post_id}",
+        "cid": f"cid_{post_id}",
+        "post_text": "test",
+        "created_at_ts": datetime.now(),
+        "updated_at_ts": datetime.now(),
+        "post_type": "game_header",
+        "root_id": root_id,
+    }
+
+
+class TestGameStateCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, game_row):
+        DB_SESSION.execute(delete(Game).where(Game.id.in_(["-200", "-201", "-202", "-204"])))
+        DB_SESSION.execute(delete(Post).where(Post.id.in_([-200, -201])))
+        DB_SESSION.add_all([Post(**post_row(-200)), Post(**post_row(-201, root_id=-200))])
+        DB_SESSION.add_all(
+            [
+                Game(**game_row("-200", **thread(-200, root_id=-200))),
+                Game(**game_row("-201", **thread(-201, root_id=-200))),
+                Game(**game_row("-202", **thread(None))),
+                Game(**game_row("-204", **thread(-201))),
+            ]
+        )
+        DB_SESSION.commit()
+        self.cache = _GameStateCache(DB_SESSION)
+
+    def teardown_method(self):
+        event.remove(DB_SESSION, "before_commit", self.cache.write_back)
+        event.remove(DB_SESSION, "after_rollback", self.cache.clear)
+
+    def test_load_in_one_query(self):
+        statements = []
+
+        def count(*args):
+            statements.append(args)
+
+        engine = DB_SESSION.get_bind()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            games = self.cache.load(["-200", "-201", "-202"])
+            for game_id in ("-200", "-201", "-202"):
+                self.cache.get(game_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert len(statements) == 1
+        assert "posts" not in statements[0][2]
+        assert set(games) == {"-200", "-201", "-202"}
+
+    def test_reply_ids(self):
+        self.cache.load(["-200", "-201", "-202"])
+
+        assert self.cache.get("-200").reply_ids() == {
+            "parent": {"uri": "uri_-200", "cid": "cid_-200"},
+            "root": {"uri": "uri_-200", "cid": "cid_-200"},
+        }
+        assert self.cache.get("-201").reply_ids() == {
+            "parent": {"uri": "uri_-201", "cid": "cid_-201"},
+            "root": {"uri": "uri_-200", "cid": "cid_-200"},
+        }
+        assert self.cache.get("-202").parent is None
+
+    def test_thread_updated_in_place(self):
+        game = self.cache.get("-200")
+        game.thread_to(PostRef(-210, "uri_-210", "cid_-210"))
+
+        assert game.reply_ids() == {
+            "parent": {"uri": "uri_-210", "cid": "cid_-210"},
+            "root": {"uri": "uri_-200", "cid": "cid_-200"},
+        }
+        DB_SESSION.commit()
+        row = DB_SESSION.execute(
+            select(Game.last_post_id, Game.thread_parent_uri, Game.thread_root_uri).where(Game.id == "-200")
+        ).one()
+        assert tuple(row) == (-210, "uri_-210", "uri_-200")
+
+    def test_thread_looked_up_for_older_games(self):
+        game = self.cache.get("-204")
+
+        assert (game.parent, game.root) == (PostRef(-201, "uri_-201", "cid_-201"), PostRef(-200, "uri_-200", "cid_-200"))
+        DB_SESSION.commit()
+        assert DB_SESSION.execute(select(Game.thread_root_id).where(Game.id == "-204")).scalar() == -200
+
+    def test_missing_game(self):
+        assert self.cache.get("-203") is None
+
+    def test_changes_written_on_commit(self):
+        game = self.cache.get("-200")
+        game.update({"home_score": 7, "last_play_sequence": 12})
+        assert game.home_score == 7
+
+        DB_SESSION.commit()
+        assert game.changes == {}
+
+        row = DB_SESSION.execute(select(Game.home_score, Game.last_play_sequence).where(Game.id == "-200")).one()
+        assert tuple(row) == (7, 12)
+
+    def test_changes_dropped_on_rollback(self):
+        self.cache.get("-200").update({"home_score": 7})
+        DB_SESSION.rollback()
+
+        assert self.cache.games == {}
+        assert self.cache.get("-200").home_score == 0
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from db.models import Query, QueryRollup
+from db.retention import compact, percentile, rollup_queries, url_type
+
+
+class TestUrlType:
+    def test_url_type(self):
+        base = "https://site.api.espn.com/apis/site/v2/sports/football/college-football"
+
+        assert url_type(f"{base}/scoreboard?dates=20250927&groups=80") == "scoreboard"
+        assert url_type(f"{base}/summary?event=401628358") == "game"
+        assert url_type(f"{base}/teams/333") == "team"
+        assert url_type("https://example.com") == "other"
+
+
+class TestPercentile:
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) is None
+
+
+class TestRollupQueries:
+    @pytest.fixture(autouse=True)
+    def setup(self, database):
+        self.session = database
+        self.session.add_all(
+            [
+                Query(url="https://example.com/scoreboard?dates=1", status_code=200, date_ts=datetime(1800, 1, 1, 10, 5), latency_ms=10),
+                Query(url="https://example.com/scoreboard?dates=2", status_code=200, date_ts=datetime(1800, 1, 1, 10, 55), latency_ms=30),
+                Query(url="https://example.com/teams/1", status_code=404, date_ts=datetime(1800, 1, 1, 10, 30)),
+                Query(url="https://example.com/summary?event=1", status_code=200, date_ts=datetime(1800, 1, 1, 11, 30), latency_ms=5),
+            ]
+        )
+        self.session.commit()
+
+    def rollups(self) -> dict:
+        rows = self.session.execute(select(QueryRollup)).scalars()
+        return {(row.hour_ts.hour, row.url_type, row.status_code): row for row in rows}
+
+    def test_rollup(self):
+        assert rollup_queries(datetime(1800, 1, 1, 11, 45)) == 3
+
+        rollups = self.rollups()
+        assert set(rollups) == {(10, "scoreboard", 200), (10, "team", 404)}
+        assert rollups[(10, "scoreboard", 200)].count == 2
+        assert rollups[(10, "scoreboard", 200)].latency_p50_ms == 10
+        assert rollups[(10, "scoreboard", 200)].latency_p99_ms == 30
+        assert rollups[(10, "team", 404)].latency_p50_ms is None
+
+        # the current hour is kept raw
+        remaining = self.session.execute(select(Query)).scalars().all()
+        assert [query.url for query in remaining] == ["https://example.com/summary?event=1"]
+
+    def test_late_rows_are_added(self):
+        rollup_queries(datetime(1800, 1, 1, 11))
+        self.session.add_all(
+            [
+                Query(url="https://example.com/teams/1", status_code=404, date_ts=datetime(1800, 1, 1, 10, 59)),
+                Query(url="https://example.com/scoreboard?dates=3", status_code=200, date_ts=datetime(1800, 1, 1, 10, 59), latency_ms=40),
+            ]
+        )
+        self.session.commit()
+        rollup_queries(datetime(1800, 1, 1, 11))
+
+        rollups = self.rollups()
+        assert rollups[(10, "team", 404)].count == 2
+        assert rollups[(10, "team", 404)].latency_p50_ms is None
+        # 2 rows at a p50 of 10 and 1 at 40
+        assert rollups[(10, "scoreboard", 200)].count == 3
+        assert rollups[(10, "scoreboard", 200)].latency_p50_ms == 20
+
+    def test_rolled_up_in_batches(self):
+        self.session.add(Query(url="https://example.com/teams/1", status_code=200, date_ts=datetime(1800, 1, 3, 9), latency_ms=1))
+        self.session.commit()
+
+        assert rollup_queries(datetime(1800, 1, 4), batch=timedelta(hours=1)) == 5
+        assert set(self.rollups()) == {(10, "scoreboard", 200), (10, "team", 404), (11, "game", 200), (9, "team", 200)}
+
+    def test_nothing_to_roll_up(self):
+        assert rollup_queries(datetime(1700, 1, 1)) == 0
+
+
+class TestCompact:
+    def test_compact_uses_incremental_auto_vacuum(self, database):
+        compact()
+
+        with database.get_bind().connect() as connection:
+            assert connection.execute(text("PRAGMA auto_vacuum")).scalar() == 2
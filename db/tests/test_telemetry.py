@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from db import DB_SESSION
+from db.db_utils import unit_of_work, update_rows
+from db.models import Query
+from db.telemetry import _QueryBuffer
+
+
+def unique_url() -> str:
+    return f"https://example.com/{uuid.uuid4()}"
+
+
+def query_record(url: str) -> dict:
+    return {"url": url, "status_code": 200, "date_ts": datetime.now(), "cache_status": "miss", "latency_ms": 1.5}
+
+
+def count_queries(url: str) -> int:
+    return len(DB_SESSION.execute(select(Query).filter(Query.url == url)).all())
+
+
+class TestQueryBuffer:
+    def test_records_are_buffered(self):
+        url = unique_url()
+        buffer = _QueryBuffer(max_records=10, max_age=60)
+        buffer.record(query_record(url))
+
+        assert len(buffer) == 1
+        assert count_queries(url) == 0
+
+        buffer.flush()
+        assert len(buffer) == 0
+        assert count_queries(url) == 1
+
+    def test_flush_on_size(self):
+        url = unique_url()
+        buffer = _QueryBuffer(max_records=3, max_age=60)
+        for _ in range(3):
+            buffer.record(query_record(url))
+
+        assert len(buffer) == 0
+        assert count_queries(url) == 3
+
+    def test_flush_on_age(self):
+        url = unique_url()
+        buffer = _QueryBuffer(max_records=10, max_age=0)
+        buffer.record(query_record(url))
+
+        assert len(buffer) == 0
+        assert count_queries(url) == 1
+
+    def test_flush_empty(self):
+        _QueryBuffer().flush()
+
+    def test_flush_waits_for_unit_of_work(self):
+        url = unique_url()
+        buffer = _QueryBuffer(max_records=1, max_age=60)
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                update_rows("posts", {"post_text": "telemetry"}, {"id": -30})
+                buffer.record(query_record(url))
+                assert len(buffer) == 1
+                raise RuntimeError
+
+        buffer.flush()
+        assert count_queries(url) == 1
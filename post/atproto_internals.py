@@ -0,0 +1,82 @@
+"""Private parts of the atproto client the bluesky sink relies on, kept in
+one place. The public client can't reuse saved tokens without a profile
+lookup, refresh them on demand or hook its http responses.
+
+Written against atproto==0.0.55, pinned in requirements.txt. Upgrading it
+means checking these still exist, `check` fails loudly when one is missing
+and the tests call it.
+"""
+
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from atproto import Client
+
+# attribute paths used below, relative to a client instance
+INTERNALS = (
+    "request._client.event_hooks",
+    "_import_session_string",
+    "_access_jwt_payload",
+    "_refresh_lock",
+    "_refresh_and_set_session",
+)
+
+
+def check(client: "Client"):
+    """Make sure the client still has every internal used here.
+
+    Args:
+        client (Client): atproto client
+
+    Raises:
+        RuntimeError: if an internal is missing, naming it
+    """
+    for path in INTERNALS:
+        value = client
+        for name in path.split("."):
+            if not hasattr(value, name):
+                raise RuntimeError(f"atproto client has no {path}, post/atproto_internals.py needs updating")
+            value = getattr(value, name)
+
+
+def add_response_hook(client: "Client", hook: Callable):
+    """Call a function with every http response the client gets.
+
+    Args:
+        client (Client): atproto client
+        hook (Callable): httpx response hook
+    """
+    client.request._client.event_hooks["response"].append(hook)
+
+
+def import_session(client: "Client", session_string: str):
+    """Use a saved session without a round trip to the server.
+
+    Args:
+        client (Client): atproto client
+        session_string (str): session exported by the client
+    """
+    client._import_session_string(session_string)
+
+
+def access_expires_at(client: "Client") -> float:
+    """Get when the client's access token expires.
+
+    Args:
+        client (Client): atproto client with a session
+
+    Returns:
+        float: unix time the access token expires at
+    """
+    return client._access_jwt_payload.exp
+
+
+def refresh(client: "Client"):
+    """Get a new access token from the refresh token, holding the lock the
+    client refreshes under itself.
+
+    Args:
+        client (Client): atproto client with a session
+    """
+    with client._refresh_lock:
+        client._refresh_and_set_session()
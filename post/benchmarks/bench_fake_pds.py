@@ -0,0 +1,84 @@
+"""Benchmark the outbox against a local fake PDS with increasing server error
+rates: how many passes and writes it takes to publish a slate of posts, and
+that none is published twice. The bluesky client is the real one, logged in
+to the fake. Backoff is disabled so failed posts are retried on the next pass.
+
+Run from the repository root with `python -m post.benchmarks.bench_fake_pds`.
+"""
+
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+import db
+from db.models import Credentials
+from post.bluesky import _BlueSky
+from post.fake_pds import FakePDS
+from post.outbox import _Outbox
+from post.rate_limit import PostBudget
+
+USERNAME = "bench.test"
+GAMES = 30
+POSTS_PER_GAME = 5
+ERROR_RATES = (0, 0.1, 0.3)
+LATENCY = timedelta(milliseconds=30)
+
+
+def log_in(pds: FakePDS) -> _BlueSky:
+    """Log in to the fake and save the session, so the client never prompts
+    for a password."""
+    from atproto import Client
+
+    client = Client(pds.url)
+    client.login(USERNAME, "password")
+    session = db.get_session()
+    session.merge(Credentials(username=USERNAME, password="password", session=client.export_session_string()))
+    session.commit()
+
+    return _BlueSky(USERNAME, base_url=pds.url)
+
+
+def run(error_rate: float) -> dict:
+    """Queue a slate of posts and publish them until every one is sent."""
+    with FakePDS(latency=LATENCY, error_rate=error_rate, seed=0) as pds:
+        outbox = _Outbox(max_backoff=timedelta(0), max_attempts=100, sink=log_in(pds))
+        for game in range(GAMES):
+            for post in range(POSTS_PER_GAME):
+                outbox.enqueue(f"game {game} post {post}", "game_header")
+
+        PostBudget.tokens = PostBudget.limit
+        passes = sent = 0
+        start = time.perf_counter()
+        while sent < GAMES * POSTS_PER_GAME:
+            sent += outbox.drain()
+            passes += 1
+
+        return {
+            "seconds": time.perf_counter() - start,
+            "passes": passes,
+            "writes": pds.calls["com.atproto.repo.applyWrites"],
+            "lookups": pds.calls["com.atproto.repo.getRecord"],
+            "errors": pds.failures[500],
+            "published": len(pds.records),
+        }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db.init_db(f"sqlite:///{os.path.join(directory, 'fake_pds.db')}")
+
+        print(f"{GAMES * POSTS_PER_GAME} posts, {LATENCY.total_seconds() * 1000:.0f}ms per request")
+        print(f"{'error rate':>10}{'seconds':>9}{'passes':>8}{'writes':>8}{'lookups':>9}{'errors':>8}{'published':>11}")
+        for error_rate in ERROR_RATES:
+            stats = run(error_rate)
+            print(
+                f"{error_rate:>10.1f}{stats['seconds']:>9.2f}{stats['passes']:>8}{stats['writes']:>8}"
+                f"{stats['lookups']:>9}{stats['errors']:>8}{stats['published']:>11}"
+            )
+
+        db.get_session().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Benchmark the time it takes to import the bot's modules in a fresh
+interpreter, and check that importing them doesn't connect to the database or
+import atproto. The cost of connecting eagerly is shown for comparison.
+
+Run from the repository root with `python -m post.benchmarks.bench_imports`.
+"""
+
+import subprocess
+import sys
+
+MODULES = ("post.format_posts", "post.bluesky_utils", "post.post_important_plays", "post_about_cfb")
+EAGER = "import atproto, db; db.init_db()"
+PROBE = "import sys, db; print(db._DB_SESSION is not None, 'atproto' in sys.modules)"
+
+
+def import_ms(statement: str, number: int) -> float:
+    """Fastest wall time of running a statement in a fresh interpreter, in
+    milliseconds."""
+    timer = "import time; start = time.perf_counter(); {}; print((time.perf_counter() - start) * 1000)"
+    return min(
+        float(subprocess.run([sys.executable, "-c", timer.format(statement)], capture_output=True, check=True, text=True).stdout)
+        for _ in range(number)
+    )
+
+
+def main(number: int = 5):
+    print(f"{'module':<28}{'import ms':>10}{'db':>6}{'atproto':>9}")
+    for module in MODULES:
+        probe = subprocess.run([sys.executable, "-c", f"import {module}; {PROBE}"], capture_output=True, check=True, text=True)
+        connected, atproto = probe.stdout.split()
+        print(f"{module:<28}{import_ms(f'import {module}', number):>10.1f}{connected:>6}{atproto:>9}")
+
+    print(f"{'eager db and atproto':<28}{import_ms(EAGER, number):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
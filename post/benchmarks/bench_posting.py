@@ -0,0 +1,122 @@
+"""Benchmark the posting pipeline offline: queue a busy Saturday's headers
+and scoring plays through `post_scoring_plays`, then time the outbox
+publishing them to an in-memory sink with the latency of a real write, one
+post per write and batched. The write budget is refilled between runs, so no
+posts are merged.
+
+Run from the repository root with `python -m post.benchmarks.bench_posting`.
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import db
+from data.records import ScoringPlay
+from db.db_utils import unit_of_work
+from db.game_state import GameStates
+from db.models import Game
+from post.bluesky_utils import queue_post
+from post.outbox import _Outbox
+from post.post_important_plays import post_scoring_plays
+from post.rate_limit import PostBudget
+from post.sinks import MemorySink
+
+GAMES = 60
+PLAYS = 4
+LATENCIES = (timedelta(0), timedelta(milliseconds=50))
+BATCHES = (1, 10)
+
+
+def add_games(prefix: str) -> list[str]:
+    """Add games that haven't started yet, returning their ids."""
+    game_ids = [f"{prefix}{i}" for i in range(GAMES)]
+    session = db.get_session()
+    session.add_all(
+        Game(
+            id=game_id,
+            start_ts=datetime(2025, 10, 4, 19),
+            home_team="Home",
+            away_team="Away",
+            home_team_id="1",
+            away_team_id="2",
+            home_wins=0,
+            home_losses=0,
+            home_conf_wins=0,
+            home_conf_losses=0,
+            away_wins=0,
+            away_losses=0,
+            away_conf_wins=0,
+            away_conf_losses=0,
+            home_score=0,
+            away_score=0,
+            networks="ESPN",
+            trackable=True,
+        )
+        for game_id in game_ids
+    )
+    session.commit()
+
+    return game_ids
+
+
+def scoring_plays(game_id: str) -> list[ScoringPlay]:
+    """Touchdowns with extra points, alternating between the teams."""
+    plays = []
+    for sequence in range(PLAYS):
+        home = sequence % 2 == 0
+        home_score, away_score = 7 * ((sequence + 2) // 2), 7 * ((sequence + 1) // 2)
+        play_text = f"Player {sequence} 5 Yd Run (Kicker {sequence} KICK)"
+        plays.append(
+            ScoringPlay(game_id, f"{game_id}-{sequence}", sequence, play_text, away_score, home_score, "1" if home else "2", True)
+        )
+
+    return plays
+
+
+def publish(outbox: _Outbox) -> tuple[int, float]:
+    """Publish everything queued, returning the number of posts and seconds taken."""
+    PostBudget.tokens = PostBudget.limit
+    start = time.perf_counter()
+    sent = outbox.drain()
+
+    return sent, time.perf_counter() - start
+
+
+def run(prefix: str, latency: timedelta, batch: int) -> tuple[int, float]:
+    """Queue and publish a slate of games' headers and scoring plays."""
+    outbox = _Outbox(max_batch=batch, sink=MemorySink(latency=latency))
+    game_ids = add_games(prefix)
+
+    with unit_of_work():
+        for game_id in game_ids:
+            queue_post(f"Away @ Home {game_id} has kicked off on ESPN!", "game_header", game_id)
+    headers, header_seconds = publish(outbox)
+
+    GameStates.clear()
+    with unit_of_work():
+        GameStates.load(game_ids)
+        for game_id in game_ids:
+            post_scoring_plays(scoring_plays(game_id))
+    replies, reply_seconds = publish(outbox)
+
+    return headers + replies, header_seconds + reply_seconds
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db.init_db(f"sqlite:///{os.path.join(directory, 'posting.db')}")
+
+        print(f"{GAMES} games, {PLAYS} scoring plays each")
+        print(f"{'latency ms':>10}{'batch':>7}{'posts':>7}{'seconds':>9}{'posts/s':>9}")
+        for latency in LATENCIES:
+            for batch in BATCHES:
+                posts, seconds = run(f"bench-{latency.microseconds}-{batch}-", latency, batch)
+                print(f"{latency.total_seconds() * 1000:>10.0f}{batch:>7}{posts:>7}{seconds:>9.2f}{posts / seconds:>9.0f}")
+
+        db.get_session().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,52 @@
 import getpass
-
-from atproto import Client
-from atproto.exceptions import AtProtocolError, NetworkError
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
 from db.db_utils import get_values, insert_rows, update_rows
-from post import BSKY_USERNAME
+from post import BSKY_USERNAME, atproto_internals
+from post.rate_limit import PostBudget
+from post.sinks import POST_COLLECTION, PostRecord, PostSink
+
+if TYPE_CHECKING:
+    from atproto import Client, Session, SessionEvent
 
 
-class _BlueSky:
-    def __init__(self, username: str) -> None:
+class _BlueSky(PostSink):
+    def __init__(
+        self,
+        username: str,
+        refresh_margin: timedelta | None = timedelta(minutes=20),
+        base_url: str | None = None,
+    ) -> None:
+        """Configure the client, nothing is connected until it is used.
+
+        Args:
+            username (str): bluesky login
+            refresh_margin (timedelta): how long before the access token expires it is refreshed
+            base_url (optional, str): url of the PDS to log in to, defaults to bsky.social
+        """
         self.username = username
-        self.client = Client()
-        self._init_client()
+        self.refresh_margin = refresh_margin
+        self.base_url = base_url
+        self.did: str | None = None
+        self._client: "Client | None" = None
+        self._pending_session: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> "Client":
+        """atproto client, connected on first use."""
+        if self._client is None:
+            self._init_client()
+
+        return self._client
 
     def _get_session(
         self,
-        client: Client,
+        client: "Client",
         refresh_session: bool | None = False,
     ) -> str:
         """Get session text files if they exist, otherwise prompt for username
@@ -47,38 +78,186 @@ class _BlueSky:
             )
 
         elif refresh_session:
+            # the new session is saved by the session change callback
             client.login(credentials.username, credentials.password)
             session_string = client.export_session_string()
-            update_rows(
-                "credentials",
-                {
-                    "username": credentials.username,
-                    "password": credentials.password,
-                    "session": session_string,
-                },
-                {"username": credentials.username},
-            )
 
         return session_string
 
+    def _create_client(self) -> "Client":
+        """Create an atproto client that saves every new session and keeps
+        the write budget in line with the server's rate-limit headers."""
+        # atproto is slow to import, so it's only imported once a post is made
+        from atproto import Client
+
+        client = Client(self.base_url)
+        atproto_internals.check(client)
+        client.on_session_change(self._on_session_change)
+        atproto_internals.add_response_hook(client, PostBudget.track)
+
+        return client
+
     def _init_client(self):
-        """Connect to bluesky using saved credentials."""
-        session_string = self._get_session(self.client)
+        """Connect to bluesky using saved credentials. The saved tokens are
+        reused without a login round trip, and only refreshed when they are
+        about to expire."""
+        from atproto.exceptions import AtProtocolError, NetworkError
+
+        client = self._create_client()
+        session_string = self._get_session(client)
 
         # handle session string expiry and network issues
         try:
-            self.client.login(session_string=session_string)
+            atproto_internals.import_session(client, session_string)
+            if self._refresh_in(client) <= 0:
+                self._refresh(client)
         except (AtProtocolError, NetworkError):
-            self.client = Client()
-            session_string = self._get_session(self.client, refresh_session=True)
-            self.client.login(session_string=session_string)
+            logging.warning("Saved bluesky session can't be refreshed, logging in with the saved password")
+            client = self._create_client()
+            session_string = self._get_session(client, refresh_session=True)
 
-    def create_post(
-        self,
-        post_params,
-    ) -> object:
-        """Create a post that is either new or a reply to an existing post."""
-        return self.client.send_post(**post_params)
+        self._client = client
+        self.save_session()
+
+    def _on_session_change(self, event: "SessionEvent", session: "Session"):
+        """Keep track of the account and save new sessions. Sessions changed
+        outside the main thread are saved on the next call to `save_session`,
+        the database session is only used from the main thread.
+
+        Args:
+            event (SessionEvent): how the session changed
+            session (Session): new session
+        """
+        from atproto import SessionEvent
+
+        self.did = session.did
+        if event == SessionEvent.IMPORT:
+            return
+
+        with self._lock:
+            self._pending_session = session.export()
+        if threading.current_thread() is threading.main_thread():
+            self.save_session()
+
+    def save_session(self):
+        """Save the latest session string to the credentials table, if it
+        changed since it was last saved."""
+        with self._lock:
+            session_string, self._pending_session = self._pending_session, None
+
+        if session_string is not None:
+            update_rows("credentials", {"session": session_string}, {"username": self.username}, durable=True)
+
+    def _refresh_in(self, client: "Client") -> float:
+        """Get the number of seconds until the client's access token should be
+        refreshed.
+
+        Args:
+            client (Client): atproto client with a session
+
+        Returns:
+            float: seconds until the refresh is due, negative if it's overdue
+        """
+        return atproto_internals.access_expires_at(client) - self.refresh_margin.total_seconds() - time.time()
+
+    def _refresh(self, client: "Client"):
+        """Get a new access token from the refresh token.
+
+        Args:
+            client (Client): atproto client with a session
+        """
+        atproto_internals.refresh(client)
+
+    def refresh_session(self, stop_event: threading.Event, retry_interval: timedelta | None = timedelta(minutes=1)):
+        """Refresh the session shortly before the access token expires until
+        stopped. Meant to run on a background thread, see
+        `start_session_refresh`.
+
+        Args:
+            stop_event (threading.Event): event that stops refreshing when set
+            retry_interval (timedelta): wait after a failed refresh, or while the client isn't connected
+        """
+        from atproto.exceptions import AtProtocolError, NetworkError
+
+        while not stop_event.is_set():
+            client = self._client
+            wait = retry_interval.total_seconds() if client is None else max(self._refresh_in(client), 0)
+            if stop_event.wait(wait) or client is None:
+                continue
+
+            try:
+                self._refresh(client)
+            except (AtProtocolError, NetworkError) as error:
+                logging.warning(f"Refreshing the bluesky session failed: {error}")
+                stop_event.wait(retry_interval.total_seconds())
+
+    def start_session_refresh(self, stop_event: threading.Event) -> threading.Thread:
+        """Refresh the session on a background thread until stopped.
+
+        Args:
+            stop_event (threading.Event): event that stops refreshing when set
+
+        Returns:
+            threading.Thread: refreshing thread
+        """
+        thread = threading.Thread(target=self.refresh_session, args=(stop_event,), name="bluesky-session", daemon=True)
+        thread.start()
+
+        return thread
+
+    def connect(self):
+        """Connect to bluesky, so posts are built for the account."""
+        self.client
+
+    def publish_posts(self, posts: list[PostRecord]) -> list[tuple[str, str]]:
+        """Publish built posts in a single write to the account's repo, either
+        all of them are created or none are.
+
+        Args:
+            posts (list[PostRecord]): posts in the order they are created
+
+        Returns:
+            list[tuple[str, str]]: uri and cid of each post
+        """
+        from atproto import models
+
+        writes = [
+            models.ComAtprotoRepoApplyWrites.Create(collection=POST_COLLECTION, rkey=post.rkey, value=post.value)
+            for post in posts
+        ]
+        response = self.client.com.atproto.repo.apply_writes(
+            models.ComAtprotoRepoApplyWrites.Data(repo=self.did, writes=writes)
+        )
+
+        # older servers don't return results, the posts are where they were built for
+        if not response.results:
+            return [(post.uri, post.cid) for post in posts]
+
+        published = [(result.uri, result.cid) for result in response.results]
+        for post, (uri, cid) in zip(posts, published):
+            if (uri, cid) != (post.uri, post.cid):
+                logging.error(f"Post {uri} was published as {cid}, replies to it were built for {post.cid}")
+
+        return published
+
+    def get_post(self, rkey: str) -> tuple[str, str] | None:
+        """Look up a post of the account by record key.
+
+        Args:
+            rkey (str): record key of the post
+
+        Returns:
+            tuple[str, str] | None: uri and cid of the post, None if there is no such post
+        """
+        from atproto.exceptions import BadRequestError
+
+        client = self.client
+        try:
+            post = client.app.bsky.feed.post.get(self.did, rkey)
+        except BadRequestError:
+            return None
+
+        return post.uri, post.cid
 
 
 Bluesky = _BlueSky(username=BSKY_USERNAME)
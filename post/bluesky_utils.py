@@ -1,65 +1,29 @@
-from datetime import datetime, timezone
+from post.outbox import Outbox
 
-from db.db_utils import add_record, get_previous_posts
-from post.bluesky import Bluesky
-from post.get_reply_ids import get_reply_ids
 
-
-def get_post_params(
+def queue_post(
     post_text,
     post_type,
-    last_post_id: int | None = None,
-) -> dict:
-    """Create a post that is either new or a reply to an existing post.
+    game_id: str | None = None,
+    summary: str | None = None,
+) -> int:
+    """Queue a post that is either new or a reply to a game's header post. The
+    outbox sender publishes it, replies are threaded to the game's latest post.
 
     Args:
         post_text (str): post text
         post_type (str): type of post, either 'game_header' or 'game_update'
-        last_post_id (optional, int): ID of the last post for replies
+        game_id (optional, str): id of the game the post is about, required for replies
+        summary (optional, str): short version of a reply, for merging it with other replies when posting falls behind
+
+    Returns:
+        int: id of the post in the outbox table
     """
     assert post_type in ("game_header", "game_update"), (
         "Invalid post type. Valid post taypes are 'game_header' and 'game_update'."
     )
-    assert last_post_id is not None if post_type == "game_update" else True, (
-        "last_post_id must be an integer or None."
-    )
-
-    post_params = {"text": post_text}
-    bsky_ids = None
-    if post_type == "game_update":
-        previous_post = get_previous_posts(last_post_id)
-        bsky_ids = get_reply_ids(previous_post)
-        post_params["reply_to"] = bsky_ids
-
-    return post_params
-
-
-def create_post(
-    post_text,
-    post_type,
-    last_post_id: int | None = None,
-) -> object:
-    """Create a post that is either new or a reply to an existing post.
-
-    Args:
-        post_text (str): post text
-        reply_ids (optional, dict): reply parameters of the parent and root posts
-    """
-    post_params = get_post_params(post_text, post_type, last_post_id)
-    post = Bluesky.create_post(post_params)
-
-    add_record(
-        "posts",
-        {
-            "uri": post.uri,
-            "cid": post.cid,
-            "post_text": post_text,
-            "created_at_ts": datetime.now(timezone.utc),
-            "updated_at_ts": datetime.now(timezone.utc),
-            "post_type": post_type,
-            "root_id": post_params.get("root_id", None),
-            "parent_id": post_params.get("parent_id", None),
-        },
+    assert game_id is not None if post_type == "game_update" else True, (
+        "game_id must be provided for replies."
     )
 
-    return post
+    return Outbox.enqueue(post_text, post_type, game_id, summary)
@@ -0,0 +1,340 @@
+"""Local stand-in for a bluesky PDS, implementing the XRPC endpoints the bot
+uses, and the profile lookup atproto makes after logging in, with injectable
+latency, rate limiting and server errors. Point the bot at it with `--pds`,
+e.g. for measuring the outbox's retries without posting.
+
+Run with `python -m post.fake_pds --port 2583 --error-rate 0.1`.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from post.rate_limit import POST_COST
+from post.sinks import fake_did, record_cid
+
+WRITE_METHODS = ("com.atproto.repo.createRecord", "com.atproto.repo.applyWrites")
+
+
+def make_jwt(did: str, scope: str, expires_in: timedelta) -> str:
+    """Make an unsigned token the atproto client can read the expiry of.
+
+    Args:
+        did (str): account the token is for
+        scope (str): 'com.atproto.access' or 'com.atproto.refresh'
+        expires_in (timedelta): time until the token expires
+
+    Returns:
+        str: token
+    """
+
+    def encode(value: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+    now = time.time()
+    payload = {"scope": scope, "sub": did, "iat": int(now), "exp": int(now + expires_in.total_seconds()), "jti": f"{now:.6f}"}
+    return f"{encode({'typ': 'at+jwt', 'alg': 'HS256'})}.{encode(payload)}.ZmFrZQ"
+
+
+class XrpcError(Exception):
+    """Error response of an XRPC endpoint."""
+
+    def __init__(self, status: int, error: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+class FakePDS:
+    """In-memory PDS served over HTTP on a background thread. Writes are
+    charged against a fixed-window budget reported in rate-limit headers like
+    the real one, and can be made slow or fail."""
+
+    def __init__(
+        self,
+        port: int | None = 0,
+        latency: timedelta | None = timedelta(0),
+        error_rate: float | None = 0,
+        rate_limit_rate: float | None = 0,
+        write_limit: int | None = 5000,
+        write_window: timedelta | None = timedelta(hours=1),
+        access_ttl: timedelta | None = timedelta(hours=2),
+        seed: int | None = None,
+    ) -> None:
+        """Configure the server, nothing is served until it is started.
+
+        Args:
+            port (int): port to listen on, 0 picks a free one
+            latency (timedelta): time each request takes
+            error_rate (float): share of writes that fail with a 500
+            rate_limit_rate (float): share of writes rejected with a 429 regardless of the budget
+            write_limit (int): points the account can spend on writes per window
+            write_window (timedelta): window the write limit is enforced over
+            access_ttl (timedelta): time until access tokens expire
+            seed (int): seed of the random failures
+        """
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.write_limit = write_limit
+        self.write_window = write_window
+        self.access_ttl = access_ttl
+        self.records: dict[tuple[str, str, str], tuple[str, dict]] = {}
+        self.calls = Counter()
+        self.failures = Counter()
+        self._random = random.Random(seed)
+        self._scripted: deque[tuple[int, bool]] = deque()
+        self._tokens: dict[str, tuple[str, str, str]] = {}
+        self._window_start = time.time()
+        self._points_used = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        """Base url of the server, for the atproto client."""
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakePDS":
+        """Serve on a background thread until stopped.
+
+        Returns:
+            FakePDS: the started server
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _XrpcHandler)
+        self._server.daemon_threads = True
+        self._server.pds = self
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-pds", daemon=True).start()
+
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakePDS":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, status: int, count: int | None = 1, applied: bool | None = False):
+        """Make the next writes fail, before any random failure.
+
+        Args:
+            status (int): status code the writes fail with, e.g. 429 or 503
+            count (int): number of writes that fail
+            applied (bool): if the writes are applied before failing, like a response lost on its way back
+        """
+        with self._lock:
+            self._scripted.extend([(status, applied)] * count)
+
+    def handle(self, method: str, params: dict, body: dict | None, token: str | None) -> tuple[int, dict, dict]:
+        """Handle an XRPC request.
+
+        Args:
+            method (str): NSID of the endpoint
+            params (dict): query parameters
+            body (dict | None): JSON body of procedures
+            token (str | None): bearer token of the request
+
+        Returns:
+            tuple[int, dict, dict]: status code, response body and extra headers
+        """
+        time.sleep(self.latency.total_seconds())
+        with self._lock:
+            self.calls[method] += 1
+
+        handlers = {
+            "com.atproto.server.createSession": self._create_session,
+            "com.atproto.server.refreshSession": self._refresh_session,
+            "com.atproto.repo.createRecord": self._create_record,
+            "com.atproto.repo.applyWrites": self._apply_writes,
+            "com.atproto.repo.getRecord": self._get_record,
+            "app.bsky.actor.getProfile": self._get_profile,
+        }
+        headers = {}
+        try:
+            if method not in handlers:
+                raise XrpcError(501, "MethodNotImplemented", f"{method} is not implemented")
+            if method in WRITE_METHODS:
+                return 200, self._write(method, handlers[method], body, token, headers), headers
+            return 200, handlers[method](body, params, token), headers
+        except XrpcError as error:
+            with self._lock:
+                self.failures[error.status] += 1
+            return error.status, {"error": error.error, "message": str(error)}, headers
+
+    def _issue_session(self, handle: str, did: str) -> dict:
+        """Issue new tokens for an account."""
+        access = make_jwt(did, "com.atproto.access", self.access_ttl)
+        refresh = make_jwt(did, "com.atproto.refresh", timedelta(days=90))
+        with self._lock:
+            self._tokens[access] = ("access", handle, did)
+            self._tokens[refresh] = ("refresh", handle, did)
+
+        return {"accessJwt": access, "refreshJwt": refresh, "handle": handle, "did": did, "active": True}
+
+    def _account(self, token: str | None, scope: str) -> tuple[str, str]:
+        """Get the handle and did a token was issued for."""
+        issued = self._tokens.get(token)
+        if issued is None or issued[0] != scope:
+            raise XrpcError(401 if scope == "access" else 400, "InvalidToken", "Token could not be verified")
+
+        return issued[1:]
+
+    def _create_session(self, body: dict, params: dict, token: str | None) -> dict:
+        handle = body["identifier"]
+        return self._issue_session(handle, fake_did(handle))
+
+    def _refresh_session(self, body: dict, params: dict, token: str | None) -> dict:
+        handle, did = self._account(token, "refresh")
+        with self._lock:
+            del self._tokens[token]
+
+        return self._issue_session(handle, did)
+
+    def _write(self, method: str, handler, body: dict, token: str | None, headers: dict) -> dict:
+        """Charge a write against the budget, fail it if it's meant to fail,
+        and apply it."""
+        self._account(token, "access")
+        creates = len(body["writes"]) if method == "com.atproto.repo.applyWrites" else 1
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.write_window.total_seconds():
+                self._window_start, self._points_used = now, 0
+            scripted = self._scripted.popleft() if self._scripted else None
+            over_budget = self._points_used + creates * POST_COST > self.write_limit
+            if not over_budget and (scripted is None or scripted[1]):
+                self._points_used += creates * POST_COST
+            reset = math.ceil(self._window_start + self.write_window.total_seconds())
+            headers.update(
+                {
+                    "ratelimit-limit": str(self.write_limit),
+                    "ratelimit-remaining": str(max(self.write_limit - self._points_used, 0)),
+                    "ratelimit-reset": str(reset),
+                    "ratelimit-policy": f"{self.write_limit};w={int(self.write_window.total_seconds())}",
+                }
+            )
+
+        if over_budget or (scripted is None and self._random.random() < self.rate_limit_rate):
+            raise XrpcError(429, "RateLimitExceeded", "Rate Limit Exceeded")
+        if scripted is not None:
+            status, applied = scripted
+            if applied:
+                handler(body)
+            raise XrpcError(status, "RateLimitExceeded" if status == 429 else "InternalServerError", "Injected failure")
+        if self._random.random() < self.error_rate:
+            raise XrpcError(500, "InternalServerError", "Injected failure")
+
+        return handler(body)
+
+    def _put(self, repo: str, collection: str, rkey: str | None, value: dict) -> tuple[str, str]:
+        """Store a record, the lock must be held."""
+        rkey = rkey or f"{time.time_ns() // 1000:x}"
+        if (repo, collection, rkey) in self.records:
+            raise XrpcError(400, "InvalidRequest", f"Record already exists: {collection}/{rkey}")
+
+        cid = record_cid(value)
+        self.records[(repo, collection, rkey)] = (cid, value)
+        return f"at://{repo}/{collection}/{rkey}", cid
+
+    def _create_record(self, body: dict) -> dict:
+        with self._lock:
+            uri, cid = self._put(body["repo"], body["collection"], body.get("rkey"), body["record"])
+
+        return {"uri": uri, "cid": cid, "validationStatus": "valid"}
+
+    def _apply_writes(self, body: dict) -> dict:
+        writes = body["writes"]
+        for write in writes:
+            if write.get("$type") != "com.atproto.repo.applyWrites#create":
+                raise XrpcError(400, "InvalidRequest", f"Unsupported write {write.get('$type')}")
+
+        results = []
+        with self._lock:
+            existing = [write["rkey"] for write in writes if (body["repo"], write["collection"], write.get("rkey")) in self.records]
+            if existing:
+                raise XrpcError(400, "InvalidRequest", f"Records already exist: {existing}")
+            for write in writes:
+                uri, cid = self._put(body["repo"], write["collection"], write.get("rkey"), write["value"])
+                results.append({"$type": "com.atproto.repo.applyWrites#createResult", "uri": uri, "cid": cid, "validationStatus": "valid"})
+
+        return {"commit": {"cid": record_cid({"results": results}), "rev": f"{time.time_ns() // 1000:x}"}, "results": results}
+
+    def _get_record(self, body: dict | None, params: dict, token: str | None) -> dict:
+        key = (params["repo"], params["collection"], params["rkey"])
+        if key not in self.records:
+            raise XrpcError(400, "RecordNotFound", f"Could not locate record: at://{'/'.join(key)}")
+
+        cid, value = self.records[key]
+        return {"uri": f"at://{'/'.join(key)}", "cid": cid, "value": value}
+
+    def _get_profile(self, body: dict | None, params: dict, token: str | None) -> dict:
+        # the client looks up its own profile after logging in
+        handle, did = self._account(token, "access")
+        return {"did": did, "handle": handle}
+
+
+class _XrpcHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the server's FakePDS."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        url = urlparse(self.path)
+        method = url.path.removeprefix("/xrpc/")
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("content-length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        token = self.headers.get("authorization", "").removeprefix("Bearer ") or None
+
+        status, response, headers = self.server.pds.handle(method, params, body, token)
+        content = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format: str, *args):
+        logging.debug(f"fake pds: {format % args}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for a bluesky PDS.")
+    parser.add_argument("--port", type=int, default=2583, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0, help="seconds each request takes")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of writes that fail with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="share of writes rejected with a 429")
+    parser.add_argument("--write-limit", type=int, default=5000, help="write points per hour")
+    args = parser.parse_args()
+
+    pds = FakePDS(
+        port=args.port,
+        latency=timedelta(seconds=args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        write_limit=args.write_limit,
+    ).start()
+    print(f"Fake PDS listening on {pds.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pds.stop()
@@ -1,21 +1,31 @@
+from data.records import ScoringPlay
+
+from db.game_state import GameState
 from db.models import Game
 
+# kind of score by the points it adds
+SCORE_KINDS = {1: "PAT", 2: "safety", 3: "FG", 6: "TD", 7: "TD + PAT", 8: "TD + 2PT"}
+MAX_POST_LENGTH = 300
+
 
 # TODO: add tests
-def game_header(game: Game, streak_info: dict[str, str]) -> str:
+def game_header(game: Game, streak_info: dict[str, str | None]) -> str:
     """Format information into posting format.
 
     Args:
         game (Game): game information from the game database
-        streak_info (dict[str, str]): dictionary of the streak information for the home and away teams
+        streak_info (dict[str, str | None]): dictionary of the streak information for the home and away teams,
+            None for teams whose streak isn't known
 
     Returns:
         string: post text
     """
+    away_streak = f" {streak_info[game.away_team_id]}" if streak_info.get(game.away_team_id) else ""
+    home_streak = f" {streak_info[game.home_team_id]}" if streak_info.get(game.home_team_id) else ""
     away_team = f"{game.away_team} ({game.away_wins}-{game.away_losses}, "
-    away_team_conference = f"{(game.away_conf_wins)}-{game.away_conf_losses}) {streak_info[game.away_team_id]} @ "
+    away_team_conference = f"{(game.away_conf_wins)}-{game.away_conf_losses}){away_streak} @ "
     home_team = f"{game.home_team} ({game.home_wins}-{game.home_losses}, "
-    home_team_conference = f"{game.home_conf_wins}-{game.home_conf_losses}) {streak_info[game.home_team_id]}"
+    home_team_conference = f"{game.home_conf_wins}-{game.home_conf_losses}){home_streak}"
     return (
         away_team
         + away_team_conference
@@ -26,20 +36,59 @@ def game_header(game: Game, streak_info: dict[str, str]) -> str:
 
 
 # TODO: add tests
-def scoring_play(drive: dict[str, str]) -> str:
-    """Format the scoring play for a drive.
+def scoring_play(play: ScoringPlay, game: Game | GameState) -> str:
+    """Format a scoring play.
 
     Args:
-        drive (dict): dictionary containing drive information
+        play (ScoringPlay): scoring play parsed from ESPN
+        game (Game | GameState): game information from the game database or the game state cache
 
     Returns:
         string: scoring play formatted for posting
     """
-    play_text = f"""{drive["scoring_team"]} scores! {drive["play_text"].strip()}"""
+    scoring_team = game.home_team if game.home_team_id == play.scoring_team else game.away_team
+    play_text = f"""{scoring_team} scores! {play.play_text.strip()}"""
     drive_text = (
-        f""" after a drive of {drive["drive_description"]} minutes.\n"""
-        if drive["drive_description"]
+        f""" after a drive of {play.drive_description} minutes.\n"""
+        if play.drive_description
         else ".\n"
     )
-    score_text = f"""{drive["away"]} {drive["away_score"]} - {drive["home"]} {drive["home_score"]}"""
+    score_text = f"""{game.away_team} {play.away_score} - {game.home_team} {play.home_score}"""
     return play_text + drive_text + score_text
+
+
+def scoring_summary(play: ScoringPlay, game: Game | GameState) -> str:
+    """Summarize a scoring play for a post covering several plays. Must be
+    called before the game's score is updated with the play.
+
+    Args:
+        play (ScoringPlay): scoring play parsed from ESPN
+        game (Game | GameState): game information from before the play
+
+    Returns:
+        string: scoring team and kind of score, e.g. 'Alabama TD + PAT'
+    """
+    if game.home_team_id == play.scoring_team:
+        scoring_team, points = game.home_team, play.home_score - game.home_score
+    else:
+        scoring_team, points = game.away_team, play.away_score - game.away_score
+
+    kind = SCORE_KINDS.get(points, f"{points} points")
+    if points == 2 and "Two-Point" in play.play_text:
+        kind = "2PT"
+    return f"{scoring_team} {kind}"
+
+
+def coalesced_plays(summaries: list[str], last_post_text: str) -> str | None:
+    """Format several scoring plays as a single post.
+
+    Args:
+        summaries (list[str]): summary of each play, see `scoring_summary`
+        last_post_text (str): post text of the last play, its score line is the game's score
+
+    Returns:
+        string | None: post text, None if it doesn't fit in a post
+    """
+    score_text = last_post_text.rsplit("\n", 1)[-1]
+    post_text = f"{', '.join(summaries)}, now {score_text}"
+    return post_text if len(post_text) <= MAX_POST_LENGTH else None
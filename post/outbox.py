@@ -0,0 +1,448 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import takewhile
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db import get_session
+from db.db_utils import add_record
+from db.game_state import PostRef, _GameStateCache
+from db.models import OutboxPost, Post
+from post.bluesky import Bluesky
+from post.format_posts import coalesced_plays
+from post.rate_limit import PostBudget
+from post.sinks import PostSink
+
+TID_ALPHABET = "234567abcdefghijklmnopqrstuvwxyz"
+_CLOCK_ID = random.getrandbits(10)
+
+
+def new_tid() -> str:
+    """Generate a timestamp identifier, the record key format bluesky uses for
+    posts. Identifiers sort in creation order.
+
+    Returns:
+        str: 13 character timestamp identifier
+    """
+    value = (time.time_ns() // 1000) << 10 | _CLOCK_ID
+    return "".join(TID_ALPHABET[(value >> shift) & 31] for shift in range(60, -1, -5))
+
+
+def utc_now() -> datetime:
+    """Current naive UTC time, the format timestamps are stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def status_code(error: Exception) -> int | None:
+    """Get the HTTP status code a write failed with, None if the request
+    didn't get a response."""
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def rejected(error: Exception) -> bool:
+    """Check if the server refused a write because of what was written, e.g.
+    a post over the length limit. Retrying it can't succeed. Expired
+    sessions, timeouts and rate limits are retried."""
+    code = status_code(error)
+    return code is not None and 400 <= code < 500 and code not in (401, 408, 429)
+
+
+class _Outbox:
+    """Posts queued in the outbox table and published by a sender, so polling
+    doesn't wait on bluesky. Each post gets its record key when it's queued,
+    so retrying a post that was published but not recorded doesn't publish it
+    twice. Posts about different games are published concurrently, posts
+    about the same game in the order they were queued, batched into a single
+    write when several are due."""
+
+    def __init__(
+        self,
+        poll_interval: timedelta | None = timedelta(seconds=2),
+        max_attempts: int | None = 8,
+        max_backoff: timedelta | None = timedelta(minutes=5),
+        max_concurrency: int | None = 6,
+        max_batch: int | None = 10,
+        sink: PostSink | None = Bluesky,
+    ) -> None:
+        """Configure the sender.
+
+        Args:
+            poll_interval (timedelta): how often the sender thread checks for queued posts
+            max_attempts (int): number of failed attempts after which a post is given up on
+            max_backoff (timedelta): longest wait before retrying a failed post
+            max_concurrency (int): number of games whose posts are published at the same time
+            max_batch (int): most posts of a game published in a single write
+            sink (PostSink): where posts are published
+        """
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.max_batch = max_batch
+        self.sink = sink
+        self._wake = threading.Event()
+
+    def enqueue(self, post_text: str, post_type: str, game_id: str | None = None, summary: str | None = None) -> int:
+        """Queue a post. It is written with the rest of the unit of work, and
+        published once that is committed.
+
+        Args:
+            post_text (str): post text
+            post_type (str): type of post, replies in a game's thread are 'game_update'
+            game_id (optional, str): id of the game the post is about
+            summary (optional, str): short version of a reply, for merging it with other replies
+
+        Returns:
+            int: id of the post in the outbox table
+        """
+        return add_record(
+            "outbox",
+            {
+                "rkey": new_tid(),
+                "game_id": game_id,
+                "post_type": post_type,
+                "post_text": post_text,
+                "summary": summary,
+                "status": "queued",
+                "attempts": 0,
+                "created_at_ts": utc_now(),
+            },
+        )
+
+    def wake(self):
+        """Make the sender thread check for queued posts right away."""
+        self._wake.set()
+
+    def send_queued(self) -> int:
+        """Publish every queued post that is due. Each game's posts are a lane
+        published in queue order, lanes are published concurrently. A post
+        that fails holds back the rest of its lane until it is sent. When
+        more posts are due than the write budget pays for, each game's
+        consecutive replies are merged into one post.
+
+        Returns:
+            int: number of posts published
+        """
+        statement = (
+            select(OutboxPost.id, OutboxPost.game_id, OutboxPost.next_attempt_ts)
+            .where(OutboxPost.status == "queued")
+            .order_by(OutboxPost.id)
+        )
+        with Session(get_session().get_bind()) as session:
+            queued = session.execute(statement).all()
+        if not queued:
+            return 0
+
+        # posts that aren't about a game are independent of each other
+        lanes = defaultdict(list)
+        for outbox_id, game_id, next_attempt_ts in queued:
+            lanes[game_id if game_id is not None else f"outbox-{outbox_id}"].append((outbox_id, next_attempt_ts))
+
+        now = utc_now()
+        lanes = [
+            [outbox_id for outbox_id, _ in takewhile(lambda post: post[1] is None or post[1] <= now, lane)]
+            for lane in lanes.values()
+        ]
+        lanes = [lane for lane in lanes if lane]
+        if not lanes:
+            return 0
+        if sum(len(lane) for lane in lanes) > PostBudget.posts_available():
+            lanes = self._coalesce(lanes)
+
+        # connected from this thread, connecting may need to prompt for a password
+        self.sink.connect()
+        workers = min(self.max_concurrency, len(lanes))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbox-lane") as executor:
+            return sum(executor.map(self._send_lane, lanes))
+
+    def _coalesce(self, lanes: list[list[int]]) -> list[list[int]]:
+        """Merge consecutive replies of each lane that were never attempted
+        into the first of them, e.g. 'Alabama TD + PAT, Auburn FG, now Auburn
+        3 - Alabama 7'. Merged posts are marked 'merged' and not published.
+
+        Args:
+            lanes (list[list[int]]): ids of the due posts of each lane, in queue order
+
+        Returns:
+            list[list[int]]: ids of the posts left to publish in each lane
+        """
+        with Session(get_session().get_bind()) as session:
+            outbox_ids = [outbox_id for lane in lanes for outbox_id in lane]
+            entries = session.execute(select(OutboxPost).where(OutboxPost.id.in_(outbox_ids))).scalars()
+            entries = {entry.id: entry for entry in entries}
+
+            coalesced = []
+            for lane in lanes:
+                kept = []
+                first = None
+                summaries = []
+                for outbox_id in lane:
+                    entry = entries[outbox_id]
+                    if entry.post_type != "game_update" or entry.attempts > 0 or entry.summary is None:
+                        first, summaries = None, []
+                        kept.append(outbox_id)
+                        continue
+
+                    post_text = coalesced_plays([*summaries, entry.summary], entry.post_text) if summaries else None
+                    if post_text is None:
+                        first, summaries = entry, [entry.summary]
+                        kept.append(outbox_id)
+                        continue
+
+                    summaries.append(entry.summary)
+                    first.post_text = post_text
+                    first.summary = ", ".join(summaries)
+                    entry.status = "merged"
+
+                coalesced.append(kept)
+                merged = len(lane) - len(kept)
+                if merged:
+                    logging.info(f"Merged {merged} posts about game {entries[lane[0]].game_id} to stay within the write budget")
+            session.commit()
+
+        return coalesced
+
+    def _send_lane(self, lane: list[int]) -> int:
+        """Publish the due posts of a lane in order, in batches, stopping at
+        the first batch that fails or that the write budget can't pay for. A
+        batch the server rejects is sent again one post at a time, so only
+        the post it refused is given up on. A batch that fails is refunded
+        unless it was rate limited, since nothing was created.
+
+        Args:
+            lane (list[int]): ids of the due posts, in queue order
+
+        Returns:
+            int: number of posts published
+        """
+        sent = 0
+        with Session(get_session().get_bind()) as session:
+            states = _GameStateCache(session)
+            for start in range(0, len(lane), self.max_batch):
+                batch = lane[start : start + self.max_batch]
+                if not PostBudget.take(len(batch)):
+                    break
+
+                try:
+                    sent += self._send(session, states, batch)
+                except Exception as error:
+                    session.rollback()
+                    if status_code(error) != 429:
+                        PostBudget.refund(len(batch))
+                    if len(batch) > 1 and rejected(error):
+                        logging.warning(f"Batch of {len(batch)} outbox posts rejected, sending them one at a time: {error}")
+                        published, finished = self._send_one_by_one(session, states, batch)
+                        sent += published
+                        if finished:
+                            continue
+                    else:
+                        self._failed(session, batch, error)
+                    break
+
+        return sent
+
+    def _send_one_by_one(self, session: Session, states: _GameStateCache, outbox_ids: list[int]) -> tuple[int, bool]:
+        """Publish a rejected batch's posts one at a time, giving up on the ones
+        the server rejects and stopping at the first other failure or post the
+        write budget can't pay for.
+
+        Args:
+            session (Session): database session of the sending thread
+            states (_GameStateCache): game states read with the sending thread's session
+            outbox_ids (list[int]): ids of the posts in the outbox table, in queue order
+
+        Returns:
+            tuple: number of posts published, and if every post was published or given up on
+        """
+        sent = 0
+        for outbox_id in outbox_ids:
+            if not PostBudget.take(1):
+                return sent, False
+
+            try:
+                sent += self._send(session, states, [outbox_id])
+            except Exception as error:
+                session.rollback()
+                if status_code(error) != 429:
+                    PostBudget.refund(1)
+                self._failed(session, [outbox_id], error)
+                if not rejected(error):
+                    return sent, False
+
+        return sent, True
+
+    def _send(self, session: Session, states: _GameStateCache, outbox_ids: list[int]) -> int:
+        """Publish a batch of a lane's queued posts in a single write and
+        record them in the posts table in a single commit. Reply refs are
+        built before anything is published, each reply is threaded to the
+        post before it, the game's thread is updated as posts are built.
+        Replies to a game without a header, e.g. because posting the header
+        failed, are given up on instead of holding back the lane. The batch
+        is paid for in full beforehand, the budget of posts that weren't
+        written, i.e. given up on or found already published, is given back.
+
+        Args:
+            session (Session): database session of the sending thread
+            states (_GameStateCache): game states read with the sending thread's session
+            outbox_ids (list[int]): ids of the posts in the outbox table, in queue order
+
+        Returns:
+            int: number of posts published
+        """
+        entries = session.execute(select(OutboxPost).where(OutboxPost.id.in_(outbox_ids)).order_by(OutboxPost.id))
+        entries = entries.scalars().all()
+        # the attempts are committed first, so posts published right before a crash are looked up instead of repeated
+        for entry in entries:
+            entry.attempts += 1
+        session.commit()
+
+        states.clear()
+        game_id = entries[0].game_id
+        state = states.get(game_id) if game_id is not None else None
+
+        planned = []
+        for entry in entries:
+            parent = root = None
+            if entry.post_type == "game_update":
+                if state is None or state.parent is None:
+                    entry.status = "failed"
+                    entry.last_error = f"Game {game_id} has no post to reply to"
+                    logging.error(f"Giving up on outbox post {entry.id}: game {game_id} has no post to reply to")
+                    continue
+                parent, root = state.parent, state.root or state.parent
+
+            published = self.sink.get_post(entry.rkey) if entry.attempts > 1 else None
+            record = None
+            if published is None:
+                record = self.sink.build_post(entry.post_text, entry.rkey, state.reply_ids() if parent else None)
+                published = record.uri, record.cid
+            planned.append((entry, record, published, parent, root))
+
+            if state is not None:
+                # not recorded yet, the replies after it are resolved to its id below
+                state.thread_to(PostRef(None, *published), header=entry.post_type == "game_header")
+
+        records = [record for _, record, _, _, _ in planned if record is not None]
+        results = iter(self.sink.publish_posts(records) if records else [])
+
+        post_ids = {}
+        for entry, record, (uri, cid), parent, root in planned:
+            if record is not None:
+                uri, cid = next(results)
+            post = Post(
+                uri=uri,
+                cid=cid,
+                post_text=entry.post_text,
+                created_at_ts=utc_now(),
+                updated_at_ts=utc_now(),
+                post_type=entry.post_type,
+                root_id=self._post_id(root, post_ids),
+                parent_id=self._post_id(parent, post_ids),
+            )
+            session.add(post)
+            session.flush()
+            post_ids[uri] = post.id
+            if state is not None:
+                state.thread_to(PostRef(post.id, uri, cid), header=entry.post_type == "game_header")
+
+            entry.status = "sent"
+            entry.post_id = post.id
+            entry.sent_at_ts = utc_now()
+            entry.last_error = None
+        session.commit()
+        PostBudget.refund(len(outbox_ids) - len(records))
+
+        return len(planned)
+
+    @staticmethod
+    def _post_id(ref: PostRef | None, post_ids: dict[str, int]) -> int | None:
+        """Get the posts table id of a reply ref.
+
+        Args:
+            ref (PostRef): post replied to, without an id if it's part of the batch
+            post_ids (dict): ids of the posts of the batch recorded so far, by uri
+
+        Returns:
+            int | None: id of the post, None if there is no ref
+        """
+        if ref is None:
+            return None
+
+        return ref.id if ref.id is not None else post_ids[ref.uri]
+
+    def _failed(self, session: Session, outbox_ids: list[int], error: Exception):
+        """Schedule a failed batch of posts to be retried with exponential
+        backoff, or give up on its posts after too many attempts. Posts that
+        were rate limited are never given up on, the write budget holds them
+        back until the limit resets. A single post the server rejected is
+        given up on right away.
+
+        Args:
+            session (Session): database session of the sending thread
+            outbox_ids (list[int]): ids of the posts in the outbox table
+            error (Exception): error the batch failed with
+        """
+        rate_limited = status_code(error) == 429
+        give_up = len(outbox_ids) == 1 and rejected(error)
+        for outbox_id in outbox_ids:
+            entry = session.get(OutboxPost, outbox_id)
+            entry.last_error = str(error)[:300]
+            if give_up or (entry.attempts >= self.max_attempts and not rate_limited):
+                entry.status = "failed"
+                logging.error(f"Giving up on outbox post {outbox_id} after {entry.attempts} attempts: {error}")
+            else:
+                backoff = min(timedelta(seconds=2**entry.attempts), self.max_backoff)
+                entry.next_attempt_ts = utc_now() + backoff
+                logging.warning(f"Outbox post {outbox_id} failed, retrying in {backoff}: {error}")
+        session.commit()
+
+    def drain(self) -> int:
+        """Publish every queued post that is due, waiting until they are
+        published.
+
+        Returns:
+            int: number of posts published
+        """
+        return self.send_queued()
+
+    def run(self, stop_event: threading.Event):
+        """Publish queued posts until stopped. Meant to run on a background
+        thread, see `start`.
+
+        Args:
+            stop_event (threading.Event): event that stops the sender when set
+        """
+        while not stop_event.is_set():
+            try:
+                self.send_queued()
+            except Exception:
+                logging.exception("Outbox sender failed")
+
+            self._wake.wait(self.poll_interval.total_seconds())
+            self._wake.clear()
+
+    def start(self, stop_event: threading.Event) -> threading.Thread:
+        """Publish queued posts on a background thread until stopped. The sink
+        is connected first, since connecting to bluesky may need to prompt
+        for a password.
+
+        Args:
+            stop_event (threading.Event): event that stops the sender when set
+
+        Returns:
+            threading.Thread: sending thread
+        """
+        self.sink.connect()
+        thread = threading.Thread(target=self.run, args=(stop_event,), name="outbox-sender", daemon=True)
+        thread.start()
+
+        return thread
+
+
+Outbox = _Outbox()
@@ -1,10 +1,10 @@
 from datetime import datetime, timedelta
 
-from data.espn_parser import ESPNParser
-from data.query_api import query_team
+from data.team_cache import TeamCache
 
-from db.db_utils import get_games, has_previous_daily_post, update_rows, get_values
-from post.bluesky_utils import create_post
+from db.db_utils import get_games, get_values, has_previous_daily_post, unit_of_work
+from db.models import Game
+from post.bluesky_utils import queue_post
 from post.format_posts import game_header
 
 
@@ -27,26 +27,54 @@ def post_a_days_games(
     )
     if todays_games and has_previous_daily_post(date):
         post_text = f"There are {len(todays_games)} college football games today!"
-        create_post(post_text, "daily")
+        queue_post(post_text, "daily")
 
 
-def create_game_header_posts(date: datetime):
-    """Create root level posts for all currently ongoing games.
+def post_game_header(game: Game, streak_info: dict[str, str | None]):
+    """Queue the root level post for a game. The outbox sender makes it the
+    game's last post once it's published.
+
+    Args:
+        game (Game): game to post about
+        streak_info (dict[str, str | None]): win/loss streaks keyed by team id
+    """
+    post_text = game_header(game, streak_info)
+    queue_post(post_text, "game_header", game.id)
+
+
+def create_game_header_posts(date: datetime) -> int:
+    """Create root level posts for all currently ongoing games. Team
+    information comes from the team cache, teams missing from it are queried
+    concurrently and each header is posted as soon as both of its teams are
+    available. Teams ESPN didn't return are posted without a streak.
 
     Args:
         date (datetime): date to get active games for
+
+    Returns:
+        int: number of database commits made
     """
     games = get_games(date - timedelta(minutes=5), date + timedelta(minutes=5))
-    for game in games:
-        if not game.last_post_id:
-            streak_info = {}
-            for team in [game.home_team_id, game.away_team_id]:
-                team_info = query_team(team)
-                streak_info[team] = ESPNParser.team_streak(team_info)
-
-            post_text = game_header(game, streak_info)
-            post_ids = create_post(post_text, "game_header")
-            last_post_id = get_values(
-                "posts", {"uri": post_ids.uri, "cid": post_ids.cid}, "first"
-            ).id
-            update_rows("games", {"last_post_id": last_post_id}, {"id": game.id})
+    queued = {post.game_id for post in get_values("outbox", {"post_type": "game_header", "status": "queued"}) or []}
+    pending = [game for game in games if not game.last_post_id and game.id not in queued]
+    kickoffs = {team: game.start_ts for game in pending for team in (game.home_team_id, game.away_team_id)}
+
+    streak_info = {}
+    commits = 0
+    for team_id, team in TeamCache.fetch(kickoffs):
+        streak_info[team_id] = team["streak"] if team else None
+
+        ready = [
+            game
+            for game in pending
+            if game.home_team_id in streak_info and game.away_team_id in streak_info
+        ]
+        if not ready:
+            continue
+        with unit_of_work() as work:
+            for game in ready:
+                pending.remove(game)
+                post_game_header(game, streak_info)
+        commits += work.commits
+
+    return commits
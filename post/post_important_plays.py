@@ -1,67 +1,115 @@
+import logging
 from datetime import datetime, timedelta
 
+from data.get_games import game_has_changed, get_game_states, summary_matches_scoreboard
 from data.parse_results import get_scoring_plays
-from data.query_api import query_game
+from data.query_api import query_game, query_games
+from data.records import ScoringPlay
 
-from db.db_utils import get_games, get_values, update_rows
-from post.bluesky_utils import create_post
-from post.format_posts import scoring_play
+from db.db_utils import get_games, unit_of_work, update_rows
+from db.game_state import GameStates
+from db.models import Game
+from post.bluesky_utils import queue_post
+from post.format_posts import scoring_play, scoring_summary
 
 
-def post_scoring_plays(important_results: list[dict]):
-    """Post scoring plays for a game.
+def post_scoring_plays(important_results: list[ScoringPlay]):
+    """Queue posts about scoring plays for a game. The game's play cursor is
+    moved past every play that was queued or already reflected in the score,
+    so later ticks only see new plays. Game state is read from and written to
+    the game state cache, so no query is made per play.
 
     Args:
-        important_results (dict): information about the drive's scoring play
+        important_results (list[ScoringPlay]): scoring plays of the game
     """
+    cursor = None
     for result in important_results:
-        game_info = get_values("games", {"id": result["game_id"]}, "first")
-        if game_info.last_post_id is None:
+        game = GameStates.get(result.game_id)
+        if game is None or not game.has_thread:
             continue
 
-        result["home"] = game_info.home_team
-        result["away"] = game_info.away_team
-        result["scoring_team"] = (
-            game_info.home_team
-            if game_info.home_team_id == result["scoring_team"]
-            else game_info.away_team
-        )
-
         # format post and send it if the score has gone up
         if (
-            result["home_score"] > game_info.home_score
-            or result["away_score"] > game_info.away_score
+            result.home_score > game.home_score
+            or result.away_score > game.away_score
         ):
-            post_text = scoring_play(result)
+            post_text = scoring_play(result, game)
             if (
                 "KICK" in post_text
                 or "Two-Point" in post_text
                 or "FG" in post_text
                 or "PAT" in post_text
             ):
-                update_rows("games", {"home_score": result["home_score"], "away_score": result["away_score"]}, {"id": result["game_id"]})
-                create_post(post_text, "game_update", game_info.last_post_id)
+                summary = scoring_summary(result, game)
+                game.update({"home_score": result.home_score, "away_score": result.away_score})
+                queue_post(post_text, "game_update", game.id, summary)
+                cursor = result
+        else:
+            cursor = result
+
+    if cursor is not None:
+        GameStates.get(cursor.game_id).update(
+            {"last_play_id": cursor.play_id, "last_play_sequence": cursor.sequence}
+        )
 
 
-def post_about_game(game_id: str):
+def post_about_game(game_id: str, game_info: dict | None = None):
     """Create bluesky posts about scoring plays for a game.
 
     Args:
         game_id (str): id of the game in the game table
-        date (datetime): datetime of the earliest drive to consider posting about
+        game_info (optional, dict): ESPN game API response, queried when not provided
     """
-    game_info = query_game(game_id)
-    scoring_plays = get_scoring_plays(game_info)
+    if game_info is None:
+        game_info = query_game(game_id)
+    game = GameStates.get(game_id)
+    scoring_plays = get_scoring_plays(game_info, game.last_play_sequence if game else None)
 
     post_scoring_plays(scoring_plays)
 
 
-def post_important_plays(date: datetime):
+def post_important_plays(date: datetime, games: list[Game] | None = None) -> int:
     """Reply to game header posts with important plays, e.g. scoring plays.
+    Game summaries are only fetched for games whose scoreboard state changed
+    since they were last processed with a header to reply to and a summary
+    that had caught up with the scoreboard. Each game is committed on its
+    own once its summary arrives, so a game that fails doesn't hold back the
+    others and no transaction is open while summaries are fetched.
 
     Args:
         date (datetime): date to query against
+        games (optional, list[Game]): games to check, defaults to every game from the last 24 hours
+
+    Returns:
+        int: number of database commits made
     """
-    games = get_games(date - timedelta(days=1), date)
-    for game in games:
-        post_about_game(game.id)
+    if games is None:
+        games = get_games(date - timedelta(days=1), date)
+    if not games:
+        return 0
+
+    states = get_game_states(date)
+    changed_games = [game.id for game in games if game_has_changed(game, states.get(game.id))]
+    GameStates.clear()
+    GameStates.load(changed_games)
+
+    commits = 0
+    for game_id, game_info in query_games(changed_games):
+        try:
+            with unit_of_work() as work:
+                post_about_game(game_id, game_info)
+                # the game stays changed until it has a header and a summary that caught up with the
+                # scoreboard, so plays skipped or missing this time are posted on the next poll
+                game = GameStates.get(game_id)
+                if (
+                    game_id in states
+                    and game is not None
+                    and game.has_thread
+                    and summary_matches_scoreboard(game_info, states[game_id])
+                ):
+                    update_rows("games", states[game_id], {"id": game_id})
+        except Exception:
+            logging.exception(f"Couldn't post about game {game_id}")
+        commits += work.commits
+
+    return commits
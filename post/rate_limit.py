@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+# bluesky charges writes against the account's budget in points
+POST_COST = 3
+WRITE_METHODS = (
+    "com.atproto.repo.applyWrites",
+    "com.atproto.repo.createRecord",
+    "com.atproto.repo.putRecord",
+    "com.atproto.repo.deleteRecord",
+)
+
+
+class _PostBudget:
+    """Token bucket of the account's write budget, so posts are held back
+    instead of being throttled. It refills at the rate of the server's policy
+    and is corrected by the rate-limit headers of every write response."""
+
+    def __init__(
+        self,
+        limit: int | None = 5000,
+        window: timedelta | None = timedelta(hours=1),
+        post_cost: int | None = POST_COST,
+    ) -> None:
+        """Configure the budget, it starts full.
+
+        Args:
+            limit (int): points the account can spend per window
+            window (timedelta): window the limit is enforced over
+            post_cost (int): points a post costs
+        """
+        self.limit = limit
+        self.window = window
+        self.post_cost = post_cost
+        self.tokens = float(limit)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the points earned since the last refill, the lock must be held."""
+        now = time.monotonic()
+        if now > self._updated:
+            rate = self.limit / self.window.total_seconds()
+            self.tokens = min(self.limit, self.tokens + (now - self._updated) * rate)
+            self._updated = now
+
+    def posts_available(self) -> int:
+        """Get the number of posts the budget can pay for right now.
+
+        Returns:
+            int: number of posts
+        """
+        with self._lock:
+            self._refill()
+            return max(int(self.tokens // self.post_cost), 0)
+
+    def take(self, posts: int) -> bool:
+        """Spend the budget of several posts, if there is enough of it.
+
+        Args:
+            posts (int): number of posts about to be published
+
+        Returns:
+            bool: if the posts were paid for
+        """
+        with self._lock:
+            self._refill()
+            cost = posts * self.post_cost
+            if self.tokens < cost:
+                return False
+
+            self.tokens -= cost
+            return True
+
+    def refund(self, posts: int):
+        """Give back the budget of posts that were paid for but not published,
+        e.g. because their write failed.
+
+        Args:
+            posts (int): number of posts that weren't published
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.limit, self.tokens + posts * self.post_cost)
+
+    def track(self, response):
+        """Follow the rate-limit headers of a write response. The remaining
+        points replace the bucket's estimate, a rate-limited response empties
+        the bucket until the server resets it. Meant to be an httpx response
+        hook.
+
+        Args:
+            response (httpx.Response): response from the server
+        """
+        if not response.request.url.path.endswith(WRITE_METHODS):
+            return
+
+        headers = response.headers
+        with self._lock:
+            if "ratelimit-limit" in headers:
+                self.limit = int(headers["ratelimit-limit"])
+            for part in headers.get("ratelimit-policy", "").split(";")[1:]:
+                name, _, value = part.strip().partition("=")
+                if name == "w" and value.isdigit():
+                    self.window = timedelta(seconds=int(value))
+            if "ratelimit-remaining" in headers:
+                self.tokens = float(headers["ratelimit-remaining"])
+                self._updated = time.monotonic()
+
+            if response.status_code == 429:
+                reset_in = float(headers.get("ratelimit-reset", time.time())) - time.time()
+                self.tokens = 0.0
+                # nothing is earned before the reset
+                self._updated = time.monotonic() + max(reset_in, 0)
+                logging.warning(f"Bluesky write budget exhausted, posting resumes in {max(reset_in, 0):.0f}s")
+
+
+PostBudget = _PostBudget()
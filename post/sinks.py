@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+POST_COLLECTION = "app.bsky.feed.post"
+# CIDv1 of a dag-cbor block with a 32 byte sha2-256 multihash
+CID_PREFIX = bytes([0x01, 0x71, 0x12, 0x20])
+
+
+@dataclass(slots=True)
+class PostRecord:
+    """A post record built locally, with the uri and cid it gets once it is
+    published."""
+
+    rkey: str
+    value: dict
+    uri: str
+    cid: str
+
+
+def record_cid(value: dict) -> str:
+    """Compute the cid a record is stored under, the hash of its dag-cbor
+    encoding.
+
+    Args:
+        value (dict): record
+
+    Returns:
+        str: base32 cid, e.g. 'bafyrei...'
+    """
+    import libipld
+
+    cid = CID_PREFIX + hashlib.sha256(libipld.encode_dag_cbor(value)).digest()
+    return "b" + base64.b32encode(cid).decode().lower().rstrip("=")
+
+
+def fake_did(name: str) -> str:
+    """Make up a did:plc identifier for an account that doesn't exist.
+
+    Args:
+        name (str): name the identifier is derived from
+
+    Returns:
+        str: did, the same for the same name
+    """
+    return "did:plc:" + base64.b32encode(hashlib.sha256(name.encode()).digest()).decode().lower()[:24]
+
+
+class PostSink(ABC):
+    """Where published posts go. Bluesky is the real one, the others publish
+    nowhere and are for running the bot offline."""
+
+    did: str | None = None
+
+    def connect(self):
+        """Connect before posts are built, does nothing unless the sink is
+        remote."""
+
+    def build_post(self, text: str, rkey: str, reply_to: dict | None = None) -> PostRecord:
+        """Build a post record that is either new or a reply to an existing
+        post, without publishing it. Its uri and cid are known up front, so
+        replies to it can be built before it is published.
+
+        Args:
+            text (str): post text
+            rkey (str): record key of the post, creating a second post with the same key fails
+            reply_to (optional, dict): 'parent' and 'root' post 'uri' and 'cid' for replies
+
+        Returns:
+            PostRecord: record with the uri and cid it gets once published
+        """
+        self.connect()
+        value = {
+            "$type": POST_COLLECTION,
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "langs": ["en"],
+            "text": text,
+        }
+        if reply_to is not None:
+            value["reply"] = {
+                "$type": f"{POST_COLLECTION}#replyRef",
+                "parent": {"$type": "com.atproto.repo.strongRef", **reply_to["parent"]},
+                "root": {"$type": "com.atproto.repo.strongRef", **reply_to["root"]},
+            }
+
+        return PostRecord(rkey, value, f"at://{self.did}/{POST_COLLECTION}/{rkey}", record_cid(value))
+
+    @abstractmethod
+    def publish_posts(self, posts: list[PostRecord]) -> list[tuple[str, str]]:
+        """Publish built posts in a single write, either all of them are
+        created or none are.
+
+        Args:
+            posts (list[PostRecord]): posts in the order they are created
+
+        Returns:
+            list[tuple[str, str]]: uri and cid of each post
+        """
+
+    @abstractmethod
+    def get_post(self, rkey: str) -> tuple[str, str] | None:
+        """Look up a published post by record key.
+
+        Args:
+            rkey (str): record key of the post
+
+        Returns:
+            tuple[str, str] | None: uri and cid of the post, None if there is no such post
+        """
+
+
+class MemorySink(PostSink):
+    """Keeps published posts in memory, taking as long as a real write
+    would."""
+
+    def __init__(self, name: str | None = "cfbot-memory", latency: timedelta | None = timedelta(0)) -> None:
+        """Configure the sink.
+
+        Args:
+            name (str): name of the made up account the posts belong to
+            latency (timedelta): time each write takes
+        """
+        self.did = fake_did(name)
+        self.latency = latency
+        self.posts: dict[str, PostRecord] = {}
+        self._lock = threading.Lock()
+
+    def publish_posts(self, posts: list[PostRecord]) -> list[tuple[str, str]]:
+        time.sleep(self.latency.total_seconds())
+        with self._lock:
+            for post in posts:
+                assert post.rkey not in self.posts, f"Post {post.uri} already exists"
+            for post in posts:
+                self.posts[post.rkey] = post
+
+        return [(post.uri, post.cid) for post in posts]
+
+    def get_post(self, rkey: str) -> tuple[str, str] | None:
+        post = self.posts.get(rkey)
+        return (post.uri, post.cid) if post is not None else None
+
+
+class JsonlSink(MemorySink):
+    """Appends published posts to a JSON lines file, one post per line, e.g.
+    for running the bot in shadow mode next to the real one. Posts already in
+    the file count as published."""
+
+    def __init__(
+        self, path: str | Path, name: str | None = "cfbot-shadow", latency: timedelta | None = timedelta(0)
+    ) -> None:
+        """Configure the sink, reading the posts already in the file.
+
+        Args:
+            path (str | Path): file posts are appended to
+            name (str): name of the made up account the posts belong to
+            latency (timedelta): time each write takes
+        """
+        super().__init__(name, latency)
+        self.path = Path(path)
+        if self.path.exists():
+            with self.path.open() as file:
+                for line in file:
+                    post = PostRecord(**json.loads(line))
+                    self.posts[post.rkey] = post
+
+    def publish_posts(self, posts: list[PostRecord]) -> list[tuple[str, str]]:
+        published = super().publish_posts(posts)
+        lines = "".join(
+            json.dumps({"rkey": post.rkey, "value": post.value, "uri": post.uri, "cid": post.cid}) + "\n"
+            for post in posts
+        )
+        with self._lock, self.path.open("a") as file:
+            file.write(lines)
+
+        return published
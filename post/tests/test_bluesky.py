@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+import libipld
+from atproto import Client, Session, SessionEvent, models
+from sqlalchemy import delete, select, update
+
+from db import DB_SESSION
+from db.models import Credentials
+from post import atproto_internals
+from post.bluesky import _BlueSky
+
+USERNAME = "test_bluesky_user"
+NOW = int(time.time())
+
+
+def jwt(expires_in: int, jti: str) -> str:
+    def encode(value: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+    payload = {"exp": NOW + expires_in, "sub": "did:plc:test", "jti": jti}
+    return f"{encode({'alg': 'HS256'})}.{encode(payload)}.c2lnbmF0dXJl"
+
+
+def session(expires_in: int, jti: str | None = "saved") -> Session:
+    return Session("test.bsky.social", "did:plc:test", jwt(expires_in, jti), jwt(90 * 24 * 3600, jti), "https://bsky.social")
+
+
+def saved_session() -> str:
+    DB_SESSION.expire_all()
+    return DB_SESSION.execute(select(Credentials.session).where(Credentials.username == USERNAME)).scalar()
+
+
+class TestAtprotoInternals:
+    def test_pinned_client_has_internals(self):
+        atproto_internals.check(Client())
+
+    def test_missing_internal_named(self, monkeypatch):
+        client = Client()
+        monkeypatch.delattr(Client, "_refresh_and_set_session")
+
+        with pytest.raises(RuntimeError, match="_refresh_and_set_session"):
+            atproto_internals.check(client)
+
+
+class TestBlueSkySession:
+    def setup_method(self):
+        DB_SESSION.execute(delete(Credentials).where(Credentials.username == USERNAME))
+        DB_SESSION.add(Credentials(username=USERNAME, password="password", session=session(7200).export()))
+        DB_SESSION.commit()
+        self.bluesky = _BlueSky(USERNAME)
+
+    @pytest.fixture
+    def refreshes(self, monkeypatch) -> list:
+        refreshes = []
+
+        def refresh(client):
+            refreshes.append(client)
+            client._set_session(SessionEvent.REFRESH, session(7200, "refreshed"))
+
+        monkeypatch.setattr(_BlueSky, "_refresh", lambda self, client: refresh(client))
+        monkeypatch.setattr(Client, "login", lambda *args, **kwargs: pytest.fail("unexpected login"))
+        return refreshes
+
+    def test_saved_session_reused(self, refreshes):
+        client = self.bluesky.client
+
+        assert client._access_jwt == session(7200).access_jwt
+        assert self.bluesky.did == "did:plc:test"
+        assert refreshes == []
+        assert saved_session() == session(7200).export()
+
+    def test_expiring_session_refreshed(self, refreshes):
+        DB_SESSION.execute(update(Credentials).where(Credentials.username == USERNAME).values(session=session(60).export()))
+        DB_SESSION.commit()
+
+        self.bluesky.client
+
+        assert len(refreshes) == 1
+        assert saved_session() == session(7200, "refreshed").export()
+
+    def test_background_refresh_saved_on_main_thread(self, refreshes):
+        client = self.bluesky.client
+        self.bluesky.refresh_margin = timedelta(hours=3)
+        stop = threading.Event()
+        thread = self.bluesky.start_session_refresh(stop)
+
+        deadline = time.time() + 5
+        while not refreshes and time.time() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        thread.join(timeout=5)
+
+        assert refreshes and refreshes[0] is client
+        assert saved_session() == session(7200).export()
+
+        self.bluesky.save_session()
+        assert saved_session() == session(7200, "refreshed").export()
+
+
+class TestBlueSkyPosts:
+    def setup_method(self):
+        DB_SESSION.execute(delete(Credentials).where(Credentials.username == USERNAME))
+        DB_SESSION.add(Credentials(username=USERNAME, password="password", session=session(7200).export()))
+        DB_SESSION.commit()
+        self.bluesky = _BlueSky(USERNAME)
+
+    def test_reply_built_with_cid_of_record(self):
+        header = self.bluesky.build_post("header", "3kabcdefghij2")
+        reply = self.bluesky.build_post(
+            "touchdown", "3kabcdefghij3", {"parent": {"uri": header.uri, "cid": header.cid}, "root": {"uri": header.uri, "cid": header.cid}}
+        )
+
+        assert header.uri == "at://did:plc:test/app.bsky.feed.post/3kabcdefghij2"
+        cid = libipld.decode_cid(header.cid)
+        assert (cid["version"], cid["codec"]) == (1, 0x71)
+        assert cid["hash"]["digest"] == hashlib.sha256(libipld.encode_dag_cbor(header.value)).digest()
+        assert reply.value["reply"]["parent"]["cid"] == header.cid
+
+    def test_posts_published_in_one_write(self, monkeypatch):
+        writes = []
+
+        def apply_writes(data):
+            writes.append(data)
+            results = [
+                models.ComAtprotoRepoApplyWrites.CreateResult(uri=f"at://{data.repo}/{write.collection}/{write.rkey}", cid="bafyserver")
+                for write in data.writes
+            ]
+            return models.ComAtprotoRepoApplyWrites.Response(commit=None, results=results)
+
+        monkeypatch.setattr(self.bluesky.client.com.atproto.repo, "apply_writes", apply_writes)
+        posts = [self.bluesky.build_post(text, rkey) for text, rkey in (("header", "3kabcdefghij2"), ("touchdown", "3kabcdefghij3"))]
+
+        published = self.bluesky.publish_posts(posts)
+
+        assert len(writes) == 1
+        assert [write.rkey for write in writes[0].writes] == ["3kabcdefghij2", "3kabcdefghij3"]
+        assert published == [(post.uri, "bafyserver") for post in posts]
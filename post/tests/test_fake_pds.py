@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import select
+
+from db.models import Credentials, Game, OutboxPost, Post
+from post import bluesky
+from post.bluesky import _BlueSky
+from post.fake_pds import FakePDS
+from post.outbox import _Outbox
+from post.rate_limit import POST_COST, PostBudget
+
+USERNAME = "test_fake_pds_user"
+GAME_ID = "-500"
+
+
+class TestFakePDS:
+    @pytest.fixture(autouse=True)
+    def setup(self, database, game_row):
+        self.session = database
+        self.session.add(Game(**game_row(GAME_ID)))
+        self.session.commit()
+
+    @pytest.fixture
+    def pds(self, request, monkeypatch):
+        # the write budget follows the fake's rate-limit headers, it's restored after the test
+        for name in ("tokens", "limit", "window", "_updated"):
+            monkeypatch.setattr(PostBudget, name, getattr(PostBudget, name))
+        monkeypatch.setattr(bluesky.getpass, "getpass", lambda *args: "password")
+
+        pds = FakePDS(**getattr(request, "param", {})).start()
+        self.bluesky = _BlueSky(USERNAME, base_url=pds.url)
+        self.outbox = _Outbox(sink=self.bluesky)
+        yield pds
+        pds.stop()
+
+    def entries(self) -> dict[str, OutboxPost]:
+        self.session.expire_all()
+        return {entry.post_text: entry for entry in self.session.execute(select(OutboxPost)).scalars()}
+
+    def retry_now(self):
+        for entry in self.entries().values():
+            entry.next_attempt_ts = None
+        self.session.commit()
+
+    def test_thread_published_in_one_write(self, pds):
+        self.outbox.enqueue("header", "game_header", GAME_ID)
+        self.outbox.enqueue("touchdown", "game_update", GAME_ID)
+        self.outbox.enqueue("extra point", "game_update", GAME_ID)
+
+        assert self.outbox.drain() == 3
+
+        assert pds.calls["com.atproto.server.createSession"] == 1
+        assert pds.calls["com.atproto.repo.applyWrites"] == 1
+        posts = self.session.execute(select(Post.uri, Post.cid).where(Post.id.in_(e.post_id for e in self.entries().values())))
+        # the cids built locally are the ones the server stored
+        assert {(f"at://{'/'.join(key)}", cid) for key, (cid, _) in pds.records.items()} == set(posts)
+
+    def test_server_error_retried(self, pds):
+        pds.fail_next(503)
+        self.outbox.enqueue("header", "game_header")
+
+        assert self.outbox.drain() == 0
+        assert self.entries()["header"].status == "queued"
+
+        self.retry_now()
+        assert self.outbox.drain() == 1
+        assert len(pds.records) == 1
+
+    def test_lost_response_not_repeated(self, pds):
+        pds.fail_next(500, applied=True)
+        self.outbox.enqueue("header", "game_header")
+
+        assert self.outbox.drain() == 0
+        self.retry_now()
+        assert self.outbox.drain() == 1
+
+        assert pds.calls["com.atproto.repo.getRecord"] == 1
+        assert len(pds.records) == 1
+        assert self.entries()["header"].status == "sent"
+
+    @pytest.mark.parametrize("pds", [{"write_limit": POST_COST}], indirect=True)
+    def test_rate_limited(self, pds):
+        self.outbox.max_attempts = 1
+        self.outbox.enqueue("header", "game_header")
+        self.outbox.enqueue("other header", "game_header")
+
+        assert self.outbox.drain() == 1
+
+        assert pds.failures[429] == 1
+        assert sorted(entry.status for entry in self.entries().values()) == ["queued", "sent"]
+        assert PostBudget.posts_available() == 0
+
+    def test_session_refreshed(self, pds):
+        client = self.bluesky.client
+        saved = self.session.execute(select(Credentials.session).where(Credentials.username == USERNAME)).scalar()
+
+        self.bluesky._refresh(client)
+
+        assert pds.calls["com.atproto.server.refreshSession"] == 1
+        self.session.expire_all()
+        assert self.session.execute(select(Credentials.session).where(Credentials.username == USERNAME)).scalar() != saved
@@ -0,0 +1,260 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from db.game_state import _GameStateCache
+from db.models import Game, OutboxPost, Post
+from post import outbox
+from post.outbox import _Outbox, new_tid
+from post.rate_limit import POST_COST, _PostBudget
+from post.sinks import MemorySink, PostRecord
+
+GAME_IDS = ("-400", "-401", "-402", "-403", "-404", "-405")
+
+
+class Rejected(Exception):
+    response = SimpleNamespace(status_code=400)
+
+
+class FakeBluesky(MemorySink):
+    def __init__(self, fail_texts: tuple[str, ...] | None = (), latency: float | None = 0):
+        super().__init__("test", timedelta(seconds=latency))
+        self.fail_texts = fail_texts
+        self.reject_texts: tuple[str, ...] = ()
+        self.writes: list[list[str]] = []
+
+    @property
+    def published(self) -> dict[str, tuple[str, dict | None]]:
+        published = {}
+        for rkey, post in self.posts.items():
+            reply = post.value.get("reply")
+            if reply is not None:
+                reply = {ref: {"uri": reply[ref]["uri"], "cid": reply[ref]["cid"]} for ref in ("parent", "root")}
+            published[rkey] = (post.value["text"], reply)
+        return published
+
+    def publish_posts(self, posts: list[PostRecord]) -> list[tuple[str, str]]:
+        if any(post.value["text"] in self.fail_texts for post in posts):
+            time.sleep(self.latency.total_seconds())
+            raise ConnectionError("bluesky is down")
+        if any(post.value["text"] in self.reject_texts for post in posts):
+            raise Rejected("post is too long")
+        published = super().publish_posts(posts)
+        with self._lock:
+            self.writes.append([post.rkey for post in posts])
+        return published
+
+
+class TestNewTid:
+    def test_tids_sort_in_creation_order(self):
+        tids = [new_tid() for _ in range(100)]
+
+        assert all(len(tid) == 13 for tid in tids)
+        assert tids == sorted(tids)
+        assert len(set(tids)) == len(tids)
+
+
+class TestOutbox:
+    @pytest.fixture(autouse=True)
+    def setup(self, database, game_row):
+        self.session = database
+        self.session.add_all([Game(**game_row(game_id)) for game_id in GAME_IDS])
+        self.session.commit()
+        self.outbox = _Outbox()
+
+    @pytest.fixture
+    def bluesky(self) -> FakeBluesky:
+        bluesky = FakeBluesky(fail_texts=("failing header",))
+        self.outbox.sink = bluesky
+        return bluesky
+
+    def entries(self) -> dict[str, OutboxPost]:
+        self.session.expire_all()
+        return {entry.post_text: entry for entry in self.session.execute(select(OutboxPost)).scalars()}
+
+    def test_replies_threaded_to_header(self, bluesky):
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        assert _GameStateCache(self.session).get("-400").has_thread
+
+        assert self.outbox.drain() == 2
+
+        entries = self.entries()
+        header = self.session.get(Post, entries["header"].post_id)
+        reply = self.session.get(Post, entries["touchdown"].post_id)
+        assert self.session.get(Game, "-400").last_post_id == reply.id
+        assert (reply.parent_id, reply.root_id) == (header.id, header.id)
+        assert bluesky.published[entries["touchdown"].rkey][1] == {
+            "parent": {"uri": header.uri, "cid": header.cid},
+            "root": {"uri": header.uri, "cid": header.cid},
+        }
+        assert {entry.status for entry in entries.values()} == {"sent"}
+
+    def test_failure_holds_back_game(self, bluesky):
+        self.outbox.enqueue("failing header", "game_header", "-400")
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        self.outbox.enqueue("other header", "game_header", "-401")
+
+        assert self.outbox.drain() == 1
+
+        entries = self.entries()
+        assert entries["failing header"].status == "queued"
+        assert entries["failing header"].attempts == 1
+        assert entries["failing header"].next_attempt_ts is not None
+        assert entries["failing header"].last_error == "bluesky is down"
+        assert entries["touchdown"].status == "queued"
+        assert entries["touchdown"].rkey not in bluesky.published
+        assert entries["other header"].status == "sent"
+
+    def test_gives_up_after_max_attempts(self, bluesky):
+        self.outbox.max_attempts = 1
+        self.outbox.enqueue("failing header", "game_header", "-400")
+
+        self.outbox.drain()
+
+        assert self.entries()["failing header"].status == "failed"
+
+    def test_replies_given_up_without_header(self, bluesky):
+        self.outbox.max_attempts = 1
+        self.outbox.enqueue("failing header", "game_header", "-400")
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        self.outbox.drain()
+        self.outbox.enqueue("extra point", "game_update", "-400")
+
+        assert self.outbox.drain() == 0
+
+        entries = self.entries()
+        assert [entries[text].status for text in ("failing header", "touchdown", "extra point")] == ["failed"] * 3
+        assert entries["extra point"].last_error == "Game -400 has no post to reply to"
+        assert bluesky.published == {}
+
+    def test_published_post_not_repeated(self, bluesky):
+        self.outbox.enqueue("header", "game_header", "-400")
+        entry = self.entries()["header"]
+        # published, but the process stopped before it was recorded
+        bluesky.publish_posts([bluesky.build_post("header", entry.rkey)])
+        entry.attempts = 1
+        self.session.commit()
+
+        assert self.outbox.drain() == 1
+        assert self.entries()["header"].status == "sent"
+
+    def test_game_batch_published_in_one_write(self, bluesky):
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        self.outbox.enqueue("extra point", "game_update", "-400")
+
+        assert self.outbox.drain() == 3
+
+        entries = self.entries()
+        assert bluesky.writes == [[entries[text].rkey for text in ("header", "touchdown", "extra point")]]
+        header = self.session.get(Post, entries["header"].post_id)
+        touchdown = self.session.get(Post, entries["touchdown"].post_id)
+        extra_point = self.session.get(Post, entries["extra point"].post_id)
+        assert (touchdown.parent_id, touchdown.root_id) == (header.id, header.id)
+        assert (extra_point.parent_id, extra_point.root_id) == (touchdown.id, header.id)
+        assert bluesky.published[entries["extra point"].rkey][1] == {
+            "parent": {"uri": touchdown.uri, "cid": touchdown.cid},
+            "root": {"uri": header.uri, "cid": header.cid},
+        }
+        assert self.session.get(Game, "-400").last_post_id == extra_point.id
+
+    def test_batches_limited(self, bluesky):
+        self.outbox.max_batch = 2
+        self.outbox.enqueue("header", "game_header", "-400")
+        for play in range(3):
+            self.outbox.enqueue(f"play {play}", "game_update", "-400")
+
+        assert self.outbox.drain() == 4
+        assert [len(write) for write in bluesky.writes] == [2, 2]
+
+    def test_failed_batch_retried(self, bluesky):
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.drain()
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        self.outbox.enqueue("failing header", "game_update", "-400")
+
+        assert self.outbox.drain() == 0
+
+        entries = self.entries()
+        assert [entries[text].attempts for text in ("touchdown", "failing header")] == [1, 1]
+        assert {entries[text].last_error for text in ("touchdown", "failing header")} == {"bluesky is down"}
+        assert entries["touchdown"].rkey not in bluesky.published
+
+    def test_rejected_post_dropped_from_batch(self, bluesky):
+        bluesky.reject_texts = ("too long",)
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.enqueue("touchdown", "game_update", "-400")
+        self.outbox.enqueue("too long", "game_update", "-400")
+        self.outbox.enqueue("extra point", "game_update", "-400")
+
+        assert self.outbox.drain() == 3
+
+        entries = self.entries()
+        assert [entries[text].status for text in ("header", "touchdown", "too long", "extra point")] == ["sent"] * 2 + ["failed", "sent"]
+        assert entries["too long"].last_error == "post is too long"
+        touchdown = self.session.get(Post, entries["touchdown"].post_id)
+        assert self.session.get(Post, entries["extra point"].post_id).parent_id == touchdown.id
+
+    def test_replies_merged_over_budget(self, bluesky, monkeypatch):
+        monkeypatch.setattr(outbox, "PostBudget", _PostBudget(limit=POST_COST * 3, window=timedelta(days=1)))
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.enqueue("Alabama scores!\nAuburn 0 - Alabama 7", "game_update", "-400", "Alabama TD + PAT")
+        self.outbox.enqueue("Auburn scores!\nAuburn 3 - Alabama 7", "game_update", "-400", "Auburn FG")
+        self.outbox.enqueue("other header", "game_header", "-401")
+
+        assert self.outbox.drain() == 3
+
+        entries = self.entries()
+        merged = entries["Alabama TD + PAT, Auburn FG, now Auburn 3 - Alabama 7"]
+        assert merged.status == "sent"
+        assert entries["Auburn scores!\nAuburn 3 - Alabama 7"].status == "merged"
+        assert bluesky.published[merged.rkey][0] == merged.post_text
+
+    def test_held_back_without_budget(self, bluesky, monkeypatch):
+        monkeypatch.setattr(outbox, "PostBudget", _PostBudget(limit=POST_COST, window=timedelta(days=1)))
+        self.outbox.enqueue("header", "game_header", "-400")
+        self.outbox.enqueue("other header", "game_header", "-401")
+
+        assert self.outbox.drain() == 1
+        assert sorted(entry.status for entry in self.entries().values()) == ["queued", "sent"]
+
+    def test_only_written_posts_paid_for(self, bluesky, monkeypatch):
+        budget = _PostBudget(limit=POST_COST * 10, window=timedelta(days=1))
+        monkeypatch.setattr(outbox, "PostBudget", budget)
+        bluesky.reject_texts = ("too long",)
+        self.outbox.enqueue("failing header", "game_header", "-400")
+        self.outbox.enqueue("header", "game_header", "-401")
+        entry = self.entries()["header"]
+        # published, but the process stopped before it was recorded
+        bluesky.publish_posts([bluesky.build_post("header", entry.rkey)])
+        entry.attempts = 1
+        self.session.commit()
+        self.outbox.enqueue("other header", "game_header", "-402")
+        self.outbox.enqueue("touchdown", "game_update", "-402")
+        self.outbox.enqueue("too long", "game_update", "-402")
+
+        assert self.outbox.drain() == 3
+        # only the other header and touchdown were written
+        assert budget.posts_available() == 8
+
+    def test_games_published_concurrently(self):
+        bluesky = FakeBluesky(latency=0.2)
+        self.outbox.sink = bluesky
+        for game_id in GAME_IDS:
+            self.outbox.enqueue(f"header {game_id}", "game_header", game_id)
+        for game_id in GAME_IDS:
+            self.outbox.enqueue(f"touchdown {game_id}", "game_update", game_id)
+
+        start = time.perf_counter()
+        assert self.outbox.drain() == 12
+        # one write per game, published side by side
+        assert time.perf_counter() - start < 0.2 * 3
+
+        # dicts keep insertion order, so this is the order posts were published in
+        order = [text for text, _ in bluesky.published.values()]
+        for game_id in GAME_IDS:
+            assert order.index(f"header {game_id}") < order.index(f"touchdown {game_id}")
@@ -0,0 +1,41 @@
+import logging
+import threading
+from datetime import timedelta
+
+import post_about_cfb
+
+
+class TestRunDaemon:
+    @staticmethod
+    def start_sender(stop_event: threading.Event) -> threading.Thread:
+        thread = threading.Thread(target=stop_event.wait)
+        thread.start()
+        return thread
+
+    def test_failed_tick_retried(self, monkeypatch, caplog):
+        caplog.set_level(logging.INFO)
+        stop = threading.Event()
+        ticks = []
+
+        def get_games(date):
+            ticks.append(date)
+            if len(ticks) == 1:
+                raise ConnectionError("espn is down")
+            stop.set()
+
+        monkeypatch.setattr(post_about_cfb, "get_games", get_games)
+        monkeypatch.setattr(post_about_cfb, "create_game_header_posts", lambda date: 2)
+        monkeypatch.setattr(post_about_cfb.db_utils, "get_games", lambda start, end: [])
+        monkeypatch.setattr(post_about_cfb, "apply_retention", lambda: None)
+        monkeypatch.setattr(post_about_cfb.Bluesky, "start_session_refresh", lambda stop_event: None)
+        monkeypatch.setattr(post_about_cfb.Bluesky, "save_session", lambda: None)
+        monkeypatch.setattr(post_about_cfb.Outbox, "start", self.start_sender)
+        monkeypatch.setattr(post_about_cfb.QueryBuffer, "flush", lambda: None)
+        monkeypatch.setattr(post_about_cfb.ESPNAPI, "close", lambda: None)
+
+        post_about_cfb.run_daemon(stop_event=stop, retry_interval=timedelta(0))
+
+        assert len(ticks) == 2
+        assert "Daemon tick failed" in caplog.text
+        assert "espn is down" in caplog.text
+        assert "Polled 0 games in 2 database commits" in caplog.text
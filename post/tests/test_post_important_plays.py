@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from db.game_state import GameStates
+from db.models import Game
+from post import post_important_plays as plays
+
+
+class TestPostImportantPlays:
+    @pytest.fixture(autouse=True)
+    def setup(self, database, game_row, monkeypatch):
+        self.session = database
+        self.session.add_all([Game(**game_row(game_id, last_post_id=-1)) for game_id in ("-600", "-601")])
+        self.session.add(Game(**game_row("-602")))
+        self.session.commit()
+
+        self.summaries = {game_id: {"header": {}, "scoringPlays": []} for game_id in ("-600", "-601", "-602")}
+        states = {
+            game_id: {"status": "STATUS_IN_PROGRESS", "scoreboard_home_score": 0, "scoreboard_away_score": 0}
+            for game_id in ("-600", "-601", "-602")
+        }
+        monkeypatch.setattr(plays, "get_game_states", lambda date: states)
+        monkeypatch.setattr(plays, "query_games", lambda game_ids: ((game_id, self.summaries[game_id]) for game_id in game_ids))
+
+    def stored_game(self, game_id: str) -> Game:
+        self.session.expire_all()
+        return self.session.get(Game, game_id)
+
+    def test_each_game_committed_on_its_own(self, monkeypatch, caplog):
+        def post_about_game(game_id: str, game_info: dict):
+            GameStates.get(game_id).update({"last_play_sequence": 5})
+            if game_id == "-600":
+                raise RuntimeError("bad summary")
+
+        monkeypatch.setattr(plays, "post_about_game", post_about_game)
+
+        commits = plays.post_important_plays(datetime(1808, 1, 1), [self.stored_game("-600"), self.stored_game("-601")])
+
+        assert commits == 1
+        assert (self.stored_game("-600").last_play_sequence, self.stored_game("-600").status) == (None, None)
+        assert (self.stored_game("-601").last_play_sequence, self.stored_game("-601").status) == (5, "STATUS_IN_PROGRESS")
+        assert "Couldn't post about game -600" in caplog.text
+
+    def test_state_kept_until_game_has_header(self, monkeypatch):
+        monkeypatch.setattr(plays, "post_about_game", lambda game_id, game_info: None)
+
+        plays.post_important_plays(datetime(1808, 1, 1), [self.stored_game("-601"), self.stored_game("-602")])
+
+        assert self.stored_game("-601").status == "STATUS_IN_PROGRESS"
+        assert self.stored_game("-602").status is None
+
+    def test_state_kept_without_current_summary(self, monkeypatch):
+        monkeypatch.setattr(plays, "post_about_game", lambda game_id, game_info: None)
+        self.summaries["-600"] = {}
+        self.summaries["-601"]["scoringPlays"] = [{"homeScore": 7, "awayScore": 0}]
+
+        plays.post_important_plays(datetime(1808, 1, 1), [self.stored_game("-600"), self.stored_game("-601")])
+
+        assert self.stored_game("-600").status is None
+        assert self.stored_game("-601").status is None
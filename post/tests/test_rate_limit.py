@@ -0,0 +1,64 @@
+import time
+from datetime import timedelta
+
+import httpx
+
+from post.rate_limit import _PostBudget
+
+
+def response(status_code: int, headers: dict, method: str | None = "com.atproto.repo.applyWrites") -> httpx.Response:
+    request = httpx.Request("POST", f"https://bsky.social/xrpc/{method}")
+    return httpx.Response(status_code, headers=headers, request=request)
+
+
+class TestPostBudget:
+    def test_take_until_empty(self):
+        budget = _PostBudget(limit=9, window=timedelta(days=1))
+
+        assert budget.posts_available() == 3
+        assert budget.take(2)
+        assert not budget.take(2)
+        assert budget.take(1)
+        assert budget.posts_available() == 0
+
+    def test_refund(self):
+        budget = _PostBudget(limit=9, window=timedelta(days=1))
+        assert budget.take(3)
+
+        budget.refund(2)
+
+        assert budget.posts_available() == 2
+        budget.refund(5)
+        assert budget.posts_available() == 3
+
+    def test_refills_over_window(self):
+        budget = _PostBudget(limit=30, window=timedelta(seconds=1))
+        assert budget.take(10)
+
+        time.sleep(0.2)
+
+        assert budget.posts_available() >= 2
+
+    def test_headers_replace_estimate(self):
+        budget = _PostBudget()
+
+        budget.track(response(200, {"ratelimit-limit": "1000", "ratelimit-remaining": "30", "ratelimit-policy": "1000;w=86400"}))
+
+        assert budget.limit == 1000
+        assert budget.window == timedelta(days=1)
+        assert budget.posts_available() == 10
+
+    def test_rate_limited_until_reset(self):
+        budget = _PostBudget(limit=3600, window=timedelta(seconds=1))
+
+        budget.track(response(429, {"ratelimit-remaining": "0", "ratelimit-reset": str(int(time.time()) + 60)}))
+
+        assert budget.posts_available() == 0
+        assert not budget.take(1)
+
+    def test_other_requests_ignored(self):
+        budget = _PostBudget()
+
+        budget.track(response(200, {"ratelimit-remaining": "0"}, "app.bsky.feed.getPostThread"))
+
+        assert budget.posts_available() == 5000 // 3
@@ -0,0 +1,70 @@
+import json
+import time
+from datetime import timedelta
+
+import pytest
+
+from post.sinks import JsonlSink, MemorySink, PostSink, fake_did
+
+REPLY_TO = {
+    "parent": {"uri": "at://did:plc:test/app.bsky.feed.post/3kabcdefghij2", "cid": "bafyreiparent"},
+    "root": {"uri": "at://did:plc:test/app.bsky.feed.post/3kabcdefghij2", "cid": "bafyreiparent"},
+}
+
+
+class TestPostSink:
+    def test_sinks_must_publish(self):
+        class NoPublish(PostSink):
+            def get_post(self, rkey):
+                return None
+
+        with pytest.raises(TypeError):
+            NoPublish()
+
+
+class TestMemorySink:
+    def test_posts_look_real(self):
+        sink = MemorySink()
+
+        header = sink.build_post("header", "3kabcdefghij2")
+        reply = sink.build_post("touchdown", "3kabcdefghij3", REPLY_TO)
+
+        assert header.uri == f"at://{fake_did('cfbot-memory')}/app.bsky.feed.post/3kabcdefghij2"
+        assert header.cid.startswith("bafyrei") and len(header.cid) == 59
+        assert reply.value["reply"]["parent"]["cid"] == "bafyreiparent"
+        assert reply.cid != header.cid
+
+    def test_publish_and_get(self):
+        sink = MemorySink(latency=timedelta(milliseconds=50))
+        posts = [sink.build_post(text, rkey) for text, rkey in (("header", "3kabcdefghij2"), ("touchdown", "3kabcdefghij3"))]
+
+        start = time.perf_counter()
+        published = sink.publish_posts(posts)
+
+        assert time.perf_counter() - start >= 0.05
+        assert published == [(post.uri, post.cid) for post in posts]
+        assert sink.get_post("3kabcdefghij3") == published[1]
+        assert sink.get_post("3kabcdefghij4") is None
+
+    def test_record_key_published_once(self):
+        sink = MemorySink()
+        sink.publish_posts([sink.build_post("header", "3kabcdefghij2")])
+
+        with pytest.raises(AssertionError):
+            sink.publish_posts([sink.build_post("touchdown", "3kabcdefghij3"), sink.build_post("header", "3kabcdefghij2")])
+        assert sink.get_post("3kabcdefghij3") is None
+
+
+class TestJsonlSink:
+    def test_posts_appended_and_read_back(self, tmp_path):
+        path = tmp_path / "posts.jsonl"
+        sink = JsonlSink(path)
+        header = sink.build_post("header", "3kabcdefghij2")
+        sink.publish_posts([header])
+        sink.publish_posts([sink.build_post("touchdown", "3kabcdefghij3", REPLY_TO)])
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["value"]["text"] for line in lines] == ["header", "touchdown"]
+        assert lines[0]["cid"] == header.cid
+
+        assert JsonlSink(path).get_post("3kabcdefghij2") == (header.uri, header.cid)
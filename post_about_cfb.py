@@ -1,21 +1,138 @@
-from datetime import datetime, timezone
+import argparse
+import logging
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
 
+from data.espn_api import ESPNAPI
 from data.get_games import get_games
+from data.scheduler import PollScheduler
 
+import db
+from db import db_utils
+from db.retention import apply_retention
+from db.telemetry import QueryBuffer
+from post.bluesky import Bluesky
+from post.outbox import Outbox
 from post.post_game_headers import create_game_header_posts
 from post.post_important_plays import post_important_plays
+from post.sinks import JsonlSink, MemorySink
 
 DATE = datetime.now(timezone.utc)
+DATABASE = "sqlite:///database.db"
+# runs that don't post to bluesky keep their outbox and threads away from the bot's
+SHADOW_DATABASE = "sqlite:///shadow.db"
 
 
 def post_about_cfb(date: datetime):
     """Wrapper function to execute each module."""
     get_games(date=date)
     # post_a_days_games(date=date)
-    create_game_header_posts(date=date)
-    post_important_plays(date=date)
+    commits = create_game_header_posts(date=date)
+    commits += post_important_plays(date=date)
+    logging.info(f"Made {commits} database commits")
+    QueryBuffer.flush()
+    logging.info(f"Published {Outbox.drain()} posts")
+    Bluesky.save_session()
+    logging.info(f"ESPN connection reuse: {ESPNAPI.connection_stats()}")
+
+
+def run_daemon(
+    slate_interval: timedelta | None = timedelta(minutes=30),
+    retention_interval: timedelta | None = timedelta(days=1),
+    stop_event: threading.Event | None = None,
+    retry_interval: timedelta | None = timedelta(minutes=1),
+):
+    """Keep polling games until stopped, scheduling each game on its own
+    interval. Sleeps until the next kickoff when no game is live. Queued posts
+    are published by a background sender, and the bluesky session is
+    refreshed in the background before it expires. A tick that fails is
+    logged and tried again after the retry interval.
+
+    Args:
+        slate_interval (timedelta): how often the day's slate is refreshed from the scoreboard
+        retention_interval (timedelta): how often old api_queries rows are rolled up
+        stop_event (optional, threading.Event): event that stops the daemon when set
+        retry_interval (timedelta): how long to wait after a tick fails
+    """
+    stop_event = stop_event or threading.Event()
+    Bluesky.start_session_refresh(stop_event)
+    sender = Outbox.start(stop_event)
+    last_slate = None
+    last_retention = None
+
+    while not stop_event.is_set():
+        try:
+            now = datetime.now(timezone.utc)
+            if last_slate is None or now - last_slate >= slate_interval:
+                get_games(date=now)
+                last_slate = now
+
+            commits = create_game_header_posts(date=now)
+
+            games = db_utils.get_games(now - timedelta(days=1), now + slate_interval)
+            due_games = PollScheduler.due_games(games, now)
+            if due_games:
+                commits += post_important_plays(date=now, games=due_games)
+                PollScheduler.schedule(due_games, now)
+            Outbox.wake()
+            QueryBuffer.flush()
+            # sessions refreshed in the background are saved from this thread
+            Bluesky.save_session()
+
+            if last_retention is None or now - last_retention >= retention_interval:
+                apply_retention()
+                last_retention = now
+
+            # game times are naive UTC
+            wakeups = [last_slate + slate_interval, PollScheduler.next_wakeup(games, now)]
+            sleep_until = min(wakeup.replace(tzinfo=timezone.utc) for wakeup in wakeups if wakeup)
+            sleep_seconds = max((sleep_until - datetime.now(timezone.utc)).total_seconds(), 0)
+            logging.info(f"Polled {len(due_games)} games in {commits} database commits, sleeping {sleep_seconds:.0f}s")
+        except Exception:
+            logging.exception("Daemon tick failed")
+            sleep_seconds = retry_interval.total_seconds()
+
+        stop_event.wait(sleep_seconds)
+
+    Outbox.wake()
+    sender.join()
+    QueryBuffer.flush()
+    Bluesky.save_session()
+    ESPNAPI.close()
 
 
 if __name__ == "__main__":
-    # DATE = datetime.strptime("2025-01-20 15:00:00", "%Y-%m-%d %H:%M:%S")  # for testing purposes only
-    post_about_cfb(date=DATE)
+    parser = argparse.ArgumentParser(description="Post college football updates to bluesky.")
+    parser.add_argument("--daemon", action="store_true", help="keep running and poll games on their own schedule")
+    parser.add_argument("--database", help=f"database url, defaults to {DATABASE} or {SHADOW_DATABASE} for a fake sink or PDS")
+    parser.add_argument(
+        "--sink",
+        choices=("bluesky", "memory", "jsonl"),
+        default="bluesky",
+        help="where posts are published, memory and jsonl don't post anywhere",
+    )
+    parser.add_argument("--sink-path", default="posts.jsonl", help="file the jsonl sink appends posts to")
+    parser.add_argument("--sink-latency", type=float, default=0, help="seconds each write to a fake sink takes")
+    parser.add_argument("--pds", help="url of the PDS the bluesky sink logs in to, e.g. a local post.fake_pds")
+    args = parser.parse_args()
+
+    shadow = args.sink != "bluesky" or args.pds is not None
+    if args.database is None:
+        args.database = SHADOW_DATABASE if shadow else DATABASE
+    elif shadow and args.database == DATABASE:
+        parser.error(f"a fake sink or PDS can't use {DATABASE}, its posts would be recorded as the bot's")
+
+    db.init_db(args.database)
+    Bluesky.base_url = args.pds
+    if args.sink != "bluesky":
+        latency = timedelta(seconds=args.sink_latency)
+        Outbox.sink = JsonlSink(args.sink_path, latency=latency) if args.sink == "jsonl" else MemorySink(latency=latency)
+    if args.daemon:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        run_daemon(stop_event=stop)
+    else:
+        # DATE = datetime.strptime("2025-01-20 15:00:00", "%Y-%m-%d %H:%M:%S")  # for testing purposes only
+        post_about_cfb(date=DATE)